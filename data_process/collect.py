@@ -1,32 +1,62 @@
-import serial, csv, time, os
+import serial, time, os
+import tracing
+from frame_protocol import FrameDecoder, AsciiFrameDecoder
+from frame_store import FrameStore
+from ingest import FrameRing, SerialReader, csv_sink, store_sink, write_batches
 
 port, baudrate = "COM6", 115200
 num_frames, num_pixels = 20, 768
+# "binary" matches BINARY_FRAMES 1 in colloect.ino, "ascii" reads the text debug stream;
+# with SUBPAGE_FRAMES 1 every chess subpage gives a new (rolling) frame, twice per sensor frame
+frame_format = "binary"
+# "store" appends to the binary frame store, "csv" to dataset/{label}/data_{label}.csv
+output, store_path = "store", "dataset/store"
+ring_capacity, batch_size = 256, 16
+# Chrome trace of the read/decode/write stages, e.g. "trace.json"; None to disable
+trace_path = None
+# Raw serial stream for window-evaluation.py --capture, e.g. "capture.bin"; None to disable
+capture_path = None
+if trace_path:
+    tracing.enable(trace_path)
 ser = serial.Serial(port, baudrate, timeout=1)
 time.sleep(2)
 
 # Ensure directories exist
 os.makedirs("dataset/person", exist_ok=True)
 os.makedirs("dataset/empty", exist_ok=True)
+store = FrameStore(store_path, mode="a") if output == "store" else None
+
+# Read the port on a background thread so disk writes never stall it
+decoder = FrameDecoder() if frame_format == "binary" else AsciiFrameDecoder()
+capture = open(capture_path, "ab") if capture_path else None
+reader = SerialReader(ser, decoder, FrameRing(ring_capacity), capture)
+reader.start()
 
 while True:
     label = input("Mode (person/empty), exit to quit: ").strip().lower()
     if label == "exit":
         break
-    csv_path = f"dataset/{label}/data_{label}.csv"
-    with open(csv_path, "a", newline="") as file:
-        writer = csv.writer(file)
-        frame_count, buffer = 0, []
-        print(f"Starting to collect {num_frames} frames for {label}...")
-        while frame_count < num_frames:
-            line = ser.readline().decode().strip()
-            if line in ("START_FRAME","END_FRAME") or not line:
-                continue
-            buffer.extend(line.split(","))
-            if len(buffer) >= num_pixels:
-                writer.writerow(buffer[:num_pixels])
-                buffer = buffer[num_pixels:]
-                frame_count += 1
-                print(f"  Collected {frame_count}/{num_frames}")
-        print(f"{label} data collection complete, saved to {csv_path}\n")
+    reader.reset()  # Discard frames and counts from while waiting for input
+    print(f"Starting to collect {num_frames} frames for {label}...")
+    if store is not None:
+        destination = store_path
+        frame_counts = write_batches(reader, store_sink(store, label, int(time.time())), num_frames, batch_size)
+    else:
+        destination = f"dataset/{label}/data_{label}.csv"
+        file = open(destination, "a", newline="")
+        frame_counts = write_batches(reader, csv_sink(file), num_frames, batch_size)
+    for frame_count in frame_counts:
+        print(f"  Collected {frame_count}/{num_frames}")
+    if store is None:
+        file.close()
+    print(f"{label} data collection complete, saved to {destination}")
+    stats = reader.stats()
+    print(f"  Link: {stats['received']} received, {stats['rejected']} rejected, "
+          f"{stats['dropped']} missing on the link, {stats['overruns']} overwritten in the queue, "
+          f"queue high-water {stats['high_water']}/{ring_capacity}\n")
+reader.stop()
 ser.close()
+if capture is not None:
+    capture.close()
+if trace_path:
+    print(f"Trace saved to {tracing.save()}")
@@ -0,0 +1,104 @@
+"""Chunked, vectorized loader for thermal CSV logs (768 values per row).
+
+Rows are checked for the right number of values with one call per row,
+then a whole chunk is converted to float32 by NumPy's C parser and
+rejected with vectorized NaN checks, instead of validating every cell in
+Python. Negative temperatures are accepted.
+"""
+import io
+from itertools import islice
+
+import numpy as np
+
+import tracing
+
+frame_width, frame_height = 32, 24
+num_pixels = frame_width * frame_height
+
+
+def count_rows(path, block_size=1 << 20):
+    """Number of lines in a file, counted in binary blocks"""
+    rows, last = 0, b"\n"
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            rows += block.count(b"\n")
+            last = block[-1:]
+    return rows + (last != b"\n")
+
+
+def parse_rows(lines):
+    """
+    Parse a list of CSV lines into frames
+
+    Returns (frames, ok): float32 frames of shape (len(lines), 768), and a
+    boolean mask that is False for rows with the wrong number of values,
+    non-numeric values or NaNs. Rejected rows are filled with NaN.
+    """
+    with tracing.span("parse", rows=len(lines)):
+        return _parse_rows(lines)
+
+
+def _parse_rows(lines):
+    frames = np.full((len(lines), num_pixels), np.nan, dtype=np.float32)
+    sized = np.fromiter((line.count(b",") for line in lines), dtype=np.int64, count=len(lines)) == num_pixels - 1
+    rows = np.flatnonzero(sized)
+    good = [lines[i] for i in rows]
+    try:
+        if good:
+            frames[rows] = np.loadtxt(io.BytesIO(b"".join(good)), delimiter=",", dtype=np.float32, ndmin=2)
+    except ValueError:
+        # A non-numeric cell somewhere in the chunk, fall back to row by row
+        for i, line in zip(rows, good):
+            try:
+                frames[i] = np.array(line.split(b","), dtype=np.float32)
+            except ValueError:
+                pass
+    ok = ~np.isnan(frames).any(axis=1)
+    return frames, ok
+
+
+def iter_csv_frames(path, batch_size=65536):
+    """
+    Generator over a CSV log in fixed-size batches, for files larger than RAM
+
+    Yields (frames, rejected): valid frames of shape (n, 24, 32) and the
+    0-based row numbers rejected in this batch.
+
+    Args:
+        path: CSV file with one 768-value frame per row
+        batch_size: Number of rows read per batch
+    """
+    with open(path, "rb") as f:
+        first_row = 0
+        while True:
+            lines = list(islice(f, batch_size))
+            if not lines:
+                break
+            frames, ok = parse_rows(lines)
+            yield frames[ok].reshape(-1, frame_height, frame_width), first_row + np.flatnonzero(~ok)
+            first_row += len(lines)
+
+
+def load_csv_frames(path, chunk_rows=65536):
+    """
+    Load a whole CSV log into one preallocated (N, 24, 32) float32 array
+
+    Returns (frames, rejected) where rejected holds the 0-based row numbers
+    that were skipped.
+
+    Args:
+        path: CSV file with one 768-value frame per row
+        chunk_rows: Number of rows parsed per chunk
+    """
+    frames = np.empty((count_rows(path), frame_height, frame_width), dtype=np.float32)
+    rejected = []
+    n = 0
+    for batch, bad in iter_csv_frames(path, chunk_rows):
+        frames[n:n + len(batch)] = batch
+        n += len(batch)
+        rejected.append(bad)
+    rejected = np.concatenate(rejected) if rejected else np.empty(0, dtype=np.int64)
+    return frames[:n], rejected
@@ -0,0 +1,296 @@
+"""Temporal delta codec for archiving thermal frame streams.
+
+Frames are quantized to int16 centi-degrees (lossless for the 2-decimal
+dataset CSVs), then split into chunks of `chunk_frames` frames. Each chunk
+starts with a keyframe; every other frame is stored as its int16
+difference, wrapping around, from the previous frame or from the keyframe.
+The residuals are byte-shuffled (all low bytes, then all high bytes) and
+compressed with zlib, lzma or bz2 from the standard library. Chunks are
+independent and listed in an index at the end of the file, so reading any
+range of frames only decompresses the chunks that overlap it.
+
+File layout:
+
+    header   HEADER: magic, version, compressor, reference, height, width, chunk_frames
+    chunks   compressed residuals, one block per chunk
+    index    INDEX_DTYPE record per chunk (offset, size, first frame, frames)
+    footer   FOOTER: index offset, chunk count, magic
+
+Usage:
+    python data_process/delta_codec.py encode dataset/person/data_person.csv person.tdc
+    python data_process/delta_codec.py decode person.tdc person.csv --start 100 --stop 200
+    python data_process/delta_codec.py bench dataset/person/data_person.csv dataset/empty/data_empty.csv
+"""
+import argparse
+import bz2
+import lzma
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from csv_frames import iter_csv_frames
+
+frame_width, frame_height = 32, 24
+MAGIC, FOOTER_MAGIC, VERSION = b"TDC1", b"TDCX", 1
+HEADER = struct.Struct("<4sBBBHHI")  # magic, version, compressor, reference, height, width, chunk_frames
+FOOTER = struct.Struct("<QI4s")  # index offset, chunk count, magic
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("size", "<u4"), ("first", "<u8"), ("frames", "<u4")])
+COMPRESSORS = {
+    "zlib": (1, lambda data, level: zlib.compress(data, level), zlib.decompress),
+    "lzma": (2, lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+    "bz2": (3, lambda data, level: bz2.compress(data, max(level, 1)), bz2.decompress),
+}
+REFERENCES = ("previous", "keyframe")
+NAN_CODE = -32768  # quantized value reserved for NaN pixels
+
+
+def quantize(frames):
+    """Float °C frames to int16 centi-degrees, NaN to NAN_CODE"""
+    frames = np.asarray(frames, dtype=np.float32)
+    q = np.clip(np.rint(frames * 100), NAN_CODE + 1, 32767)
+    return np.where(np.isnan(frames), NAN_CODE, q).astype(np.int16)
+
+
+def dequantize(q):
+    frames = q.astype(np.float32) / 100
+    frames[q == NAN_CODE] = np.nan
+    return frames
+
+
+def encode_chunk(q, reference="previous"):
+    """Delta-encode and byte-shuffle an (n, H, W) int16 chunk"""
+    residuals = q.copy()
+    if reference == "previous":
+        residuals[1:] = q[1:] - q[:-1]  # int16 arithmetic wraps around
+    else:
+        residuals[1:] = q[1:] - q[0]
+    return residuals.view(np.uint8).reshape(-1, 2).T.tobytes()
+
+
+def decode_chunk(data, n, shape, reference="previous"):
+    """Inverse of encode_chunk"""
+    planes = np.frombuffer(data, dtype=np.uint8).reshape(2, -1)
+    residuals = np.ascontiguousarray(planes.T).view(np.int16).reshape((n,) + shape)
+    if reference == "previous":
+        return np.cumsum(residuals, axis=0, dtype=np.int16)
+    q = residuals + residuals[0]
+    q[0] = residuals[0]
+    return q
+
+
+class DeltaWriter:
+    """
+    Write frames to a delta-coded archive
+
+    Args:
+        path: Output file
+        chunk_frames: Frames per independently compressed chunk (keyframe interval)
+        compressor: "zlib", "lzma" or "bz2"
+        level: Compression level (preset for lzma)
+        reference: Delta against the "previous" frame or the chunk's "keyframe"
+    """
+
+    def __init__(self, path, chunk_frames=256, compressor="zlib", level=6, reference="previous"):
+        self.file = open(path, "wb")
+        self.chunk_frames = chunk_frames
+        self.codec, self.compress, _ = COMPRESSORS[compressor]
+        self.level = level
+        self.reference = reference
+        self.pending = []
+        self.pending_frames = 0
+        self.frames = 0
+        self.index = []
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.codec, REFERENCES.index(reference),
+                                    frame_height, frame_width, chunk_frames))
+
+    def write(self, frames):
+        """Append a batch of (n, 24, 32) frames"""
+        q = quantize(frames).reshape(-1, frame_height, frame_width)
+        self.pending.append(q)
+        self.pending_frames += len(q)
+        if self.pending_frames >= self.chunk_frames:
+            q = np.concatenate(self.pending)
+            full = len(q) - len(q) % self.chunk_frames
+            for start in range(0, full, self.chunk_frames):
+                self._write_chunk(q[start:start + self.chunk_frames])
+            self.pending = [q[full:]]
+            self.pending_frames = len(q) - full
+
+    def _write_chunk(self, q):
+        data = self.compress(encode_chunk(q, self.reference), self.level)
+        self.index.append((self.file.tell(), len(data), self.frames, len(q)))
+        self.file.write(data)
+        self.frames += len(q)
+
+    def close(self):
+        if self.pending_frames:
+            self._write_chunk(np.concatenate(self.pending))
+        index_offset = self.file.tell()
+        self.file.write(np.array(self.index, dtype=INDEX_DTYPE).tobytes())
+        self.file.write(FOOTER.pack(index_offset, len(self.index), FOOTER_MAGIC))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DeltaReader:
+    """
+    Random-access reader for delta-coded archives
+
+    Args:
+        path: Archive written by DeltaWriter
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        magic, version, codec, reference, height, width, self.chunk_frames = HEADER.unpack(
+            self.file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            self.file.close()
+            raise ValueError(f"{path} is not a delta-coded frame archive")
+        self.shape = (height, width)
+        self.reference = REFERENCES[reference]
+        self.decompress = next(d for c, _, d in COMPRESSORS.values() if c == codec)
+        self.file.seek(-FOOTER.size, os.SEEK_END)
+        index_offset, chunks, magic = FOOTER.unpack(self.file.read(FOOTER.size))
+        if magic != FOOTER_MAGIC:
+            self.file.close()
+            raise ValueError(f"{path} is truncated (no chunk index)")
+        self.file.seek(index_offset)
+        self.index = np.frombuffer(self.file.read(chunks * INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE)
+        self.chunks_decoded = 0
+
+    def __len__(self):
+        return int(self.index["first"][-1] + self.index["frames"][-1]) if len(self.index) else 0
+
+    def _chunk(self, i):
+        entry = self.index[i]
+        self.file.seek(int(entry["offset"]))
+        data = self.decompress(self.file.read(int(entry["size"])))
+        self.chunks_decoded += 1
+        return decode_chunk(data, int(entry["frames"]), self.shape, self.reference)
+
+    def read(self, start=0, stop=None):
+        """Frames start..stop as float32 (n, 24, 32), decoding only the chunks they span"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return np.empty((0,) + self.shape, dtype=np.float32)
+        first = np.searchsorted(self.index["first"], start, side="right") - 1
+        last = np.searchsorted(self.index["first"], stop - 1, side="right") - 1
+        q = np.concatenate([self._chunk(i) for i in range(first, last + 1)])
+        offset = int(self.index["first"][first])
+        return dequantize(q[start - offset:stop - offset])
+
+    def iter_chunks(self):
+        """Yield every chunk's frames in order"""
+        for i in range(len(self.index)):
+            yield dequantize(self._chunk(i))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_source(path):
+    """Frame batches from a dataset CSV or a frame store directory"""
+    if os.path.isdir(path):
+        from frame_store import FrameStore
+        store = FrameStore(path)
+        for start in range(0, len(store), 65536):
+            yield store.frames[start:start + 65536]
+    else:
+        for frames, _ in iter_csv_frames(path):
+            yield frames
+
+
+def benchmark(paths, chunk_frames=256, settings=None):
+    """
+    Compression ratio and encode/decode speed for each compressor and
+    reference on the given CSV files, with speeds in MB/s of float32 frames
+
+    Args:
+        paths: Dataset CSV files
+        chunk_frames: Frames per chunk
+        settings: (compressor, level, reference) tuples to compare
+    """
+    import tempfile
+
+    settings = settings or [("zlib", 6, "previous"), ("zlib", 6, "keyframe"), ("zlib", 1, "previous"),
+                            ("lzma", 6, "previous"), ("bz2", 9, "previous")]
+    rows = []
+    for path in paths:
+        frames = np.concatenate(list(iter_source(path)))
+        csv_bytes = os.path.getsize(path)
+        raw_mb = frames.nbytes / 1e6
+        for compressor, level, reference in settings:
+            with tempfile.TemporaryDirectory() as tmp:
+                archive = os.path.join(tmp, "frames.tdc")
+                start = time.perf_counter()
+                with DeltaWriter(archive, chunk_frames, compressor, level, reference) as writer:
+                    writer.write(frames)
+                encode_s = time.perf_counter() - start
+                size = os.path.getsize(archive)
+                start = time.perf_counter()
+                with DeltaReader(archive) as reader:
+                    decoded = reader.read()
+                decode_s = time.perf_counter() - start
+            rows.append({
+                "file": os.path.basename(path), "frames": len(frames), "compressor": compressor, "level": level,
+                "reference": reference, "bytes": size, "ratio_csv": csv_bytes / size, "ratio_float32": frames.nbytes / size,
+                "encode_mb_s": raw_mb / encode_s, "decode_mb_s": raw_mb / decode_s,
+                "max_error": float(np.nanmax(np.abs(decoded - frames))) if len(frames) else 0.0,
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delta-coded archives of thermal frames")
+    sub = parser.add_subparsers(dest="command", required=True)
+    enc = sub.add_parser("encode", help="Archive a dataset CSV or frame store")
+    enc.add_argument("input", help="Dataset CSV file or frame store directory")
+    enc.add_argument("output", help="Archive file")
+    enc.add_argument("--chunk-frames", type=int, default=256, help="Frames per chunk (keyframe interval)")
+    enc.add_argument("--compressor", choices=list(COMPRESSORS), default="zlib", help="Compressor")
+    enc.add_argument("--level", type=int, default=6, help="Compression level")
+    enc.add_argument("--reference", choices=REFERENCES, default="previous", help="Delta reference frame")
+    dec = sub.add_parser("decode", help="Write frames from an archive to CSV")
+    dec.add_argument("input", help="Archive file")
+    dec.add_argument("output", help="CSV file")
+    dec.add_argument("--start", type=int, default=0, help="First frame")
+    dec.add_argument("--stop", type=int, help="Frame after the last one")
+    bench = sub.add_parser("bench", help="Report compression ratio and MB/s")
+    bench.add_argument("inputs", nargs="+", help="Dataset CSV files")
+    bench.add_argument("--chunk-frames", type=int, default=256, help="Frames per chunk")
+
+    args = parser.parse_args()
+    if args.command == "encode":
+        with DeltaWriter(args.output, args.chunk_frames, args.compressor, args.level, args.reference) as writer:
+            for frames in iter_source(args.input):
+                writer.write(frames)
+        print(f"Archived {writer.frames} frames in {len(writer.index)} chunks, "
+              f"{os.path.getsize(args.output) / 1e3:.1f} kB")
+    elif args.command == "decode":
+        with DeltaReader(args.input) as reader:
+            frames = reader.read(args.start, args.stop)
+            print(f"Decoded {len(frames)} frames from {reader.chunks_decoded} of {len(reader.index)} chunks")
+        np.savetxt(args.output, frames.reshape(len(frames), -1), fmt="%.2f", delimiter=",")
+    else:
+        print(f"{'File':<16}|{'Codec':^10}|{'Reference':^10}|{'Ratio vs CSV':^14}|{'vs float32':^12}|"
+              f"{'Encode MB/s':^13}|{'Decode MB/s':^13}|{'Max err':^9}")
+        print("-" * 104)
+        for row in benchmark(args.inputs, args.chunk_frames):
+            print(f"{row['file']:<16}|{row['compressor'] + '-' + str(row['level']):^10}|{row['reference']:^10}|"
+                  f"{row['ratio_csv']:^14.1f}|{row['ratio_float32']:^12.1f}|{row['encode_mb_s']:^13.1f}|"
+                  f"{row['decode_mb_s']:^13.1f}|{row['max_error']:^9.3f}")
@@ -0,0 +1,341 @@
+"""Binary frame protocol shared by the sensor firmware and the host tools.
+
+Packet layout (little-endian), as sent by device_code/colloect.ino with
+BINARY_FRAMES enabled:
+
+    sync       2 bytes   0xA5 0x5A
+    kind       uint8     KIND_FRAME for a full 32x24 frame, KIND_SUBPAGE0/1
+                         for one chess subpage, KIND_POOL2/4 for a pooled frame
+    seq        uint16    packet counter, wraps at 65536
+    timestamp  uint32    millis() on the device when the frame was read
+    pixels     int16[n]  temperatures in centi-degrees Celsius
+    crc        uint16    CRC-16/CCITT-FALSE over kind..pixels
+
+A full frame is 1547 bytes against roughly 4.6 KB for the ASCII text stream.
+
+With SUBPAGE_FRAMES enabled the firmware sends each chess subpage (the 384
+pixels where (row + col) % 2 is the subpage number, in row-major order) as
+soon as it is read instead of waiting for getFrame() to read both.
+SubpageMerger turns those packets back into a rolling full frame on every
+subpage. With POOL_SIZE 2 or 4 the firmware sends 2x2 or 4x4 block averages
+(or maxima) instead, 192 or 48 values in row-major order, which the merger
+expands back to 32x24.
+With BINARY_FRAMES 0 the firmware prints frames as text between START_FRAME
+and END_FRAME markers instead; AsciiFrameDecoder reads that format.
+"""
+import binascii
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+frame_width, frame_height = 32, 24
+num_pixels = frame_width * frame_height
+
+SYNC = b"\xA5\x5A"
+HEADER = struct.Struct("<BHI")  # kind, seq, timestamp_ms
+CRC = struct.Struct("<H")
+KIND_FRAME = 0
+KIND_SUBPAGE0, KIND_SUBPAGE1 = 1, 2
+KIND_POOL2, KIND_POOL4 = 3, 4
+POOL_SIZES = {KIND_POOL2: 2, KIND_POOL4: 4}
+subpage_pixels = num_pixels // 2
+PAYLOAD_PIXELS = {KIND_FRAME: num_pixels, KIND_SUBPAGE0: subpage_pixels, KIND_SUBPAGE1: subpage_pixels,
+                  **{kind: num_pixels // size ** 2 for kind, size in POOL_SIZES.items()}}
+_rows, _cols = np.divmod(np.arange(num_pixels), frame_width)
+SUBPAGE_INDEX = {KIND_SUBPAGE0 + parity: np.flatnonzero((_rows + _cols) % 2 == parity) for parity in (0, 1)}
+MAX_PACKET = len(SYNC) + HEADER.size + 2 * max(PAYLOAD_PIXELS.values()) + CRC.size
+
+Frame = namedtuple("Frame", "kind seq timestamp_ms pixels")
+Capture = namedtuple("Capture", "kind seq timestamp_ms pixels packet")
+
+
+def crc16(data):
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF), same as the firmware."""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def packet_size(kind=KIND_FRAME):
+    return len(SYNC) + HEADER.size + 2 * PAYLOAD_PIXELS[kind] + CRC.size
+
+
+def encode_frame(pixels, seq, timestamp_ms, kind=KIND_FRAME):
+    """
+    Encode one frame the way the firmware does
+
+    Args:
+        pixels: Temperatures in degrees Celsius, PAYLOAD_PIXELS[kind] values
+        seq: Packet sequence number (taken modulo 65536)
+        timestamp_ms: Device timestamp in milliseconds (taken modulo 2**32)
+        kind: Packet kind
+    """
+    centi = np.clip(np.rint(np.asarray(pixels, dtype=np.float64) * 100), -32768, 32767)
+    body = HEADER.pack(kind, seq & 0xFFFF, int(timestamp_ms) & 0xFFFFFFFF) + centi.astype("<i2").tobytes()
+    return SYNC + body + CRC.pack(crc16(body))
+
+
+def encode_subpage(pixels, parity, seq, timestamp_ms):
+    """
+    Encode one chess subpage of a full frame the way the firmware does with SUBPAGE_FRAMES
+
+    Args:
+        pixels: Full frame of 768 temperatures
+        parity: Subpage number, 0 or 1
+        seq: Packet sequence number
+        timestamp_ms: Device timestamp of the subpage in milliseconds
+    """
+    kind = KIND_SUBPAGE0 + parity
+    return encode_frame(np.asarray(pixels).reshape(-1)[SUBPAGE_INDEX[kind]], seq, timestamp_ms, kind)
+
+
+def expand_pooled(pixels, size):
+    """32x24 frame (flattened) from pooled values by repeating each over its block"""
+    grid = np.asarray(pixels).reshape(frame_height // size, frame_width // size)
+    return grid.repeat(size, axis=0).repeat(size, axis=1).reshape(-1)
+
+
+def encode_ascii_frame(pixels):
+    """Encode one frame as the firmware's ASCII debug output (32 values per line)."""
+    rows = np.asarray(pixels, dtype=np.float64).reshape(frame_height, frame_width)
+    lines = ["START_FRAME"] + [",".join(f"{v:.2f}" for v in row) for row in rows] + ["END_FRAME", ""]
+    return ("\r\n".join(lines) + "\r\n").encode()
+
+
+class FrameDecoder:
+    """
+    Incremental decoder for the binary packet stream
+
+    Bytes can be fed in chunks of any size. Corrupted packets are discarded and
+    the decoder resynchronises on the next sync word; text lines printed by the
+    firmware (start-up messages, errors) are skipped the same way.
+
+    Counters:
+        frames: Packets decoded successfully
+        corrupted: Candidate packets rejected by the CRC check
+        dropped: Sequence numbers missing between decoded packets, including
+            corrupted packets that fall between two good ones
+        skipped_bytes: Bytes discarded while searching for a sync word
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.last_seq = None
+        self.frames = 0
+        self.corrupted = 0
+        self.dropped = 0
+        self.skipped_bytes = 0
+
+    def feed(self, data):
+        """
+        Add received bytes and return the list of complete frames
+
+        Args:
+            data: Bytes read from the serial port
+        """
+        buf = self.buffer
+        buf += data
+        frames = []
+        pos = 0
+        while True:
+            start = buf.find(SYNC, pos)
+            if start < 0:
+                # Keep a trailing first sync byte, it may complete next time
+                keep = 1 if len(buf) > pos and buf[-1:] == SYNC[:1] else 0
+                self.skipped_bytes += len(buf) - pos - keep
+                pos = len(buf) - keep
+                break
+            self.skipped_bytes += start - pos
+            pos = start
+            header_end = start + len(SYNC) + HEADER.size
+            if len(buf) < header_end:
+                break
+            kind, seq, timestamp_ms = HEADER.unpack_from(buf, start + len(SYNC))
+            count = PAYLOAD_PIXELS.get(kind)
+            if count is None:
+                # Not a packet header, keep searching after this sync word
+                self.skipped_bytes += 1
+                pos = start + 1
+                continue
+            end = header_end + 2 * count + CRC.size
+            if len(buf) < end:
+                break
+            body = bytes(buf[start + len(SYNC):end - CRC.size])
+            if CRC.unpack_from(buf, end - CRC.size)[0] != crc16(body):
+                self.corrupted += 1
+                self.skipped_bytes += 1
+                pos = start + 1
+                continue
+            pixels = np.frombuffer(body, dtype="<i2", offset=HEADER.size).astype(np.float32) / 100
+            frames.append(Frame(kind, seq, timestamp_ms, pixels))
+            self._count(seq)
+            pos = end
+        del buf[:pos]
+        return frames
+
+    def _count(self, seq):
+        if self.last_seq is not None:
+            self.dropped += (seq - self.last_seq - 1) & 0xFFFF
+        self.last_seq = seq
+        self.frames += 1
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "corrupted": self.corrupted,
+            "skipped_bytes": self.skipped_bytes,
+        }
+
+
+class AsciiFrameDecoder:
+    """
+    Incremental decoder for the ASCII debug stream
+
+    Frames are split on the START_FRAME/END_FRAME markers, so a short or
+    garbled line only loses the frame it belongs to instead of shifting every
+    later frame. Has the same feed() interface as FrameDecoder.
+
+    Counters:
+        frames: Frames decoded successfully
+        rejected: Frames with the wrong number of values, non-numeric values
+            or a missing END_FRAME marker
+        skipped_lines: Non-empty lines outside of a frame
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.lines = None  # None while outside START_FRAME/END_FRAME
+        self.frames = 0
+        self.rejected = 0
+        self.skipped_lines = 0
+
+    def feed(self, data):
+        """
+        Add received bytes and return the list of complete frames
+
+        Args:
+            data: Bytes read from the serial port
+        """
+        self.buffer += data
+        *lines, rest = self.buffer.split(b"\n")
+        self.buffer = bytearray(rest)
+        frames = []
+        for line in lines:
+            line = line.strip()
+            if line == b"START_FRAME":
+                if self.lines is not None:
+                    self.rejected += 1
+                self.lines = []
+            elif line == b"END_FRAME":
+                if self.lines is None:
+                    self.skipped_lines += 1
+                    continue
+                pixels = self._parse(self.lines)
+                self.lines = None
+                if pixels is None:
+                    self.rejected += 1
+                    continue
+                frames.append(Frame(KIND_FRAME, self.frames & 0xFFFF, None, pixels))
+                self.frames += 1
+            elif self.lines is not None:
+                if line:
+                    self.lines.append(line)
+                if len(self.lines) > frame_height:
+                    self.rejected += 1
+                    self.lines = None
+            elif line:
+                self.skipped_lines += 1
+        return frames
+
+    @staticmethod
+    def _parse(lines):
+        try:
+            pixels = np.array(b",".join(lines).split(b","), dtype=np.float32)
+        except ValueError:
+            return None
+        return pixels if pixels.size == num_pixels else None
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "rejected": self.rejected,
+            "skipped_lines": self.skipped_lines,
+        }
+
+
+class SubpageMerger:
+    """
+    Rolling full frame assembled from chess subpage packets
+
+    Each subpage overwrites its half of the frame. Once both halves have been
+    seen, every subpage yields a full Frame with the subpage's kind, seq and
+    timestamp, so the host gets a new frame twice per sensor frame. After a
+    KIND_SUBPAGE1 packet the halves come from the same sensor frame, as from
+    getFrame(); after KIND_SUBPAGE0 they are half a frame apart. Full frames
+    pass through unchanged and replace both halves, pooled frames are
+    expanded to 32x24 first, so the merger can sit behind any binary or
+    ASCII decoder.
+
+    Counters:
+        subpages: Subpage packets received
+        merged: Full frames produced from subpages
+    """
+
+    def __init__(self):
+        self.pixels = np.zeros(num_pixels, dtype=np.float32)
+        self.seen = set()
+        self.subpages = 0
+        self.merged = 0
+
+    def update(self, frame):
+        """Return the full frame after this packet, or None while a half is still missing"""
+        if frame.kind in POOL_SIZES:
+            frame = frame._replace(pixels=expand_pooled(frame.pixels, POOL_SIZES[frame.kind]))
+        if frame.kind not in SUBPAGE_INDEX:
+            self.pixels[:] = frame.pixels
+            self.seen = set(SUBPAGE_INDEX)
+            return frame
+        self.pixels[SUBPAGE_INDEX[frame.kind]] = frame.pixels
+        self.seen.add(frame.kind)
+        self.subpages += 1
+        if len(self.seen) < len(SUBPAGE_INDEX):
+            return None
+        self.merged += 1
+        return Frame(frame.kind, frame.seq, frame.timestamp_ms, self.pixels.copy())
+
+    def merge(self, frames):
+        """Full frames for a list of decoded packets"""
+        merged = []
+        for frame in frames:
+            frame = self.update(frame)
+            if frame is not None:
+                merged.append(frame)
+        return merged
+
+
+def read_capture(path, chunk_size=1 << 20):
+    """
+    Decode a raw binary serial capture, merging subpages into full frames
+
+    Returns a Capture of arrays: kind, seq, timestamp_ms, pixels (N, 768) and
+    packet, the index among all decoded packets of the one that completed
+    each frame (to line up per-packet ground truth).
+
+    Args:
+        path: File with the bytes read from the port, e.g. from collect.py's capture_path
+        chunk_size: Bytes decoded at a time
+    """
+    decoder, merger, frames, packets, count = FrameDecoder(), SubpageMerger(), [], [], 0
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(chunk_size), b""):
+            for frame in decoder.feed(data):
+                merged = merger.update(frame)
+                if merged is not None:
+                    frames.append(merged)
+                    packets.append(count)
+                count += 1
+    return Capture(np.array([f.kind for f in frames], dtype=np.uint8),
+                   np.array([f.seq for f in frames], dtype=np.int64),
+                   np.array([f.timestamp_ms for f in frames], dtype=np.float64),
+                   np.array([f.pixels for f in frames], dtype=np.float32).reshape(-1, num_pixels),
+                   np.array(packets, dtype=np.int64))
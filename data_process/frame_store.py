@@ -0,0 +1,188 @@
+"""Append-only binary store of thermal frames, read through np.memmap.
+
+A store is a directory with three files:
+
+    frames.bin   float32 frames, shape (N, 24, 32), C order, no header
+    index.bin    one INDEX_DTYPE record per frame (label, session, timestamp, sensor)
+    meta.json    dtype, frame shape and label names
+
+Frames are written before their index records, and the number of frames a
+reader sees is taken from the number of complete records in index.bin, so a
+reader never sees a half-written frame while collect.py keeps appending.
+Appends start after the last complete record, so bytes left by an
+interrupted append are overwritten instead of shifting later frames.
+
+Usage:
+    python data_process/frame_store.py convert dataset dataset/store
+    python data_process/frame_store.py info dataset/store
+"""
+import argparse
+import glob
+import json
+import os
+
+import numpy as np
+
+from csv_frames import iter_csv_frames
+
+frame_width, frame_height = 32, 24
+FRAME_SHAPE = (frame_height, frame_width)
+FRAME_DTYPE = np.dtype("<f4")
+LABELS = ("empty", "person")
+INDEX_DTYPE = np.dtype([
+    ("label", "u1"),       # position in LABELS
+    ("session", "<u4"),    # collection run, e.g. the start time in seconds
+    ("timestamp", "<f8"),  # capture time in seconds since the epoch, NaN if unknown
+    ("sensor", "<u2"),     # sensor id for multi-sensor captures
+])
+
+
+class FrameStore:
+    """
+    Memory-mapped frame store
+
+    Args:
+        path: Store directory, created when mode is "a"
+        mode: "r" to read, "a" to read and append
+    """
+
+    def __init__(self, path, mode="r"):
+        self.path = path
+        self.mode = mode
+        self.frames_path = os.path.join(path, "frames.bin")
+        self.index_path = os.path.join(path, "index.bin")
+        meta_path = os.path.join(path, "meta.json")
+        if mode == "a" and not os.path.exists(meta_path):
+            os.makedirs(path, exist_ok=True)
+            with open(meta_path, "w") as f:
+                json.dump({"dtype": FRAME_DTYPE.str, "shape": FRAME_SHAPE, "labels": LABELS}, f, indent=2)
+            open(self.frames_path, "ab").close()
+            open(self.index_path, "ab").close()
+        with open(meta_path) as f:
+            meta = json.load(f)
+        self.labels = tuple(meta["labels"])
+        self.refresh()
+
+    def refresh(self):
+        """Map frames appended since the store was opened or last refreshed"""
+        n = os.path.getsize(self.index_path) // INDEX_DTYPE.itemsize
+        self.n = n
+        if n:
+            self.frames = np.memmap(self.frames_path, dtype=FRAME_DTYPE, mode="r", shape=(n,) + FRAME_SHAPE)
+            self.index = np.memmap(self.index_path, dtype=INDEX_DTYPE, mode="r", shape=(n,))
+        else:
+            self.frames = np.empty((0,) + FRAME_SHAPE, dtype=FRAME_DTYPE)
+            self.index = np.empty(0, dtype=INDEX_DTYPE)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, item):
+        return self.frames[item]
+
+    def label_code(self, label):
+        return self.labels.index(label)
+
+    def select(self, label=None, session=None, sensor=None):
+        """Indices of frames matching all given fields"""
+        mask = np.ones(self.n, dtype=bool)
+        if label is not None:
+            mask &= self.index["label"] == self.label_code(label)
+        if session is not None:
+            mask &= self.index["session"] == session
+        if sensor is not None:
+            mask &= self.index["sensor"] == sensor
+        return np.flatnonzero(mask)
+
+    def append(self, frames, label, session=0, timestamps=None, sensor=0):
+        """
+        Append frames and their index records
+
+        Args:
+            frames: Array of N frames, shape (N, 768) or (N, 24, 32)
+            label: Label name shared by all frames
+            session: Session id shared by all frames
+            timestamps: N capture times in seconds since the epoch, NaN if None
+            sensor: Sensor id shared by all frames, or N ids for frames from several sensors
+        """
+        if self.mode != "a":
+            raise ValueError("FrameStore opened read-only")
+        frames = np.ascontiguousarray(frames, dtype=FRAME_DTYPE).reshape((-1,) + FRAME_SHAPE)
+        records = np.zeros(len(frames), dtype=INDEX_DTYPE)
+        records["label"] = self.label_code(label)
+        records["session"] = session
+        records["timestamp"] = np.nan if timestamps is None else timestamps
+        records["sensor"] = sensor
+        # Frames first, so readers counting index records never see a partial frame.
+        # Both files are written at the position given by the complete index
+        # records, dropping bytes left behind by an append that was interrupted
+        n = os.path.getsize(self.index_path) // INDEX_DTYPE.itemsize
+        _write_at(self.frames_path, n * FRAME_DTYPE.itemsize * frame_width * frame_height, frames.tobytes())
+        _write_at(self.index_path, n * INDEX_DTYPE.itemsize, records.tobytes())
+        self.refresh()
+
+
+def _write_at(path, offset, data):
+    """Write data at offset and cut the file off after it"""
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+        f.truncate()
+
+
+def convert_csv(csv_file, store, label, session=0):
+    """
+    Append the frames of a dataset CSV to a store, skipping malformed rows
+
+    Args:
+        csv_file: CSV file with 768 values per row
+        store: FrameStore opened with mode "a"
+        label: Label of every frame in the file
+        session: Session id recorded for the converted frames
+    """
+    count = 0
+    for frames, _ in iter_csv_frames(csv_file):
+        if len(frames):
+            store.append(frames, label, session)
+            count += len(frames)
+    return count
+
+
+def convert_dataset(dataset_dir, store_path):
+    """
+    One-time conversion of dataset/{label}/data_{label}.csv into a store
+
+    Args:
+        dataset_dir: Directory with one sub-directory per label
+        store_path: Store directory to create or append to
+    """
+    store = FrameStore(store_path, mode="a")
+    for label in store.labels:
+        for session, csv_file in enumerate(sorted(glob.glob(os.path.join(dataset_dir, label, "*.csv")))):
+            count = convert_csv(csv_file, store, label, session)
+            print(f"{csv_file}: {count} frames -> {store_path} ({label})")
+    return store
+
+
+def print_info(store):
+    print(f"{store.path}: {len(store)} frames")
+    for code, label in enumerate(store.labels):
+        mask = store.index["label"] == code
+        sessions = np.unique(store.index["session"][mask])
+        print(f"  {label}: {mask.sum()} frames in {len(sessions)} sessions")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Binary thermal frame store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="Convert dataset CSV files into a store")
+    convert.add_argument("dataset", help="Dataset directory with person/ and empty/ folders")
+    convert.add_argument("store", help="Store directory")
+    info = sub.add_parser("info", help="Show frame counts of a store")
+    info.add_argument("store", help="Store directory")
+
+    args = parser.parse_args()
+    if args.command == "convert":
+        print_info(convert_dataset(args.dataset, args.store))
+    else:
+        print_info(FrameStore(args.store))
@@ -0,0 +1,170 @@
+"""Change-detection gating: skip classification when the scene is static.
+
+A per-pixel exponential moving average (EMA) tracks the background. Each
+frame is scored by its mean absolute difference from the background seen
+so far; the classifier only runs when the score reaches a threshold or
+when max_skip frames in a row have been skipped, and skipped frames reuse
+the last decision, as the firmware does with its history[] voting buffer
+when CHANGE_GATING is enabled in detect.ino.
+
+The EMA is evaluated in blocks with one small matrix multiply per block,
+so scoring a recording costs a few array operations per block of frames.
+
+Usage:
+    python data_process/gating.py --model model.npz \\
+        --csv dataset/person/data_person.csv:person dataset/empty/data_empty.csv:empty
+"""
+import argparse
+
+import numpy as np
+
+frame_width, frame_height = 32, 24
+num_pixels = frame_width * frame_height
+
+
+class ChangeGate:
+    """
+    Streaming EMA background and change gate
+
+    Args:
+        alpha: EMA weight of the newest frame
+        threshold: Mean absolute difference (°C) from the background that
+            triggers a classification
+        max_skip: Classify at least once every max_skip + 1 frames
+        block: Frames per EMA block
+    """
+
+    def __init__(self, alpha=0.1, threshold=0.3, max_skip=8, block=64):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.background = None
+        self.skipped = 0
+        self.last_decision = None
+        # weights[t, k] = contribution of frame k to the background after frame t
+        t = np.arange(block)
+        decay = (1 - alpha) ** np.maximum(t[:, None] - t[None, :], 0)
+        self.weights = np.where(t[:, None] >= t[None, :], alpha * decay, 0).astype(np.float32)
+        self.carry = ((1 - alpha) ** (t + 1)).astype(np.float32)
+
+    def ambient(self):
+        """Mean background temperature, None before the first frame"""
+        return None if self.background is None else float(self.background.mean())
+
+    def scores(self, frames):
+        """
+        Change score of each frame against the background before it, updating
+        the background with the frames
+
+        The first frame ever seen scores inf so it is always classified.
+        """
+        frames = np.asarray(frames, dtype=np.float32).reshape(-1, num_pixels)
+        scores = np.empty(len(frames), dtype=np.float32)
+        block = len(self.carry)
+        first = self.background is None
+        for start in range(0, len(frames), block):
+            chunk = frames[start:start + block]
+            n = len(chunk)
+            if self.background is None:
+                self.background = chunk[0].copy()
+            backgrounds = self.weights[:n, :n] @ chunk + self.carry[:n, None] * self.background
+            previous = np.vstack([self.background[None], backgrounds[:-1]])
+            scores[start:start + n] = np.abs(chunk - previous).mean(axis=1)
+            self.background = backgrounds[-1]
+        if first and len(frames):
+            scores[0] = np.inf
+        return scores
+
+    def gate(self, scores):
+        """Boolean mask of the frames to classify, carrying the skip count across calls"""
+        run = np.empty(len(scores), dtype=bool)
+        skipped = self.skipped
+        for i, score in enumerate(scores):
+            run[i] = score >= self.threshold or skipped >= self.max_skip
+            skipped = 0 if run[i] else skipped + 1
+        self.skipped = skipped
+        return run
+
+    def apply(self, frames, classify):
+        """
+        Classify the frames the gate lets through and reuse the last decision
+        for the others
+
+        Returns (decisions, run): one decision per frame and the mask of
+        frames that were classified.
+
+        Args:
+            frames: Batch of frames, consecutive with earlier calls
+            classify: Function mapping a batch of frames to one decision each
+        """
+        frames = np.asarray(frames, dtype=np.float32)
+        run = self.gate(self.scores(frames))
+        classified = classify(frames[run]) if run.any() else np.empty(0, dtype=np.int64)
+        # Forward fill: the number of frames classified so far indexes the decision to reuse
+        filled = np.concatenate([[self.last_decision if self.last_decision is not None else 0], classified])
+        decisions = filled[np.cumsum(run)]
+        if len(classified):
+            self.last_decision = classified[-1]
+        return decisions, run
+
+
+def evaluate_gating(model, batches, thresholds, alpha=0.1, max_skip=8, int8=False):
+    """
+    Frame accuracy with and without gating, and the fraction of skipped
+    inferences, for each threshold
+
+    Args:
+        model: inference.DenseClassifier
+        batches: Iterator of consecutive (frames, labels) batches
+        thresholds: Gate thresholds in °C
+        alpha: EMA weight of the newest frame
+        max_skip: Longest run of skipped frames
+        int8: Use the simulated int8 model
+    """
+    labels = np.array(model.labels, dtype=object)
+
+    def classify(frames):
+        return model.predict(frames, int8)[0]
+
+    gates = [ChangeGate(alpha, t, max_skip) for t in thresholds]
+    total, correct = 0, 0
+    gated = np.zeros((len(gates), 2), dtype=np.int64)  # correct, classified
+    for frames, truth in batches:
+        ungated = classify(frames)
+        total += len(frames)
+        correct += int(np.sum(labels[ungated] == truth))
+        for g, gate in enumerate(gates):
+            decisions, run = gate.apply(frames, classify)
+            gated[g] += [np.sum(labels[decisions] == truth), run.sum()]
+
+    base = correct / max(total, 1) * 100
+    return [{
+        "threshold": t,
+        "skipped": (1 - classified / max(total, 1)) * 100,
+        "accuracy": hits / max(total, 1) * 100,
+        "delta": hits / max(total, 1) * 100 - base,
+    } for t, (hits, classified) in zip(thresholds, gated)], base
+
+
+if __name__ == "__main__":
+    from inference import DenseClassifier, iter_labelled_batches
+
+    parser = argparse.ArgumentParser(description="Report inferences skipped and accuracy change with change gating")
+    parser.add_argument("--model", required=True, help=".npz model file")
+    parser.add_argument("--int8", action="store_true", help="Use the simulated int8 model")
+    parser.add_argument("--csv", nargs="*", default=[], help="Dataset CSV files as path:label, in recording order")
+    parser.add_argument("--store", help="Frame store directory")
+    parser.add_argument("--alpha", type=float, default=0.1, help="Background EMA weight of the newest frame")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.1, 0.2, 0.3, 0.5, 1.0],
+                        help="Gate thresholds (mean °C change)")
+    parser.add_argument("--max-skip", type=int, default=8, help="Longest run of skipped frames")
+
+    args = parser.parse_args()
+    model = DenseClassifier.load(args.model)
+    rows, base = evaluate_gating(model, iter_labelled_batches(args.csv, args.store), args.thresholds,
+                                 args.alpha, args.max_skip, args.int8)
+    print(f"Ungated frame accuracy: {base:.1f}%")
+    print(f"{'Threshold':^10}|{'Skipped (%)':^13}|{'Accuracy (%)':^14}|{'Change (pts)':^14}")
+    print("-" * 54)
+    for row in rows:
+        print(f"{row['threshold']:^10.2f}|{row['skipped']:^13.1f}|{row['accuracy']:^14.1f}|{row['delta']:^+14.2f}")
@@ -1,29 +1,31 @@
-import csv
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 import os  # Add import for directory and file handling
+from csv_frames import load_csv_frames
+from frame_store import FrameStore
+from png_export import export_frames
 
 # File name and frame dimensions
 csv_file = "dataset/person/data_person.csv"
 # csv_file = "dataset/empty/data_empty.csv"
 frame_width = 32
 frame_height = 24
+# Set to a frame store directory (see frame_store.py) to read from it instead of the CSV
+store_path, store_label = None, "person"
 
-# Read data from CSV file
+# Read data from CSV file, skipping malformed rows
 def read_csv_data(file):
-    frames = []
-    with open(file, "r") as f:
-        reader = csv.reader(f)
-        for row in reader:
-            # Skip rows containing non-numeric data
-            if any(not item.replace('.', '', 1).isdigit() for item in row):
-                continue
-            if len(row) == frame_width * frame_height:
-                frame = np.array(row, dtype=float).reshape((frame_height, frame_width))
-                frames.append(frame)
+    frames, rejected = load_csv_frames(file)
+    if len(rejected):
+        print(f"Skipped {len(rejected)} malformed rows")
     return frames
 
+# Read frames of one label from a binary frame store, memory-mapped
+def read_store_frames(path, label):
+    store = FrameStore(path)
+    return store.frames[store.select(label=label)]
+
 # Plot thermal imaging
 def plot_frames(frames):
     fig, ax = plt.subplots()
@@ -38,17 +40,16 @@ def plot_frames(frames):
     plt.title("Thermal Imaging")
     plt.show()
 
-# Save frames as images
-def save_frames_as_images(frames, output_dir):
-    os.makedirs(output_dir, exist_ok=True)
-    for i, frame in enumerate(frames):
-        plt.imsave(f"{output_dir}/frame_{i+1}.png", frame, cmap="inferno")
-    print(f"All frames have been saved to directory: {output_dir}")
+# Save frames as images, in parallel and skipping frames already exported
+def save_frames_as_images(frames, output_dir, scale=1):
+    stats = export_frames(frames, output_dir, scale=scale)
+    print(f"All frames have been saved to directory: {output_dir} "
+          f"({stats['exported']} exported, {stats['skipped']} unchanged, {stats['frames_per_s']:.0f} frames/s)")
 
 # Main program
 if __name__ == "__main__":
-    frames = read_csv_data(csv_file)
-    if frames:
+    frames = read_store_frames(store_path, store_label) if store_path else read_csv_data(csv_file)
+    if len(frames):
         print(f"Successfully loaded {len(frames)} frames of data")
         output_dir = "output_images"  # Specify the output directory
         save_frames_as_images(frames, output_dir)  # Save frames as images
@@ -0,0 +1,272 @@
+"""Host-side batched inference for the deployed Dense(20) -> Dense(10) -> softmax
+classifier, in float32 or simulated int8.
+
+The model is stored as an .npz file:
+
+    w0, b0, w1, b1, w2, b2    float32 Keras weights, w of shape (inputs, outputs)
+    labels                     class names in output order
+    scale_axes, mean, std      optional input normalisation: (x * scale_axes - mean) / std
+    reduce_*                   optional reduce.Reducer applied to the frames first
+
+and, for the int8 model, the TFLite-style quantization parameters written by
+DenseClassifier.quantize() or exported from the deployed model:
+
+    input_scale, input_zero_point
+    q_w{i} (int8), w{i}_scale, q_b{i} (int32), out{i}_scale, out{i}_zero_point
+
+The int8 path follows TFLite's integer kernels: int32 accumulation,
+requantization with a fixed-point multiplier and fused ReLU clamping. The
+final softmax is computed in float from the dequantized logits, so
+confidences can differ from the on-device table-based softmax by about one
+quantization step; the predicted class is the same.
+
+Usage:
+    python data_process/inference.py --model model.npz --store dataset/store
+    python data_process/inference.py --model model.npz --int8 \\
+        --csv dataset/person/data_person.csv:person dataset/empty/data_empty.csv:empty \\
+        --device-log raw_results.ndjson
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+import tracing
+
+num_pixels = 32 * 24
+
+
+def quantize_multiplier(multiplier):
+    """Split a real multiplier into a Q31 fixed-point value and a shift, as TFLite does"""
+    if multiplier == 0:
+        return 0, 0
+    q, shift = math.frexp(multiplier)
+    q_fixed = int(round(q * (1 << 31)))
+    if q_fixed == 1 << 31:
+        q_fixed //= 2
+        shift += 1
+    return q_fixed, shift
+
+
+def multiply_by_quantized_multiplier(acc, q_fixed, shift):
+    """gemmlowp SaturatingRoundingDoublingHighMul followed by RoundingDivideByPOT"""
+    x = acc.astype(np.int64) * (1 << max(shift, 0))
+    ab = x * q_fixed
+    nudged = ab + np.where(ab >= 0, 1 << 30, 1 - (1 << 30))
+    high = np.where(nudged >= 0, nudged >> 31, -((-nudged) >> 31))  # truncate toward zero
+    right = max(-shift, 0)
+    mask = (1 << right) - 1
+    threshold = (mask >> 1) + (high < 0)
+    return (high >> right) + ((high & mask) > threshold)
+
+
+def softmax(logits):
+    e = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class DenseClassifier:
+    """
+    Dense network with ReLU hidden layers and a softmax output
+
+    Args:
+        weights: List of (w, b) pairs, w of shape (inputs, outputs)
+        labels: Class names in output order
+        scale_axes: Input scale factor (Edge Impulse raw data block)
+        mean: Per-input or scalar mean subtracted after scaling
+        std: Per-input or scalar standard deviation divided after centering
+        quant: Optional dict of int8 quantization parameters
+        reducer: Optional reduce.Reducer turning frames into the model inputs
+    """
+
+    def __init__(self, weights, labels=("person", "empty"), scale_axes=1.0, mean=0.0, std=1.0, quant=None,
+                 reducer=None):
+        self.weights = [(np.asarray(w, np.float32), np.asarray(b, np.float32)) for w, b in weights]
+        self.labels = tuple(labels)
+        self.scale_axes = np.float32(scale_axes)
+        self.mean = np.asarray(mean, np.float32)
+        self.std = np.asarray(std, np.float32)
+        self.quant = quant
+        self.reducer = reducer
+
+    @classmethod
+    def load(cls, path):
+        from reduce import Reducer
+
+        data = np.load(path)
+        layers = sum(1 for k in data.files if k.startswith("w") and k[1:].isdigit())
+        weights = [(data[f"w{i}"], data[f"b{i}"]) for i in range(layers)]
+        quant = None
+        if "input_scale" in data.files:
+            quant = {k: data[k] for k in data.files if k.startswith(("input_", "q_", "out")) or k.endswith("_scale")}
+        return cls(weights, [str(l) for l in data["labels"]] if "labels" in data.files else ("person", "empty"),
+                   data["scale_axes"] if "scale_axes" in data.files else 1.0,
+                   data["mean"] if "mean" in data.files else 0.0,
+                   data["std"] if "std" in data.files else 1.0, quant, Reducer.from_arrays(data))
+
+    def save(self, path):
+        arrays = {"labels": np.array(self.labels), "scale_axes": self.scale_axes, "mean": self.mean, "std": self.std}
+        for i, (w, b) in enumerate(self.weights):
+            arrays[f"w{i}"], arrays[f"b{i}"] = w, b
+        arrays.update(self.quant or {})
+        if self.reducer is not None:
+            arrays.update(self.reducer.to_arrays())
+        np.savez(path, **arrays)
+
+    @property
+    def person_index(self):
+        return self.labels.index("person")
+
+    def preprocess(self, frames):
+        x = np.asarray(frames, dtype=np.float32).reshape(-1, num_pixels)
+        if self.reducer is not None:
+            x = self.reducer.transform(x)
+        return (x * self.scale_axes - self.mean) / self.std
+
+    def logits(self, frames):
+        """Float32 forward pass up to the softmax"""
+        x = self.preprocess(frames)
+        for i, (w, b) in enumerate(self.weights):
+            x = x @ w + b
+            if i < len(self.weights) - 1:
+                x = np.maximum(x, 0)
+        return x
+
+    def quantize(self, calibration_frames):
+        """
+        Simulate int8 post-training quantization: symmetric per-tensor int8
+        weights, int32 biases and asymmetric int8 activations calibrated on the
+        min/max seen over calibration_frames
+        """
+        def activation_params(values):
+            low, high = min(float(values.min()), 0.0), max(float(values.max()), 0.0)
+            scale = (high - low) / 255 or 1.0
+            return np.float32(scale), np.int32(round(-128 - low / scale))
+
+        x = self.preprocess(calibration_frames)
+        quant = {}
+        quant["input_scale"], quant["input_zero_point"] = activation_params(x)
+        in_scale = quant["input_scale"]
+        for i, (w, b) in enumerate(self.weights):
+            w_scale = np.float32(max(np.abs(w).max(), 1e-12) / 127)
+            quant[f"q_w{i}"] = np.clip(np.round(w / w_scale), -127, 127).astype(np.int8)
+            quant[f"w{i}_scale"] = w_scale
+            quant[f"q_b{i}"] = np.round(b / (in_scale * w_scale)).astype(np.int32)
+            x = x @ w + b
+            if i < len(self.weights) - 1:
+                x = np.maximum(x, 0)
+            quant[f"out{i}_scale"], quant[f"out{i}_zero_point"] = activation_params(x)
+            in_scale = quant[f"out{i}_scale"]
+        self.quant = quant
+        return quant
+
+    def int8_logits(self, frames):
+        """Integer forward pass, returns dequantized logits"""
+        q = self.quant
+        if q is None:
+            raise ValueError("model has no int8 parameters, call quantize() first")
+        x = self.preprocess(frames)
+        xq = np.clip(np.round(x / q["input_scale"]) + q["input_zero_point"], -128, 127).astype(np.int64)
+        in_scale, in_zp = float(q["input_scale"]), int(q["input_zero_point"])
+        for i in range(len(self.weights)):
+            acc = (xq - in_zp) @ q[f"q_w{i}"].astype(np.int64) + q[f"q_b{i}"]
+            out_scale, out_zp = float(q[f"out{i}_scale"]), int(q[f"out{i}_zero_point"])
+            q_fixed, shift = quantize_multiplier(in_scale * float(q[f"w{i}_scale"]) / out_scale)
+            low = out_zp if i < len(self.weights) - 1 else -128  # fused ReLU
+            xq = np.clip(multiply_by_quantized_multiplier(acc, q_fixed, shift) + out_zp, low, 127)
+            in_scale, in_zp = out_scale, out_zp
+        return (xq - in_zp).astype(np.float32) * in_scale
+
+    def predict_proba(self, frames, int8=False):
+        """Class probabilities of shape (N, classes) for a batch of frames"""
+        with tracing.span("infer", frames=len(frames), int8=int8):
+            return softmax(self.int8_logits(frames) if int8 else self.logits(frames))
+
+    def predict(self, frames, int8=False):
+        """Predicted class index and its confidence for each frame"""
+        proba = self.predict_proba(frames, int8)
+        index = proba.argmax(axis=1)
+        return index, proba[np.arange(len(proba)), index]
+
+
+def iter_labelled_batches(csv_specs=(), store_path=None, batch_size=65536):
+    """
+    Yield (frames, label) batches from dataset CSVs given as path:label, or a frame store
+
+    A .bin path is read as a raw binary capture instead of a CSV; with
+    subpage firmware it yields the rolling frame after every subpage.
+
+    Args:
+        csv_specs: Strings like "dataset/person/data_person.csv:person" or "capture.bin:person"
+        store_path: Frame store directory, every frame with its stored label
+        batch_size: Frames per batch
+    """
+    from csv_frames import iter_csv_frames
+    from frame_protocol import read_capture
+
+    for spec in csv_specs:
+        path, label = spec.rsplit(":", 1)
+        if path.endswith(".bin"):
+            pixels = read_capture(path).pixels
+            batches = (pixels[start:start + batch_size] for start in range(0, len(pixels), batch_size))
+        else:
+            batches = (frames for frames, _ in iter_csv_frames(path, batch_size))
+        for frames in batches:
+            yield frames, np.full(len(frames), label, dtype=object)
+    if store_path:
+        from frame_store import FrameStore
+        store = FrameStore(store_path)
+        names = np.array(store.labels, dtype=object)
+        for start in range(0, len(store), batch_size):
+            yield store.frames[start:start + batch_size], names[store.index["label"][start:start + batch_size]]
+
+
+def agreement(host_labels, device_labels):
+    """Fraction of frames where host and device predicted the same class"""
+    n = min(len(host_labels), len(device_labels))
+    if n == 0:
+        return float("nan")
+    return float(np.mean(np.asarray(host_labels[:n]) == np.asarray(device_labels[:n])))
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    parser = argparse.ArgumentParser(description="Score thermal frames with the deployed classifier on the host")
+    parser.add_argument("--model", required=True, help=".npz model file")
+    parser.add_argument("--int8", action="store_true", help="Use the simulated int8 model")
+    parser.add_argument("--csv", nargs="*", default=[], help="Dataset CSV files or raw .bin captures as path:label")
+    parser.add_argument("--store", help="Frame store directory")
+    parser.add_argument("--device-log", help="RESULT log (NDJSON) captured from the device on the same frames")
+    parser.add_argument("--batch-size", type=int, default=65536, help="Frames per batch")
+    parser.add_argument("--trace", help="Write a Chrome trace of the parse and infer stages to this file")
+
+    args = parser.parse_args()
+    if args.trace:
+        tracing.enable(args.trace)
+    model = DenseClassifier.load(args.model)
+    labels = np.array(model.labels, dtype=object)
+    predictions, correct, total, elapsed = [], 0, 0, 0.0
+    for frames, truth in iter_labelled_batches(args.csv, args.store, args.batch_size):
+        start = time.perf_counter()
+        index, _ = model.predict(frames, args.int8)
+        elapsed += time.perf_counter() - start
+        predicted = labels[index]
+        correct += int(np.sum(predicted == truth))
+        total += len(frames)
+        if args.device_log:
+            predictions.append(predicted)
+
+    print(f"Scored {total} frames ({'int8' if args.int8 else 'float32'}) at {total / max(elapsed, 1e-9):.0f} frames/s")
+    print(f"Accuracy against dataset labels: {correct / max(total, 1) * 100:.1f}%")
+    if args.device_log:
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_code"))
+        from ndjson_log import iter_records
+
+        device = [r["raw_prediction"] for r in iter_records(args.device_log)]
+        host = np.concatenate(predictions) if predictions else np.empty(0, dtype=object)
+        print(f"Agreement with {len(device)} device RESULT lines: {agreement(host, device) * 100:.1f}%")
+    if args.trace:
+        print(f"Trace saved to {tracing.save()}")
@@ -0,0 +1,183 @@
+"""Threaded serial ingestion: a reader thread fills a ring buffer of frames and
+a writer stage drains it in batches, so slow disk writes never stall the port.
+"""
+import threading
+import time
+
+import numpy as np
+
+import tracing
+from frame_protocol import SubpageMerger, num_pixels
+
+
+class FrameRing:
+    """
+    Preallocated ring buffer of 768-value frames shared by one producer and
+    one consumer
+
+    When the buffer is full the oldest frame is overwritten and counted in
+    `overruns`, so the serial reader never blocks on a slow consumer.
+
+    Args:
+        capacity: Number of frames the buffer holds
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.frames = np.empty((capacity, num_pixels), dtype=np.float32)
+        self.seqs = np.empty(capacity, dtype=np.int64)
+        self.host_times = np.empty(capacity, dtype=np.float64)
+        self.head = 0  # next slot to read
+        self.size = 0
+        self.high_water = 0
+        self.overruns = 0
+        self.cond = threading.Condition()
+
+    def put(self, pixels, seq, host_time):
+        with self.cond:
+            if self.size == self.capacity:
+                self.head = (self.head + 1) % self.capacity
+                self.size -= 1
+                self.overruns += 1
+            slot = (self.head + self.size) % self.capacity
+            self.frames[slot] = pixels
+            self.seqs[slot] = seq
+            self.host_times[slot] = host_time
+            self.size += 1
+            self.high_water = max(self.high_water, self.size)
+            self.cond.notify()
+
+    def get_batch(self, max_frames, timeout=1.0):
+        """
+        Remove up to max_frames frames, waiting up to timeout for the first one
+
+        Returns copies (frames, seqs, host_times), empty if nothing arrived.
+        """
+        with self.cond:
+            if not self.size:
+                self.cond.wait(timeout)
+            n = min(self.size, max_frames)
+            idx = (self.head + np.arange(n)) % self.capacity
+            batch = self.frames[idx], self.seqs[idx], self.host_times[idx]
+            self.head = (self.head + n) % self.capacity
+            self.size -= n
+            return batch
+
+    def clear(self):
+        """Discard queued frames and reset the high-water and overrun counters"""
+        with self.cond:
+            self.head = self.size = 0
+            self.high_water = self.overruns = 0
+
+    def stats(self):
+        return {"queued": self.size, "high_water": self.high_water, "overruns": self.overruns}
+
+
+class SerialReader(threading.Thread):
+    """
+    Background thread that reads the serial port, decodes frames and pushes
+    them into a FrameRing
+
+    Chess subpage packets are merged into a rolling full frame, so with
+    SUBPAGE_FRAMES firmware a frame is pushed for every subpage.
+
+    Args:
+        ser: Open serial.Serial (or any object with read() and in_waiting)
+        decoder: FrameDecoder or AsciiFrameDecoder matching the firmware output
+        ring: FrameRing to fill
+        capture: Optional binary file receiving every byte read, for read_capture()
+    """
+
+    def __init__(self, ser, decoder, ring, capture=None):
+        super().__init__(daemon=True)
+        self.ser = ser
+        self.decoder = decoder
+        self.merger = SubpageMerger()
+        self.ring = ring
+        self.capture = capture
+        self.running = True
+        self.error = None
+        self.baseline = {}
+
+    def run(self):
+        try:
+            while self.running:
+                with tracing.span("read"):
+                    data = self.ser.read(self.ser.in_waiting or 1)
+                if not data:
+                    continue
+                if self.capture is not None:
+                    self.capture.write(data)
+                now, received_ns = time.time(), time.perf_counter_ns()
+                with tracing.span("decode", bytes=len(data)) as span:
+                    frames = self.merger.merge(self.decoder.feed(data))
+                    if frames:
+                        span.set(seq=(frames[0].seq, frames[-1].seq))
+                for frame in frames:
+                    tracing.device_frame(frame.seq, frame.timestamp_ms, received_ns)
+                    self.ring.put(frame.pixels, frame.seq, now)
+        except Exception as e:  # reported to the main thread by stats()
+            self.error = e
+
+    def stop(self):
+        self.running = False
+        self.join(timeout=2)
+
+    def reset(self):
+        """Start a new collection run: empty the ring and restart all counters"""
+        self.ring.clear()
+        self.baseline = self.decoder.stats()
+
+    def stats(self):
+        """Counters since the last reset(), plus the ring's queue statistics"""
+        decoder = self.decoder.stats()
+        delta = {k: v - self.baseline.get(k, 0) for k, v in decoder.items()}
+        stats = {
+            "received": delta["frames"],
+            "rejected": delta.get("rejected", delta.get("corrupted", 0)),
+            "dropped": delta.get("dropped", 0),
+        }
+        stats.update(self.ring.stats())
+        if self.error is not None:
+            stats["error"] = repr(self.error)
+        return stats
+
+
+def csv_sink(file):
+    """Batch writer appending frames to an open CSV file, 2 decimals per value"""
+    def write(frames, host_times):
+        np.savetxt(file, frames, fmt="%.2f", delimiter=",")
+        file.flush()
+    return write
+
+
+def store_sink(store, label, session, sensor=0):
+    """Batch writer appending frames to a FrameStore with their receive times"""
+    def write(frames, host_times):
+        store.append(frames, label, session, host_times, sensor)
+    return write
+
+
+def write_batches(reader, write, num_frames, batch_size=16):
+    """
+    Writer stage: drain frames from the reader's ring in batches
+
+    Yields the number of frames written so far after each batch.
+
+    Args:
+        reader: Running SerialReader
+        write: Callable taking (frames, host_times), e.g. csv_sink() or store_sink()
+        num_frames: Number of frames to write before returning
+        batch_size: Maximum number of frames written per call
+    """
+    written = 0
+    while written < num_frames:
+        frames, seqs, host_times = reader.ring.get_batch(min(batch_size, num_frames - written))
+        if not len(frames):
+            if not reader.is_alive():
+                raise RuntimeError(f"Serial reader stopped: {reader.error!r}")
+            continue
+        with tracing.span("write", seq=(int(seqs[0]), int(seqs[-1])), frames=len(frames)):
+            write(frames, host_times)
+        written += len(frames)
+        yield written
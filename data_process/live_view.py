@@ -0,0 +1,184 @@
+"""Live thermal viewer with bounded memory.
+
+A background thread reads frames from the serial port or replays a capture
+and keeps only the newest one in a double buffer. The animation redraws the
+existing imshow artist with blitting and skips frames it was too slow to
+show, so memory stays flat and the display never lags behind a queue.
+
+Usage:
+    python data_process/live_view.py --port COM6
+    python data_process/live_view.py --replay dataset/person/data_person.csv --rate 8
+    python data_process/live_view.py --store dataset/store --label person --rate 16
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from csv_frames import iter_csv_frames
+from frame_protocol import AsciiFrameDecoder, FrameDecoder, SubpageMerger
+
+frame_width, frame_height = 32, 24
+
+
+class LatestFrame:
+    """
+    Double buffer holding only the newest frame
+
+    The producer fills the back buffer and swaps it to the front; frames
+    replaced before the viewer read them are counted in `stale`.
+    """
+
+    def __init__(self):
+        self.buffers = np.zeros((2, frame_height, frame_width), dtype=np.float32)
+        self.front = 0
+        self.seq = 0  # number of frames published, 0 = none yet
+        self.received_at = 0.0
+        self.read_seq = 0
+        self.stale = 0
+        self.lock = threading.Lock()
+
+    def publish(self, pixels):
+        back = 1 - self.front
+        self.buffers[back] = np.reshape(pixels, (frame_height, frame_width))
+        with self.lock:
+            if self.seq > self.read_seq:
+                self.stale += 1
+            self.front = back
+            self.seq += 1
+            self.received_at = time.perf_counter()
+
+    def read_into(self, out):
+        """
+        Copy the newest frame into out if it has not been read yet
+
+        Returns the receive time of the copied frame, or None if nothing new.
+        """
+        with self.lock:
+            if self.seq == self.read_seq:
+                return None
+            out[...] = self.buffers[self.front]
+            self.read_seq = self.seq
+            return self.received_at
+
+
+def serial_source(port, baudrate, frame_format="binary"):
+    """Yield frames from the sensor, decoded as in collect.py (subpages update a rolling frame)"""
+    import serial
+
+    decoder = FrameDecoder() if frame_format == "binary" else AsciiFrameDecoder()
+    merger = SubpageMerger()
+    with serial.Serial(port, baudrate, timeout=1) as ser:
+        while True:
+            for frame in merger.merge(decoder.feed(ser.read(ser.in_waiting or 1))):
+                yield frame.pixels
+
+
+def replay_source(frames, rate=None, loop=False):
+    """
+    Yield frames from an array, memmap or batch iterator factory at a fixed rate
+
+    Args:
+        frames: Sequence of frames, or a callable returning an iterator of
+            frame batches (for CSV logs read in chunks)
+        rate: Frames per second, None for as fast as possible
+        loop: Restart from the beginning at the end
+    """
+    period = 1 / rate if rate else 0
+    next_time = time.perf_counter()
+    while True:
+        batches = frames() if callable(frames) else [frames]
+        for batch in batches:
+            for frame in batch:
+                if period:
+                    next_time += period
+                    time.sleep(max(0.0, next_time - time.perf_counter()))
+                yield frame
+        if not loop:
+            return
+
+
+class FrameFeeder(threading.Thread):
+    """Daemon thread publishing frames from a source into a LatestFrame"""
+
+    def __init__(self, source, latest):
+        super().__init__(daemon=True)
+        self.source = source
+        self.latest = latest
+        self.done = False
+
+    def run(self):
+        for pixels in self.source:
+            self.latest.publish(pixels)
+        self.done = True
+
+
+def run_viewer(latest, interval_ms=30, vmin=20, vmax=35):
+    """
+    Show the newest frame with blitting, with render FPS and display lag
+
+    Args:
+        latest: LatestFrame filled by a FrameFeeder
+        interval_ms: Redraw period; keep it below the sensor frame period
+        vmin: Colour scale minimum in °C
+        vmax: Colour scale maximum in °C
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FuncAnimation
+
+    shown = np.zeros((frame_height, frame_width), dtype=np.float32)
+    fig, ax = plt.subplots()
+    im = ax.imshow(shown, cmap="inferno", interpolation="nearest", aspect="auto", vmin=vmin, vmax=vmax)
+    plt.colorbar(im, ax=ax, label="Temperature (°C)")
+    text = ax.text(0.02, 0.97, "waiting for frames...", transform=ax.transAxes, va="top", color="white")
+    plt.title("Thermal Imaging (live)")
+    state = {"last": None, "fps": 0.0}
+
+    def update(_):
+        received_at = latest.read_into(shown)
+        if received_at is None:
+            return [im, text]
+        now = time.perf_counter()
+        if state["last"] is not None:
+            state["fps"] = 0.9 * state["fps"] + 0.1 / max(now - state["last"], 1e-6)
+        state["last"] = now
+        im.set_data(shown)
+        text.set_text(f"{state['fps']:.1f} FPS  lag {(now - received_at) * 1000:.0f} ms  "
+                      f"skipped {latest.stale}")
+        return [im, text]
+
+    ani = FuncAnimation(fig, update, interval=interval_ms, blit=True, cache_frame_data=False)
+    plt.show()
+    return ani
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live thermal viewer")
+    parser.add_argument("--port", help="Serial port of the sensor")
+    parser.add_argument("--baudrate", type=int, default=115200, help="Baud rate")
+    parser.add_argument("--format", choices=["binary", "ascii"], default="binary", help="Firmware output format")
+    parser.add_argument("--replay", help="Dataset CSV file to replay")
+    parser.add_argument("--store", help="Frame store directory to replay")
+    parser.add_argument("--label", help="Only replay frames with this label from the store")
+    parser.add_argument("--rate", type=float, default=4, help="Replay rate in frames per second")
+    parser.add_argument("--loop", action="store_true", help="Repeat the replay")
+    parser.add_argument("--vmin", type=float, default=20, help="Colour scale minimum (°C)")
+    parser.add_argument("--vmax", type=float, default=35, help="Colour scale maximum (°C)")
+
+    args = parser.parse_args()
+    if args.port:
+        source = serial_source(args.port, args.baudrate, args.format)
+    elif args.replay:
+        source = replay_source(lambda: (batch for batch, _ in iter_csv_frames(args.replay, 4096)), args.rate, args.loop)
+    elif args.store:
+        from frame_store import FrameStore
+        store = FrameStore(args.store)
+        index = range(len(store)) if args.label is None else store.select(label=args.label)
+        source = replay_source(lambda: [(store.frames[i] for i in index)], args.rate, args.loop)
+    else:
+        parser.error("one of --port, --replay or --store is required")
+
+    latest = LatestFrame()
+    FrameFeeder(source, latest).start()
+    run_viewer(latest, vmin=args.vmin, vmax=args.vmax)
@@ -0,0 +1,332 @@
+"""Collect frames from many sensors in one process with asyncio.
+
+Each sensor (a serial port, or a TCP endpoint for network-bridged sensors
+and local stand-ins) gets its own connection task and decoder, and pushes
+decoded frames into its own bounded queue. When a queue is full the task
+stops reading, so backpressure reaches the OS buffers and shows up as
+sequence gaps in that sensor's metrics instead of unbounded memory. One
+writer task drains all queues and appends everything to the frame store in
+a single batch per flush, tagged with each frame's sensor id. Lost
+connections are retried with exponential backoff, so sensors can be
+unplugged and plugged back in while the collector runs.
+
+Usage:
+    python data_process/multi_collect.py --label person --store dataset/store \\
+        --sensor 1=/dev/ttyACM0 --sensor 2=COM7@230400 --sensor 10=tcp://192.168.1.20:9000 --duration 600
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import tracing
+from frame_protocol import AsciiFrameDecoder, FrameDecoder, SubpageMerger, num_pixels
+from frame_store import FrameStore
+
+SensorSpec = namedtuple("SensorSpec", "sensor_id address")
+
+
+def parse_sensor(text):
+    """
+    Parse "id=address" where address is tcp://host:port or a serial port with
+    an optional @baudrate
+    """
+    sensor_id, address = text.split("=", 1)
+    return SensorSpec(int(sensor_id), address)
+
+
+class SensorMetrics:
+    """Per-sensor counters and the frame rate over the last second or more"""
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+        self.corrupted = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.blocked_s = 0.0  # time spent waiting on a full queue
+        self.connected = False
+        self.rate = 0.0
+        self.error = None
+        self._window = (None, 0)  # start time and frames of the current rate window
+
+    def frame_received(self, now):
+        self.frames += 1
+        start, count = self._window
+        if start is None:
+            self._window = (now, 0)
+        elif now - start >= 1.0:
+            self.rate = (count + 1) / (now - start)
+            self._window = (now, 0)
+        else:
+            self._window = (start, count + 1)
+
+    def as_dict(self):
+        return {k: v for k, v in vars(self).items() if not k.startswith("_")}
+
+
+class _SerialStream:
+    """
+    Non-blocking pyserial port read through the event loop
+
+    The port is only watched while read() waits: a level-triggered reader
+    left registered while the sensor task is blocked on a full queue would
+    fire on every loop iteration and spin the CPU.
+    """
+
+    def __init__(self, ser):
+        self.ser = ser
+        self.ready = asyncio.Event()
+        self.loop = asyncio.get_running_loop()
+        try:
+            self.loop.add_reader(ser.fileno(), self.ready.set)
+            self.loop.remove_reader(ser.fileno())
+            self.polled = False
+        except (AttributeError, NotImplementedError):
+            self.polled = True  # no selectable handle (Windows): poll
+
+    async def read(self):
+        while True:
+            if self.polled:
+                await asyncio.sleep(0.01)
+            else:
+                self.ready.clear()
+                self.loop.add_reader(self.ser.fileno(), self.ready.set)
+                try:
+                    await self.ready.wait()
+                finally:
+                    self.loop.remove_reader(self.ser.fileno())
+            data = self.ser.read(self.ser.in_waiting or 1)
+            if data:
+                return data
+
+    def close(self):
+        self.ser.close()
+
+
+class _TcpStream:
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+
+    async def read(self):
+        data = await self.reader.read(65536)
+        if not data:
+            raise ConnectionError("connection closed by the sensor")
+        return data
+
+    def close(self):
+        self.writer.close()
+
+
+async def open_stream(address):
+    """Connect to tcp://host:port or open a serial port given as port[@baudrate]"""
+    if address.startswith("tcp://"):
+        host, port = address[len("tcp://"):].rsplit(":", 1)
+        return _TcpStream(*await asyncio.open_connection(host, int(port)))
+    import serial
+    port, _, baudrate = address.partition("@")
+    return _SerialStream(serial.Serial(port, int(baudrate or 115200), timeout=0))
+
+
+class MultiCollector:
+    """
+    Asyncio collector for many sensors sharing one batched store writer
+
+    Args:
+        sensors: SensorSpec list; more can be added while running with add_sensor()
+        store: FrameStore opened with mode "a"
+        label: Label of the collected frames
+        session: Session id, the start time by default
+        frame_format: "binary" or "ascii" firmware output
+        queue_size: Frames buffered per sensor before its reads stop
+        batch_frames: Flush when this many frames are pending across all sensors
+        flush_interval: Flush at least this often, in seconds
+        backoff: (first, max) reconnect delay in seconds
+    """
+
+    def __init__(self, sensors, store, label, session=None, frame_format="binary", queue_size=64,
+                 batch_frames=512, flush_interval=1.0, backoff=(0.5, 30.0)):
+        self.store = store
+        self.label = label
+        self.session = int(time.time()) if session is None else session
+        self.frame_format = frame_format
+        self.queue_size = queue_size
+        self.batch_frames = batch_frames
+        self.flush_interval = flush_interval
+        self.backoff = backoff
+        self.sensors = list(sensors)
+        self.queues = {}
+        self.metrics = {}
+        self.tasks = {}
+        self.written = 0
+        self.flushes = 0
+        self.wake = None
+        self.stopping = False
+
+    def add_sensor(self, spec):
+        """Start collecting from another sensor (only while run() is active)"""
+        self.queues[spec.sensor_id] = asyncio.Queue(self.queue_size)
+        self.metrics[spec.sensor_id] = SensorMetrics()
+        self.tasks[spec.sensor_id] = asyncio.create_task(self._sensor(spec))
+
+    async def remove_sensor(self, sensor_id):
+        """Stop collecting from a sensor; frames already queued are still written"""
+        task = self.tasks.pop(sensor_id)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def _sensor(self, spec):
+        metrics, queue = self.metrics[spec.sensor_id], self.queues[spec.sensor_id]
+        delay = self.backoff[0]
+        while True:
+            decoder = FrameDecoder() if self.frame_format == "binary" else AsciiFrameDecoder()
+            merger = SubpageMerger()
+            corrupted, dropped = metrics.corrupted, metrics.dropped  # totals from earlier connections
+            stream = None
+            try:
+                stream = await open_stream(spec.address)
+                metrics.connected, metrics.error = True, None
+                delay = self.backoff[0]
+                while True:
+                    data = await stream.read()
+                    metrics.bytes += len(data)
+                    with tracing.span("decode", sensor=spec.sensor_id, bytes=len(data)):
+                        frames = merger.merge(decoder.feed(data))
+                    now = time.time()
+                    for frame in frames:
+                        if queue.full():
+                            blocked = time.perf_counter()
+                            await queue.put((frame.pixels, now))
+                            metrics.blocked_s += time.perf_counter() - blocked
+                        else:
+                            queue.put_nowait((frame.pixels, now))
+                        metrics.frame_received(now)
+                    stats = decoder.stats()
+                    metrics.corrupted = corrupted + stats.get("corrupted", stats.get("rejected", 0))
+                    metrics.dropped = dropped + stats.get("dropped", 0)
+                    if sum(q.qsize() for q in self.queues.values()) >= self.batch_frames:
+                        self.wake.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # unplugged, refused, reset: retry with backoff
+                metrics.error = repr(e)
+            finally:
+                metrics.connected = False
+                if stream is not None:
+                    stream.close()
+            metrics.reconnects += 1
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, self.backoff[1])
+
+    def _drain(self):
+        frames, times, sensors = [], [], []
+        for sensor_id, queue in self.queues.items():
+            n = queue.qsize()
+            for _ in range(n):
+                pixels, received = queue.get_nowait()
+                frames.append(pixels)
+                times.append(received)
+            sensors += [sensor_id] * n
+        return frames, times, sensors
+
+    async def _flush(self):
+        frames, times, sensors = self._drain()
+        if not frames:
+            return
+        with tracing.span("write", frames=len(frames)):
+            await asyncio.to_thread(self.store.append, np.stack(frames).reshape(-1, num_pixels), self.label,
+                                    self.session, np.array(times), np.array(sensors))
+        self.written += len(frames)
+        self.flushes += 1
+
+    async def _writer(self):
+        while not self.stopping:
+            try:
+                await asyncio.wait_for(self.wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            await self._flush()
+
+    async def run(self, duration=None, report=None, report_interval=5.0):
+        """
+        Collect until duration seconds have passed (forever if None) or the
+        task is cancelled, then write what is queued
+
+        Args:
+            duration: Collection time in seconds
+            report: Optional callable receiving self.stats() every report_interval seconds
+            report_interval: Seconds between reports
+        """
+        self.wake = asyncio.Event()
+        self.stopping = False
+        for spec in self.sensors:
+            self.add_sensor(spec)
+        writer = asyncio.create_task(self._writer())
+        start = time.monotonic()
+        try:
+            while duration is None or time.monotonic() - start < duration:
+                step = report_interval if duration is None else min(report_interval, duration - (time.monotonic() - start))
+                await asyncio.sleep(max(step, 0))
+                if report is not None:
+                    report(self.stats())
+        finally:
+            for sensor_id in list(self.tasks):
+                await self.remove_sensor(sensor_id)
+            self.stopping = True
+            self.wake.set()
+            await writer
+            await self._flush()
+        return self.stats()
+
+    def stats(self):
+        """Totals and per-sensor metrics"""
+        return {
+            "written": self.written,
+            "flushes": self.flushes,
+            "queued": sum(q.qsize() for q in self.queues.values()),
+            "rate": sum(m.rate for m in self.metrics.values() if m.connected),
+            "sensors": {sensor_id: m.as_dict() for sensor_id, m in self.metrics.items()},
+        }
+
+
+def print_report(stats):
+    connected = sum(m["connected"] for m in stats["sensors"].values())
+    print(f"{connected}/{len(stats['sensors'])} sensors connected, {stats['rate']:.1f} frames/s, "
+          f"{stats['written']} written, {stats['queued']} queued")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect frames from many sensors into a frame store")
+    parser.add_argument("--sensor", action="append", type=parse_sensor, required=True,
+                        help="id=address, address is a serial port[@baudrate] or tcp://host:port; repeatable")
+    parser.add_argument("--label", required=True, help="Label of the collected frames")
+    parser.add_argument("--store", default="dataset/store", help="Frame store directory")
+    parser.add_argument("--format", choices=["binary", "ascii"], default="binary", help="Firmware output format")
+    parser.add_argument("--duration", type=float, help="Collection time in seconds, until Ctrl+C if omitted")
+    parser.add_argument("--queue-size", type=int, default=64, help="Frames buffered per sensor")
+    parser.add_argument("--batch-frames", type=int, default=512, help="Pending frames that trigger a flush")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="Seconds between flushes")
+    parser.add_argument("--trace", help="Write a Chrome trace of the decode and write stages to this file")
+
+    args = parser.parse_args()
+    if args.trace:
+        tracing.enable(args.trace)
+    collector = MultiCollector(args.sensor, FrameStore(args.store, mode="a"), args.label,
+                               frame_format=args.format, queue_size=args.queue_size,
+                               batch_frames=args.batch_frames, flush_interval=args.flush_interval)
+    try:
+        stats = asyncio.run(collector.run(args.duration, print_report))
+    except KeyboardInterrupt:
+        stats = collector.stats()
+    print(f"\nWrote {stats['written']} frames in {stats['flushes']} flushes to {args.store}")
+    print(f"{'Sensor':^8}|{'Frames':^9}|{'Rate (Hz)':^11}|{'Corrupted':^11}|{'Dropped':^9}|{'Reconnects':^12}|{'Blocked (s)':^12}")
+    print("-" * 78)
+    for sensor_id, m in sorted(stats["sensors"].items()):
+        print(f"{sensor_id:^8}|{m['frames']:^9}|{m['rate']:^11.2f}|{m['corrupted']:^11}|{m['dropped']:^9}|"
+              f"{m['reconnects']:^12}|{m['blocked_s']:^12.2f}")
+    if args.trace:
+        print(f"Trace saved to {tracing.save()}")
@@ -0,0 +1,128 @@
+"""Fast PNG export of thermal frames with the inferno colormap.
+
+Frames are normalised and coloured in batches through a 256-entry lookup
+table, then PNG-encoded with zlib across a process pool. A manifest of
+content hashes in the output directory makes reruns incremental: frames
+whose image is already on disk are skipped.
+"""
+import hashlib
+import json
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+MANIFEST = ".export_manifest.json"
+_lut = None
+
+
+def inferno_lut():
+    """The inferno colormap as a (256, 3) uint8 table, built once"""
+    global _lut
+    if _lut is None:
+        from matplotlib import colormaps
+        _lut = colormaps["inferno"](np.arange(256), bytes=True)[:, :3]
+    return _lut
+
+
+def colorize(frames, lut=None, scale=1):
+    """
+    Map a batch of frames to RGB images, each normalised to its own min/max
+    like plt.imsave does
+
+    Args:
+        frames: Array of shape (N, H, W)
+        lut: (256, 3) uint8 colour table, inferno by default
+        scale: Integer nearest-neighbour upscaling factor
+    """
+    lut = inferno_lut() if lut is None else lut
+    frames = np.asarray(frames, dtype=np.float32)
+    low = frames.min(axis=(1, 2), keepdims=True)
+    span = frames.max(axis=(1, 2), keepdims=True) - low
+    norm = (frames - low) / np.where(span > 0, span, 1)
+    index = np.minimum((norm * 256).astype(np.int32), 255)
+    rgb = lut[index]
+    if scale > 1:
+        rgb = rgb.repeat(scale, axis=1).repeat(scale, axis=2)
+    return rgb
+
+
+def encode_png(rgb, level=6):
+    """Encode an (H, W, 3) uint8 image as PNG bytes"""
+    height, width, _ = rgb.shape
+    raw = np.zeros((height, 1 + 3 * width), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = rgb.reshape(height, -1)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), level)) + chunk(b"IEND", b""))
+
+
+def _write_pngs(jobs):
+    for path, rgb in jobs:
+        with open(path, "wb") as f:
+            f.write(encode_png(rgb))
+    return len(jobs)
+
+
+def frame_hash(frame, scale):
+    data = np.ascontiguousarray(frame, dtype=np.float32).tobytes()
+    return hashlib.sha1(data + struct.pack("<I", scale)).hexdigest()
+
+
+def export_frames(frames, output_dir, scale=1, workers=None, batch_size=256, prefix="frame_"):
+    """
+    Export frames as {prefix}{i+1}.png, skipping images already up to date
+
+    Returns a dict with exported and skipped counts, seconds and frames/s.
+
+    Args:
+        frames: Array or sequence of (24, 32) frames
+        output_dir: Directory for the PNG files and the manifest
+        scale: Integer nearest-neighbour upscaling factor
+        workers: Number of encoder processes, os.cpu_count() by default
+        batch_size: Frames coloured and handed to a worker at a time
+    """
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    todo = []
+    for i, frame in enumerate(frames):
+        name = f"{prefix}{i + 1}.png"
+        digest = frame_hash(frame, scale)
+        if manifest.get(name) == digest and os.path.exists(os.path.join(output_dir, name)):
+            continue
+        manifest[name] = digest
+        todo.append(i)
+
+    exported = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for b in range(0, len(todo), batch_size):
+            idx = todo[b:b + batch_size]
+            rgb = colorize(np.stack([frames[i] for i in idx]), scale=scale)
+            jobs = [(os.path.join(output_dir, f"{prefix}{i + 1}.png"), img) for i, img in zip(idx, rgb)]
+            futures.append(pool.submit(_write_pngs, jobs))
+        for future in futures:
+            exported += future.result()
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    seconds = time.perf_counter() - start
+    return {
+        "exported": exported,
+        "skipped": len(frames) - exported,
+        "seconds": seconds,
+        "frames_per_s": exported / seconds if seconds > 0 else 0.0,
+    }
@@ -0,0 +1,226 @@
+"""Resolution and region-of-interest reduction of thermal frames.
+
+A Reducer turns (N, 24, 32) batches into shorter feature vectors in up to
+three vectorized steps:
+
+    pooling      2x2 or 4x4 blocks averaged or max-pooled (192 or 48 values)
+    ROI          a fixed mask (row/column bands or a .npy file) or the most
+                 discriminative pixels learned from labelled frames
+    projections  mean of every row and column inside the ROI instead of the
+                 pixels themselves (24 + 32 values at full resolution)
+
+Reductions are written as "+"-separated specs, e.g. "max2+rows4-20+proj":
+
+    full             no reduction
+    avg2 avg4        average pooling
+    max2 max4        max pooling
+    rows4-20         keep rows 4..19 (cols8-24 likewise), e.g. to drop ceiling or floor
+    roi@mask.npy     fixed boolean mask of shape (24, 32)
+    roi0.25          learn the best quarter of the pixels with fit()
+    proj             row and column projections
+
+Only pooling is mirrored by the firmware: POOL_SIZE in device_code/colloect.ino
+sends the pooled values instead of the full frame, and the host expands them
+back to 32x24 (frame_protocol), so pooling those frames again gives the same
+values. ROI and projections run on the host, so the serial link still carries
+the whole pooled grid (Reducer.shape) for those specs.
+
+Usage:
+    python data_process/reduce.py --spec max2+rows4-20 \\
+        --csv dataset/person/data_person.csv:person dataset/empty/data_empty.csv:empty --output reduced.npz
+"""
+import argparse
+
+import numpy as np
+
+frame_width, frame_height = 32, 24
+POOL_MODES = {"avg": "mean", "max": "max"}
+
+
+class Reducer:
+    """
+    Configurable reduction of frames to classifier inputs
+
+    Args:
+        pool: Pooling block size, 1, 2 or 4
+        pool_mode: "mean" or "max"
+        roi: None, a boolean (24, 32) mask, or the fraction of (pooled)
+            pixels to keep, learned by fit()
+        projection: Replace the pixels by row and column means
+    """
+
+    def __init__(self, pool=1, pool_mode="mean", roi=None, projection=False):
+        if frame_height % pool or frame_width % pool:
+            raise ValueError(f"pool size must divide {frame_height}x{frame_width}, got {pool}")
+        if pool_mode not in ("mean", "max"):
+            raise ValueError(f"pool_mode must be 'mean' or 'max', got {pool_mode!r}")
+        self.pool = pool
+        self.pool_mode = pool_mode
+        self.keep = None
+        self.mask = None
+        self.spec = None
+        if isinstance(roi, (int, float)) and not isinstance(roi, bool):
+            self.keep = float(roi)
+        elif roi is not None:
+            self.mask = self._pool_mask(np.asarray(roi, dtype=bool).reshape(frame_height, frame_width))
+        self.projection = projection
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Build a Reducer from a spec string like "avg2+roi0.5+proj" """
+        pool, mode, roi, projection = 1, "mean", None, False
+        for token in spec.split("+"):
+            if token == "full":
+                continue
+            if token[:3] in POOL_MODES and token[3:].isdigit():
+                pool, mode = int(token[3:]), POOL_MODES[token[:3]]
+            elif token == "proj":
+                projection = True
+            elif token.startswith("roi@"):
+                roi = _combine(roi, np.load(token[4:]).astype(bool))
+            elif token.startswith("roi"):
+                roi = float(token[3:])
+            elif token.startswith(("rows", "cols")):
+                first, last = (int(v) for v in token[4:].split("-"))
+                band = np.zeros((frame_height, frame_width), dtype=bool)
+                if token.startswith("rows"):
+                    band[first:last] = True
+                else:
+                    band[:, first:last] = True
+                roi = _combine(roi, band)
+            else:
+                raise ValueError(f"unknown reduction {token!r} in {spec!r}")
+        reducer = cls(pool, mode, roi, projection)
+        reducer.spec = spec
+        return reducer
+
+    @property
+    def shape(self):
+        """Grid shape after pooling"""
+        return frame_height // self.pool, frame_width // self.pool
+
+    def _pool_mask(self, mask):
+        h, w = self.shape
+        return mask.reshape(h, self.pool, w, self.pool).any(axis=(1, 3))
+
+    def pool_frames(self, frames):
+        """Pooled (N, 24 / pool, 32 / pool) grids"""
+        frames = np.asarray(frames, dtype=np.float32).reshape(-1, frame_height, frame_width)
+        if self.pool == 1:
+            return frames
+        # Accumulating strided views is faster than reducing over block axes
+        combine = np.maximum if self.pool_mode == "max" else np.add
+        out = frames[:, ::self.pool, ::self.pool].copy()
+        for dr in range(self.pool):
+            for dc in range(self.pool):
+                if dr or dc:
+                    combine(out, frames[:, dr::self.pool, dc::self.pool], out=out)
+        if self.pool_mode == "mean":
+            out /= self.pool ** 2
+        return out
+
+    def fit(self, frames, labels):
+        """
+        Learn the ROI: keep the pooled pixels with the highest Fisher score
+        (squared difference of the class means over the sum of the class
+        variances) between person and empty frames
+
+        Args:
+            frames: Training frames, shape (N, 24, 32) or (N, 768)
+            labels: Class name of every frame
+        """
+        if self.keep is None:
+            return self
+        grids = self.pool_frames(frames)
+        person = np.asarray(labels) == "person"
+        a, b = grids[person], grids[~person]
+        score = (a.mean(axis=0) - b.mean(axis=0)) ** 2 / (a.var(axis=0) + b.var(axis=0) + 1e-6)
+        count = max(1, int(round(self.keep * score.size)))
+        self.mask = np.zeros(score.size, dtype=bool)
+        self.mask[np.argsort(score, axis=None)[-count:]] = True
+        self.mask = self.mask.reshape(self.shape)
+        return self
+
+    def transform(self, frames):
+        """Reduced float32 features of shape (N, output_size)"""
+        if self.keep is not None and self.mask is None:
+            raise ValueError("learned ROI, call fit() first")
+        grids = self.pool_frames(frames)
+        n = len(grids)
+        mask = self.mask
+        if not self.projection:
+            flat = grids.reshape(n, -1)
+            return np.ascontiguousarray(flat if mask is None else flat[:, mask.ravel()])
+        if mask is None:
+            return np.concatenate([grids.mean(axis=2), grids.mean(axis=1)], axis=1)
+        rows, cols = mask.any(axis=1), mask.any(axis=0)
+        masked = grids * mask
+        row_means = masked.sum(axis=2)[:, rows] / mask.sum(axis=1)[rows]
+        col_means = masked.sum(axis=1)[:, cols] / mask.sum(axis=0)[cols]
+        return np.concatenate([row_means, col_means], axis=1).astype(np.float32)
+
+    @property
+    def output_size(self):
+        if self.keep is not None and self.mask is None:
+            raise ValueError("learned ROI, call fit() first")
+        h, w = self.shape
+        mask = np.ones((h, w), dtype=bool) if self.mask is None else self.mask
+        if self.projection:
+            return int(mask.any(axis=1).sum() + mask.any(axis=0).sum())
+        return int(mask.sum())
+
+    def to_arrays(self):
+        """Parameters as reduce_* arrays for a model .npz file"""
+        arrays = {"reduce_pool": np.int64(self.pool), "reduce_mode": np.array(self.pool_mode),
+                  "reduce_projection": np.bool_(self.projection)}
+        if self.mask is not None:
+            arrays["reduce_mask"] = self.mask
+        if self.spec:
+            arrays["reduce_spec"] = np.array(self.spec)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, data):
+        """Reducer saved with to_arrays(), None if data has no reduce_* arrays"""
+        if "reduce_pool" not in data:
+            return None
+        reducer = cls(int(data["reduce_pool"]), str(data["reduce_mode"]), None, bool(data["reduce_projection"]))
+        if "reduce_mask" in data:
+            reducer.mask = np.asarray(data["reduce_mask"], dtype=bool)
+        if "reduce_spec" in data:
+            reducer.spec = str(data["reduce_spec"])
+        return reducer
+
+    def __repr__(self):
+        return f"Reducer({self.spec or ''!r})"
+
+
+def _combine(mask, other):
+    return other if mask is None else mask & other
+
+
+if __name__ == "__main__":
+    import time
+
+    from inference import iter_labelled_batches
+
+    parser = argparse.ArgumentParser(description="Reduce thermal frames to shorter classifier inputs")
+    parser.add_argument("--spec", required=True, help='Reduction, e.g. "max2+rows4-20+proj"')
+    parser.add_argument("--csv", nargs="*", default=[], help="Dataset CSV files or raw .bin captures as path:label")
+    parser.add_argument("--store", help="Frame store directory")
+    parser.add_argument("--output", help="Save features, labels and the ROI mask to this .npz file")
+
+    args = parser.parse_args()
+    batches = list(iter_labelled_batches(args.csv, args.store))
+    frames = np.concatenate([f.reshape(-1, frame_height * frame_width) for f, _ in batches])
+    labels = np.concatenate([l for _, l in batches])
+    reducer = Reducer.from_spec(args.spec).fit(frames, labels)
+    start = time.perf_counter()
+    features = reducer.transform(frames)
+    elapsed = time.perf_counter() - start
+    print(f"{len(frames)} frames -> {reducer.output_size} values each "
+          f"({len(frames) / max(elapsed, 1e-9):.0f} frames/s)")
+    if args.output:
+        mask = reducer.mask if reducer.mask is not None else np.ones(reducer.shape, dtype=bool)
+        np.savez(args.output, features=features, labels=labels.astype(str), mask=mask, spec=args.spec)
+        print(f"Saved to {args.output}")
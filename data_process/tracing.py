@@ -0,0 +1,141 @@
+"""Per-stage pipeline tracing in Chrome trace format.
+
+Stages wrap their work in `span()`; each span records its thread, start,
+duration and the frame sequence ids it covered. Frames decoded from the
+binary protocol also carry the device's millis() timestamp, which
+`device_frame()` maps onto the host clock so the serial transfer of every
+frame shows up on its own track. `save()` writes a trace.json that opens in
+chrome://tracing or https://ui.perfetto.dev.
+
+Tracing is off by default. While disabled, `span()` returns a shared no-op
+context manager after one global check, so the calls can stay in
+production code paths.
+
+    import tracing
+    tracing.enable("trace.json")
+    with tracing.span("decode", seq=frame.seq):
+        ...
+    tracing.save()
+"""
+import json
+import os
+import threading
+import time
+
+enabled = False
+_path = None
+_start_ns = 0
+_events = []  # (name, thread, start_ns, end_ns, args) host spans
+_device = []  # (seq, device_ms, received_ns) frames with a device timestamp
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        _events.append((self.name, threading.get_ident(), self.start, time.perf_counter_ns(), self.args))
+        return False
+
+    def set(self, **args):
+        """Add arguments known only once the work is done, e.g. a frame count"""
+        self.args.update(args)
+
+
+def enable(path="trace.json"):
+    """Start recording, discarding anything recorded before"""
+    global enabled, _path, _start_ns
+    _events.clear()
+    _device.clear()
+    _path, _start_ns, enabled = path, time.perf_counter_ns(), True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def span(name, seq=None, **args):
+    """
+    Context manager recording one stage as a complete event
+
+    Args:
+        name: Stage name, e.g. "read", "decode", "parse", "infer", "vote", "write"
+        seq: Frame sequence id, or a (first, last) range for a batch
+        args: Extra arguments shown in the trace viewer
+    """
+    if not enabled:
+        return _NULL_SPAN
+    if seq is not None:
+        args["seq"] = seq
+    return _Span(name, args)
+
+
+def device_frame(seq, device_ms, received_ns=None):
+    """
+    Record a frame's device timestamp (millis() when it was read) and the
+    host time it was decoded, for the transfer track
+
+    Args:
+        seq: Frame sequence id
+        device_ms: Device timestamp in milliseconds
+        received_ns: Host perf_counter_ns() when the frame arrived, now by default
+    """
+    if enabled and device_ms is not None:
+        _device.append((seq, device_ms, time.perf_counter_ns() if received_ns is None else received_ns))
+
+
+def events():
+    """The recorded spans as Chrome trace event dicts"""
+    pid = os.getpid()
+    result = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "host"}},
+              {"name": "process_name", "ph": "M", "pid": 0, "args": {"name": "device"}}]
+    tids = {}
+    for name, thread, start, end, args in _events:
+        tid = tids.setdefault(thread, len(tids) + 1)
+        result.append({"name": name, "cat": "host", "ph": "X", "pid": pid, "tid": tid,
+                       "ts": (start - _start_ns) / 1e3, "dur": (end - start) / 1e3, "args": args})
+    names = {t.ident: t.name for t in threading.enumerate()}
+    for thread, tid in tids.items():
+        result.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                       "args": {"name": names.get(thread, f"thread {tid}")}})
+    if _device:
+        # Device clock offset from the fastest frame: assumes its transfer took no time
+        offset_ns = min(received - device_ms * 1e6 for _, device_ms, received in _device)
+        for seq, device_ms, received in _device:
+            read_ns = device_ms * 1e6 + offset_ns
+            result.append({"name": "frame read", "cat": "device", "ph": "i", "s": "t", "pid": 0, "tid": 1,
+                           "ts": (read_ns - _start_ns) / 1e3, "args": {"seq": seq, "device_ms": device_ms}})
+            result.append({"name": "transfer", "cat": "device", "ph": "X", "pid": 0, "tid": 2,
+                           "ts": (read_ns - _start_ns) / 1e3, "dur": (received - read_ns) / 1e3,
+                           "args": {"seq": seq}})
+    return result
+
+
+def save(path=None):
+    """Write the trace to path (the one given to enable() by default)"""
+    path = path or _path
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events(), "displayTimeUnit": "ms"}, f)
+    return path
@@ -0,0 +1,168 @@
+"""Train the dense person/empty classifier on the CPU with NumPy.
+
+Reproduces the Edge Impulse setup from the README: ReLU hidden layers with
+an L1 activity regularizer, a softmax output, cross-entropy loss and Adam,
+on frames standardised with the training set's mean and standard deviation.
+The result is a DenseClassifier, so it can be quantized, scored and saved
+with inference.py.
+
+Usage:
+    python data_process/train_dense.py --hidden 20 10 --output model.npz \\
+        --csv dataset/person/data_person.csv:person dataset/empty/data_empty.csv:empty
+"""
+import argparse
+
+import numpy as np
+
+from inference import DenseClassifier, num_pixels
+
+LABELS = ("person", "empty")  # output order of the deployed model
+
+
+def stratified_folds(labels, folds=5, seed=0):
+    """
+    Fold index (0..folds-1) of every sample, with each class spread evenly
+    over the folds
+
+    Args:
+        labels: Class label of every sample
+        folds: Number of folds
+        seed: Shuffle seed
+    """
+    labels = np.asarray(labels)
+    rng = np.random.default_rng(seed)
+    fold = np.empty(len(labels), dtype=np.int64)
+    for label in np.unique(labels):
+        members = rng.permutation(np.flatnonzero(labels == label))
+        fold[members] = np.arange(len(members)) % folds
+    return fold
+
+
+def _inputs(frames, labels, reducer):
+    x = np.asarray(frames, dtype=np.float32).reshape(-1, num_pixels)
+    labels = np.asarray(labels)
+    if reducer is not None:
+        x = reducer.fit(x, labels).transform(x)
+    return x, labels
+
+
+def train_dense(frames, labels, hidden=(20, 10), epochs=60, batch_size=32, learning_rate=1e-3, l1=1e-5,
+                seed=0, reducer=None):
+    """
+    Train a DenseClassifier with Adam on mini-batches
+
+    Args:
+        frames: Array of shape (N, 24, 32) or (N, 768)
+        labels: Class name of every frame, from LABELS
+        hidden: Hidden layer widths, e.g. (20, 10) or (64, 32, 16)
+        epochs: Passes over the training frames
+        batch_size: Frames per gradient step
+        learning_rate: Adam step size
+        l1: L1 activity regularization of the hidden layers
+        seed: Initialization and shuffle seed
+        reducer: Optional reduce.Reducer, fitted on these frames and stored in the model
+    """
+    rng = np.random.default_rng(seed)
+    x, labels = _inputs(frames, labels, reducer)
+    y = np.select([labels == label for label in LABELS], range(len(LABELS)), -1)
+    if np.any(y < 0):
+        raise ValueError(f"labels must be one of {LABELS}, got {sorted(set(labels[y < 0]))}")
+    mean, std = np.float32(x.mean()), np.float32(x.std() or 1.0)
+    x = (x - mean) / std
+    onehot = np.eye(len(LABELS), dtype=np.float32)[y]
+
+    sizes = [x.shape[1], *hidden, len(LABELS)]
+    params = []
+    for a, b in zip(sizes, sizes[1:]):
+        params += [rng.normal(0, np.sqrt(2 / a), (a, b)).astype(np.float32), np.zeros(b, np.float32)]
+    moments = [(np.zeros_like(p), np.zeros_like(p)) for p in params]
+    beta1, beta2, eps, step = 0.9, 0.999, 1e-7, 0
+
+    for _ in range(epochs):
+        order = rng.permutation(len(x))
+        for start in range(0, len(x), batch_size):
+            batch = order[start:start + batch_size]
+            activations = [x[batch]]
+            for i in range(0, len(params), 2):
+                h = activations[-1] @ params[i] + params[i + 1]
+                activations.append(np.maximum(h, 0) if i < len(params) - 2 else h)
+            logits = activations[-1]
+            e = np.exp(logits - logits.max(axis=1, keepdims=True))
+            grad = (e / e.sum(axis=1, keepdims=True) - onehot[batch]) / len(batch)
+            grads = [None] * len(params)
+            for i in range(len(params) - 2, -1, -2):
+                grads[i] = activations[i // 2].T @ grad
+                grads[i + 1] = grad.sum(axis=0)
+                if i:
+                    h = activations[i // 2]
+                    grad = (grad @ params[i].T + l1 * np.sign(h) / len(batch)) * (h > 0)
+            step += 1
+            for p, g, (m, v) in zip(params, grads, moments):
+                m *= beta1
+                m += (1 - beta1) * g
+                v *= beta2
+                v += (1 - beta2) * g * g
+                p -= learning_rate * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + eps)
+
+    return DenseClassifier(list(zip(params[::2], params[1::2])), LABELS, mean=mean, std=std, reducer=reducer)
+
+
+def train_sklearn(frames, labels, hidden=(20, 10), epochs=60, batch_size=32, learning_rate=1e-3, l1=1e-5,
+                  seed=0, reducer=None):
+    """
+    train_dense() with scikit-learn's MLPClassifier, converted to a DenseClassifier
+
+    scikit-learn only offers L2 weight decay, which takes the place of the L1
+    activity regularizer (alpha=l1). Its single logistic output becomes a
+    two-column layer with a zero column for the other class, which gives the
+    same softmax probabilities.
+    """
+    from sklearn.neural_network import MLPClassifier
+
+    x, labels = _inputs(frames, labels, reducer)
+    mean, std = np.float32(x.mean()), np.float32(x.std() or 1.0)
+    mlp = MLPClassifier(tuple(hidden), alpha=l1, batch_size=batch_size, learning_rate_init=learning_rate,
+                        max_iter=epochs, random_state=seed)
+    mlp.fit((x - mean) / std, np.asarray(labels, dtype=str))
+    weights = list(zip(mlp.coefs_, mlp.intercepts_))
+    w, b = weights[-1]
+    out_w, out_b = np.zeros((len(w), len(LABELS)), np.float32), np.zeros(len(LABELS), np.float32)
+    positive = LABELS.index(mlp.classes_[1])
+    out_w[:, positive], out_b[positive] = w[:, 0], b[0]
+    return DenseClassifier(weights[:-1] + [(out_w, out_b)], LABELS, mean=mean, std=std, reducer=reducer)
+
+
+BACKENDS = {"numpy": train_dense, "sklearn": train_sklearn}
+
+
+if __name__ == "__main__":
+    from inference import iter_labelled_batches
+    from reduce import Reducer
+
+    parser = argparse.ArgumentParser(description="Train the dense classifier on dataset CSVs or a frame store")
+    parser.add_argument("--csv", nargs="*", default=[], help="Dataset CSV files as path:label")
+    parser.add_argument("--store", help="Frame store directory")
+    parser.add_argument("--hidden", type=int, nargs="+", default=[20, 10], help="Hidden layer widths")
+    parser.add_argument("--epochs", type=int, default=60, help="Training epochs")
+    parser.add_argument("--learning-rate", type=float, default=1e-3, help="Adam learning rate")
+    parser.add_argument("--l1", type=float, default=1e-5, help="L1 activity regularization")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="numpy", help="Training backend")
+    parser.add_argument("--reduce", help='Input reduction, e.g. "max2+rows4-20" (see reduce.py)')
+    parser.add_argument("--int8", action="store_true", help="Also store int8 parameters calibrated on the data")
+    parser.add_argument("--output", required=True, help=".npz model file")
+
+    args = parser.parse_args()
+    batches = list(iter_labelled_batches(args.csv, args.store))
+    frames = np.concatenate([f.reshape(-1, num_pixels) for f, _ in batches])
+    labels = np.concatenate([l for _, l in batches])
+    model = BACKENDS[args.backend](frames, labels, args.hidden, args.epochs, learning_rate=args.learning_rate,
+                                   l1=args.l1, seed=args.seed,
+                                   reducer=Reducer.from_spec(args.reduce) if args.reduce else None)
+    index, _ = model.predict(frames)
+    print(f"Training accuracy on {len(frames)} frames: "
+          f"{np.mean(np.array(LABELS, dtype=object)[index] == labels) * 100:.1f}%")
+    if args.int8:
+        model.quantize(frames)
+    model.save(args.output)
+    print(f"Saved to {args.output}")
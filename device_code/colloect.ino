@@ -1,9 +1,122 @@
 #include <Wire.h>
 #include <Adafruit_MLX90640.h>
 
-Adafruit_MLX90640 mlx;
 const int numPixels = 768;  // 32x24
 
+// Output format: 1 = compact binary packets (data_process/frame_protocol.py),
+// 0 = ASCII text, 32 values per line, for debugging in the serial monitor
+#define BINARY_FRAMES 1
+
+// 1 = send each chess subpage (384 pixels) as soon as it is read instead of
+// waiting for both in getFrame(); needs BINARY_FRAMES 1
+#define SUBPAGE_FRAMES 0
+
+// 2 or 4 = send POOL_SIZE x POOL_SIZE block averages (POOL_MAX 1: maxima)
+// instead of all 768 pixels, cutting each packet 4x or 16x; needs
+// BINARY_FRAMES 1 and SUBPAGE_FRAMES 0
+#define POOL_SIZE 1
+#define POOL_MAX 0
+
+const uint8_t FRAME_SYNC[2] = {0xA5, 0x5A};
+const uint8_t KIND_FRAME = 0;
+const uint8_t KIND_SUBPAGE0 = 1;  // KIND_SUBPAGE0 + subpage number
+const uint8_t KIND_POOL2 = 3;
+const uint8_t KIND_POOL4 = 4;
+const int HEADER_SIZE = 7;  // kind, seq, timestamp
+uint8_t packet[HEADER_SIZE + 2 * numPixels];
+uint16_t frameSeq = 0;
+
+#if SUBPAGE_FRAMES
+#include "subpage_mlx90640.h"
+SubpageMLX90640 mlx;
+#else
+Adafruit_MLX90640 mlx;
+#endif
+
+// CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF)
+uint16_t crc16(const uint8_t *data, size_t len) {
+  uint16_t crc = 0xFFFF;
+  while (len--) {
+    crc ^= (uint16_t)(*data++) << 8;
+    for (int b = 0; b < 8; b++)
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+  }
+  return crc;
+}
+
+// Send values as sync, kind, seq, timestamp, int16 centi-degrees, CRC
+void sendPacket(uint8_t kind, const float *values, int n, uint32_t timestamp) {
+  packet[0] = kind;
+  packet[1] = frameSeq & 0xFF;
+  packet[2] = frameSeq >> 8;
+  for (int b = 0; b < 4; b++)
+    packet[3 + b] = (timestamp >> (8 * b)) & 0xFF;
+  for (int i = 0; i < n; i++) {
+    int16_t v = (int16_t)constrain(lroundf(values[i] * 100), -32768, 32767);
+    packet[HEADER_SIZE + 2 * i] = v & 0xFF;
+    packet[HEADER_SIZE + 2 * i + 1] = (v >> 8) & 0xFF;
+  }
+  size_t size = HEADER_SIZE + 2 * n;
+  uint16_t crc = crc16(packet, size);
+  Serial.write(FRAME_SYNC, 2);
+  Serial.write(packet, size);
+  Serial.write(crc & 0xFF);
+  Serial.write(crc >> 8);
+  frameSeq++;
+}
+
+// Send a whole frame, or with subpage >= 0 only the pixels with (row + col) % 2 == subpage
+void sendBinaryFrame(const float *frame, uint32_t timestamp, int subpage = -1) {
+  if (subpage < 0) {
+    sendPacket(KIND_FRAME, frame, numPixels, timestamp);
+    return;
+  }
+  static float half[numPixels / 2];
+  int n = 0;
+  for (int i = 0; i < numPixels; i++)
+    if (((i / 32 + i % 32) & 1) == subpage)
+      half[n++] = frame[i];
+  sendPacket(KIND_SUBPAGE0 + subpage, half, n, timestamp);
+}
+
+#if POOL_SIZE > 1
+// Average (or with POOL_MAX the maximum) of every POOL_SIZE x POOL_SIZE
+// block, row-major; the same reduction as data_process/reduce.py
+void sendPooledFrame(const float *frame, uint32_t timestamp) {
+  const int w = 32 / POOL_SIZE, h = 24 / POOL_SIZE;
+  static float pooled[w * h];
+  for (int r = 0; r < h; r++) {
+    for (int c = 0; c < w; c++) {
+      float acc = POOL_MAX ? -INFINITY : 0;
+      for (int dr = 0; dr < POOL_SIZE; dr++) {
+        const float *row = frame + (r * POOL_SIZE + dr) * 32 + c * POOL_SIZE;
+        for (int dc = 0; dc < POOL_SIZE; dc++)
+          acc = POOL_MAX ? max(acc, row[dc]) : acc + row[dc];
+      }
+      pooled[r * w + c] = POOL_MAX ? acc : acc / (POOL_SIZE * POOL_SIZE);
+    }
+  }
+  sendPacket(POOL_SIZE == 2 ? KIND_POOL2 : KIND_POOL4, pooled, w * h, timestamp);
+}
+#endif
+
+// Send one frame as readable text between START_FRAME/END_FRAME markers
+void sendAsciiFrame(const float *frame) {
+  Serial.println("START_FRAME");
+
+  // Output data, 32 values per line
+  for (int i = 0; i < numPixels; i++) {
+    Serial.print(frame[i], 2);
+    if ((i + 1) % 32 == 0)
+      Serial.println();
+    else
+      Serial.print(",");
+  }
+
+  Serial.println("END_FRAME");
+  Serial.println();  // Output an extra blank line for separation
+}
+
 void setup() {
   Serial.begin(115200);
   while (!Serial) delay(10); // Wait for serial connection
@@ -23,8 +136,28 @@ void setup() {
   mlx.setMode(MLX90640_CHESS);
   mlx.setResolution(MLX90640_ADC_19BIT);
   mlx.setRefreshRate(MLX90640_4_HZ);  // Lower frame rate to reduce I2C load
+#if SUBPAGE_FRAMES
+  if (mlx.loadParameters() != 0) {
+    Serial.println("MLX90640 parameter load failed!");
+    while (1) delay(10);
+  }
+#endif
 }
 
+#if SUBPAGE_FRAMES
+float frame[numPixels];  // rolling frame, each subpage updates its half
+
+void loop() {
+  int subpage = mlx.getSubpage(frame);  // blocks until the next subpage is ready
+  if (subpage < 0) {
+    Serial.print("Failed to get subpage data, error code: ");
+    Serial.println(subpage);
+    delay(100);
+    return;
+  }
+  sendBinaryFrame(frame, millis(), subpage);
+}
+#else
 void loop() {
   float frame[numPixels];
   int status = mlx.getFrame(frame);
@@ -34,21 +167,15 @@ void loop() {
     delay(500);
     return;
   }
-  
-  // Output frame marker
-  Serial.println("START_FRAME");
 
-  // Output data, 32 values per line
-  for (int i = 0; i < numPixels; i++) {
-    Serial.print(frame[i], 2);
-    if ((i + 1) % 32 == 0)
-      Serial.println();
-    else
-      Serial.print(",");
-  }
-  
-  Serial.println("END_FRAME");
-  Serial.println();  // Output an extra blank line for separation
+#if BINARY_FRAMES && POOL_SIZE > 1
+  sendPooledFrame(frame, millis());
+#elif BINARY_FRAMES
+  sendBinaryFrame(frame, millis());
+#else
+  sendAsciiFrame(frame);
+#endif
 
   delay(250);
 }
+#endif
@@ -2,17 +2,47 @@
 #include <Adafruit_MLX90640.h>
 #include <test_inferencing.h>             // Edge Impulse exported library
 
+// Classify after every chess subpage on a rolling frame instead of after
+// both subpages, halving the time to the first decision (see colloect.ino)
+#define SUBPAGE_MODE 0
+
+#if SUBPAGE_MODE
+#include "subpage_mlx90640.h"
+#endif
+
 // Device and model parameters
+#if SUBPAGE_MODE
+SubpageMLX90640 mlx;
+#else
 Adafruit_MLX90640 mlx;
+#endif
 const uint16_t kNumPixels = 32 * 24;      // 768
 const int LED_PIN = LED_BUILTIN;
 const int BUZZER_PIN = 11;                // Buzzer connected to D3 pin
 
 // Voting window settings
+#if SUBPAGE_MODE
+const int HISTORY_SIZE = 8;               // 1 second ≈ 8 subpages (2 per frame @4 Hz)
+uint8_t subpagesSeen = 0;                 // bit per subpage read so far
+#else
 const int HISTORY_SIZE = 4;               // 1 second ≈ 4 frames @4 Hz
+#endif
 bool history[HISTORY_SIZE] = {0};
 int histPos = 0;
 
+// Change gating: skip inference while the scene is static and reuse the
+// last decision (same algorithm as data_process/gating.py)
+#define CHANGE_GATING 0
+#if CHANGE_GATING
+const float CHANGE_ALPHA = 0.1f;          // Background EMA weight of the newest frame
+const float CHANGE_THRESHOLD = 0.3f;      // Mean |frame - background| in °C that triggers inference
+const int MAX_SKIP = 8;                   // Classify at least once every MAX_SKIP + 1 frames
+float background[kNumPixels];
+bool backgroundReady = false;
+int skipped = 0;
+bool lastPerson = false;
+#endif
+
 // Timed output
 unsigned long lastReport = 0;
 const unsigned long REPORT_INTERVAL = 1000;  // 1 second
@@ -20,6 +50,24 @@ const unsigned long REPORT_INTERVAL = 1000;  // 1 second
 // Frame data buffer
 float frameBuf[kNumPixels];
 
+#if CHANGE_GATING
+// Mean absolute difference from the background, then update the background
+float changeScore(const float *frame) {
+  if (!backgroundReady) {
+    memcpy(background, frame, sizeof(background));
+    backgroundReady = true;
+    return INFINITY;
+  }
+  float sum = 0;
+  for (uint16_t i = 0; i < kNumPixels; i++) {
+    float d = frame[i] - background[i];
+    sum += fabsf(d);
+    background[i] += CHANGE_ALPHA * d;
+  }
+  return sum / kNumPixels;
+}
+#endif
+
 void setup() {
   Serial.begin(115200);
   while (!Serial);
@@ -34,6 +82,12 @@ void setup() {
   mlx.setMode(MLX90640_CHESS);
   mlx.setResolution(MLX90640_ADC_18BIT);
   mlx.setRefreshRate(MLX90640_4_HZ);       // 4 Hz refresh rate
+#if SUBPAGE_MODE
+  if (mlx.loadParameters() != 0) {
+    Serial.println("MLX90640 parameter load failed!");
+    while (1) delay(10);
+  }
+#endif
 
   pinMode(LED_PIN, OUTPUT);
   pinMode(BUZZER_PIN, OUTPUT);            // Initialize buzzer pin
@@ -44,30 +98,54 @@ void setup() {
 
 void loop() {
   // 1. Read a thermal frame
-  if (mlx.getFrame(frameBuf) != 0) {
-    delay(250);
+#if SUBPAGE_MODE
+  int subpage = mlx.getSubpage(frameBuf);   // updates half of the rolling frame
+  if (subpage < 0) {
+    delay(100);
     return;
   }
-
-  // 2. Construct Time Series signal
-  signal_t signal;
-  signal.total_length = kNumPixels;
-  signal.get_data = [&](size_t offset, size_t length, float *out_ptr) {
-    memcpy(out_ptr, frameBuf + offset, length * sizeof(float));
-    return EI_IMPULSE_OK;
-  };
-
-  // 3. Single-frame inference
-  ei_impulse_result_t result;
-  if (run_classifier(&signal, &result, false) != EI_IMPULSE_OK) {
-    Serial.println("Inference error");
+  subpagesSeen |= 1 << subpage;
+  if (subpagesSeen != 3) return;            // other half not read yet
+#else
+  if (mlx.getFrame(frameBuf) != 0) {
     delay(250);
     return;
   }
+#endif
+
+#if CHANGE_GATING
+  bool personNow = lastPerson;            // Static scene: reuse the last decision
+  bool runModel = changeScore(frameBuf) >= CHANGE_THRESHOLD || skipped >= MAX_SKIP;
+  skipped = runModel ? 0 : skipped + 1;
+#else
+  bool personNow;
+  const bool runModel = true;
+#endif
+
+  if (runModel) {
+    // 2. Construct Time Series signal
+    signal_t signal;
+    signal.total_length = kNumPixels;
+    signal.get_data = [&](size_t offset, size_t length, float *out_ptr) {
+      memcpy(out_ptr, frameBuf + offset, length * sizeof(float));
+      return EI_IMPULSE_OK;
+    };
+
+    // 3. Single-frame inference
+    ei_impulse_result_t result;
+    if (run_classifier(&signal, &result, false) != EI_IMPULSE_OK) {
+      Serial.println("Inference error");
+      delay(250);
+      return;
+    }
 
-  // 4. Store single-frame decision
-  bool personNow = (result.classification[0].value
-                    > result.classification[1].value); // “person” vs “empty”
+    // 4. Store single-frame decision
+    personNow = (result.classification[0].value
+                 > result.classification[1].value); // “person” vs “empty”
+  }
+#if CHANGE_GATING
+  lastPerson = personNow;
+#endif
   history[histPos++] = personNow;
   if (histPos >= HISTORY_SIZE) histPos = 0;
 
@@ -0,0 +1,46 @@
+// Shared by colloect.ino (SUBPAGE_FRAMES) and detect.ino (SUBPAGE_MODE).
+//
+// Requires the Adafruit MLX90640 library 1.0.0 or newer: every release
+// declares the Melexis driver calls used below (MLX90640_DumpEE,
+// MLX90640_GetFrameData, MLX90640_ExtractParameters, MLX90640_GetTa,
+// MLX90640_CalculateTo) as public members of Adafruit_MLX90640 and defines
+// OPENAIR_TA_SHIFT in Adafruit_MLX90640.h. With the subpage options off the
+// sketches only use the public getFrame() path and do not include this file.
+#ifndef SUBPAGE_MLX90640_H
+#define SUBPAGE_MLX90640_H
+
+#include <Adafruit_MLX90640.h>
+
+#ifndef OPENAIR_TA_SHIFT
+#error "SubpageMLX90640 needs Adafruit_MLX90640 >= 1.0.0 (OPENAIR_TA_SHIFT missing)"
+#endif
+
+// getFrame() reads both subpages in a loop; getSubpage() is one iteration of
+// it. In chess mode CalculateTo() only writes the pixels of the subpage it was
+// given, so the frame buffer keeps the other half from the previous call.
+class SubpageMLX90640 : public Adafruit_MLX90640 {
+ public:
+  // Load the calibration once, after begin()
+  int loadParameters() {
+    uint16_t eeData[832];
+    int status = MLX90640_DumpEE(0, eeData);
+    if (status != 0) return status;
+    return MLX90640_ExtractParameters(eeData, &params);
+  }
+
+  // Wait for the next subpage and update its pixels in frame; returns the
+  // subpage number (0 or 1) or a negative error code
+  int getSubpage(float *frame) {
+    uint16_t frameData[834];
+    int status = MLX90640_GetFrameData(0, frameData);
+    if (status < 0) return status;
+    float tr = MLX90640_GetTa(frameData, &params) - OPENAIR_TA_SHIFT;
+    MLX90640_CalculateTo(frameData, &params, 0.95, tr, frame);
+    return frameData[833];
+  }
+
+ private:
+  paramsMLX90640 params;
+};
+
+#endif
@@ -0,0 +1,255 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_process"))
+from inference import iter_labelled_batches, num_pixels
+from train_dense import BACKENDS, LABELS, stratified_folds
+
+CACHE_VERSION = 1
+
+# Arduino Nano 33 BLE Sense (nRF52840, Cortex-M4F at 64 MHz, 1 MB flash, 256 KB RAM).
+# Cycle counts are calibrated so the deployed int8 20->10 model lands near the
+# 1 ms and 15.4 KB from the README; refine them with LATENCY_TEST measurements.
+NANO33 = {
+    'clock_hz': 64e6,
+    'flash_bytes': 1024 * 1024,
+    'ram_bytes': 256 * 1024,
+    'cycles_per_mac': {'int8': 3.5, 'float32': 6.0},
+    'cycles_per_layer': 2000,    # kernel dispatch, requantization, bias
+    'cycles_per_invoke': 5000,   # interpreter setup, input quantization, softmax
+    'bytes_per_layer': 128,      # flatbuffer tensor and operator metadata
+}
+
+def layer_sizes(hidden, inputs=num_pixels):
+    return [inputs, *hidden, len(LABELS)]
+
+def model_cost(hidden, precision, device=NANO33, inputs=num_pixels):
+    """
+    Estimated on-device cost of a dense model
+    
+    Flash counts weights (1 or 4 bytes), 32-bit biases and per-layer
+    metadata, not the inference runtime. RAM is the float frame buffer plus
+    the largest pair of adjacent activation tensors, which is what the
+    tensor arena has to hold at once.
+    
+    Args:
+        hidden: Hidden layer widths
+        precision: "int8" or "float32"
+        device: Device parameters like NANO33
+        inputs: Model inputs, fewer than 768 after a reduce.py reduction
+    """
+    sizes = layer_sizes(hidden, inputs)
+    macs = sum(a * b for a, b in zip(sizes, sizes[1:]))
+    weight_bytes = 1 if precision == 'int8' else 4
+    flash = macs * weight_bytes + 4 * sum(sizes[1:]) + device['bytes_per_layer'] * (len(sizes) - 1)
+    arena = max(a + b for a, b in zip(sizes, sizes[1:])) * weight_bytes
+    ram = num_pixels * 4 + arena
+    cycles = (macs * device['cycles_per_mac'][precision] + device['cycles_per_layer'] * (len(sizes) - 1)
+              + device['cycles_per_invoke'])
+    return {
+        'macs': macs,
+        'flash_bytes': flash,
+        'ram_bytes': ram,
+        'time_ms': cycles / device['clock_hz'] * 1000,
+        'fits': flash <= device['flash_bytes'] and ram <= device['ram_bytes'],
+    }
+
+def confusion(predicted, truth):
+    """tp, fp, tn, fn with person as the positive class"""
+    predicted, truth = predicted == 'person', truth == 'person'
+    return {'tp': int(np.sum(predicted & truth)), 'fp': int(np.sum(predicted & ~truth)),
+            'tn': int(np.sum(~predicted & ~truth)), 'fn': int(np.sum(~predicted & truth))}
+
+_data = {}
+
+def _init_worker(frames, labels, folds):
+    _data['frames'], _data['labels'], _data['folds'] = frames, labels, folds
+
+def run_job(hidden, fold, options):
+    """
+    Train one architecture on every fold but one and score the held-out fold
+    in float32 and simulated int8 (calibrated on the training frames)
+    
+    Args:
+        hidden: Hidden layer widths
+        fold: Held-out fold index
+        options: Dict with backend, epochs, learning_rate, l1 and seed
+    """
+    frames, labels, folds = _data['frames'], _data['labels'], _data['folds']
+    train, test = folds != fold, folds == fold
+    
+    start = time.perf_counter()
+    model = BACKENDS[options['backend']](frames[train], labels[train], hidden, options['epochs'],
+                                         learning_rate=options['learning_rate'], l1=options['l1'],
+                                         seed=options['seed'] + fold)
+    train_s = time.perf_counter() - start
+    model.quantize(frames[train])
+    
+    names = np.array(model.labels, dtype=object)
+    result = {'hidden': list(hidden), 'fold': fold, 'train_s': train_s}
+    for precision in ('float32', 'int8'):
+        index, _ = model.predict(frames[test], int8=precision == 'int8')
+        result[precision] = confusion(names[index], labels[test])
+    return result
+
+def job_key(data_digest, hidden, fold, folds, options):
+    config = [CACHE_VERSION, data_digest, list(hidden), fold, folds, sorted(options.items())]
+    return hashlib.sha1(json.dumps(config).encode()).hexdigest()
+
+def data_digest(frames, labels):
+    digest = hashlib.sha1(np.ascontiguousarray(frames, dtype=np.float32).tobytes())
+    digest.update('\n'.join(labels).encode())
+    return digest.hexdigest()
+
+def run_sweep(frames, labels, architectures, folds=5, options=None, workers=None, cache_dir=None):
+    """
+    Cross-validate every architecture across a process pool, reusing cached
+    fold results
+    
+    Returns the list of per-fold results from run_job().
+    
+    Args:
+        frames: Array of shape (N, 768)
+        labels: Class name of every frame
+        architectures: List of hidden layer width tuples
+        folds: Number of stratified folds
+        options: Training options for run_job()
+        workers: Worker processes, os.cpu_count() by default; 0 runs in this process
+        cache_dir: Directory of cached fold results, None to disable
+    """
+    options = {'backend': 'numpy', 'epochs': 60, 'learning_rate': 1e-3, 'l1': 1e-5, 'seed': 0, **(options or {})}
+    labels = np.asarray(labels, dtype=object)
+    fold_of = stratified_folds(labels, folds, options['seed'])
+    digest = data_digest(frames, labels)
+    
+    results, pending = [], []
+    for hidden in architectures:
+        for fold in range(folds):
+            path = cache_dir and os.path.join(cache_dir, job_key(digest, hidden, fold, folds, options) + '.json')
+            if path and os.path.exists(path):
+                with open(path) as f:
+                    results.append(json.load(f))
+            else:
+                pending.append((hidden, fold, path))
+    print(f"{len(results)} fold results cached, {len(pending)} to run")
+    
+    def finish(job, result):
+        results.append(result)
+        path = job[2]
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(path + '.tmp', 'w') as f:
+                json.dump(result, f)
+            os.replace(path + '.tmp', path)
+        print(f"  {'->'.join(map(str, result['hidden']))} fold {result['fold']} done in {result['train_s']:.1f} s")
+    
+    if workers == 0:
+        _init_worker(frames, labels, fold_of)
+        for job in pending:
+            finish(job, run_job(job[0], job[1], options))
+    elif pending:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(frames, labels, fold_of)) as pool:
+            futures = {pool.submit(run_job, hidden, fold, options): (hidden, fold, path)
+                       for hidden, fold, path in pending}
+            for future in as_completed(futures):
+                finish(futures[future], future.result())
+    return results
+
+def summarize(results, device=NANO33):
+    """
+    One row per architecture and precision: accuracy over folds, FPR/FNR
+    from the summed confusion counts and the on-device cost estimate
+    """
+    groups = {}
+    for result in results:
+        for precision in ('float32', 'int8'):
+            groups.setdefault((tuple(result['hidden']), precision), []).append(result[precision])
+    
+    rows = []
+    for (hidden, precision), counts in groups.items():
+        accuracies = [(c['tp'] + c['tn']) / max(sum(c.values()), 1) for c in counts]
+        total = {k: sum(c[k] for c in counts) for k in ('tp', 'fp', 'tn', 'fn')}
+        rows.append({
+            'architecture': '->'.join(map(str, hidden)),
+            'hidden': list(hidden),
+            'precision': precision,
+            'folds': len(counts),
+            'accuracy': float(np.mean(accuracies)),
+            'accuracy_std': float(np.std(accuracies)),
+            'fpr': total['fp'] / max(total['fp'] + total['tn'], 1),
+            'fnr': total['fn'] / max(total['fn'] + total['tp'], 1),
+            **model_cost(hidden, precision, device),
+        })
+    mark_pareto(rows)
+    return sorted(rows, key=lambda r: (r['time_ms'], -r['accuracy']))
+
+def mark_pareto(rows, cost_keys=('time_ms', 'flash_bytes', 'ram_bytes')):
+    """
+    Set row['pareto'] on rows no other row beats: at least as accurate and
+    no more expensive on every cost, and strictly better somewhere
+    """
+    for row in rows:
+        row['pareto'] = row['fits'] and not any(
+            other['fits'] and other['accuracy'] >= row['accuracy']
+            and all(other[k] <= row[k] for k in cost_keys)
+            and (other['accuracy'] > row['accuracy'] or any(other[k] < row[k] for k in cost_keys))
+            for other in rows)
+    return rows
+
+def print_table(rows):
+    print(f"\n{'':2}{'Architecture':^14}|{'Precision':^11}|{'Acc (%)':^14}|{'FPR (%)':^9}|{'FNR (%)':^9}|"
+          f"{'MACs':^9}|{'Flash (KB)':^12}|{'RAM (KB)':^10}|{'Time (ms)':^11}")
+    print("-" * 107)
+    for r in rows:
+        print(f"{'*' if r['pareto'] else ' ':2}{r['architecture']:^14}|{r['precision']:^11}|"
+              f"{r['accuracy'] * 100:>6.1f} ±{r['accuracy_std'] * 100:>4.1f}  |{r['fpr'] * 100:^9.1f}|"
+              f"{r['fnr'] * 100:^9.1f}|{r['macs']:^9}|{r['flash_bytes'] / 1024:^12.1f}|{r['ram_bytes'] / 1024:^10.1f}|"
+              f"{r['time_ms']:^11.2f}")
+    print("* Pareto-optimal: no other model is as accurate and at most as costly in time, flash and RAM")
+
+def parse_architecture(text):
+    return tuple(int(width) for width in text.replace('->', ',').split(','))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-validate dense architectures in float32 and int8 "
+                                                 "against an on-device cost model")
+    parser.add_argument("--csv", nargs="*", default=["dataset/person/data_person.csv:person",
+                                                     "dataset/empty/data_empty.csv:empty"],
+                        help="Dataset CSV files as path:label")
+    parser.add_argument("--store", help="Frame store directory")
+    parser.add_argument("--arch", nargs="+", type=parse_architecture, default=[(20, 10), (128, 64), (64, 32, 16)],
+                        help="Hidden layer widths, e.g. 20,10 128,64 64,32,16")
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="numpy", help="Training backend")
+    parser.add_argument("--epochs", type=int, default=60, help="Training epochs")
+    parser.add_argument("--learning-rate", type=float, default=1e-3, help="Adam learning rate")
+    parser.add_argument("--l1", type=float, default=1e-5, help="L1 activity regularization")
+    parser.add_argument("--seed", type=int, default=0, help="Fold split and initialization seed")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count, 0: no pool)")
+    parser.add_argument("--cache", default=".sweep_cache", help="Fold result cache directory, '' to disable")
+    parser.add_argument("--output", help="Save the table as JSON")
+    
+    args = parser.parse_args()
+    batches = list(iter_labelled_batches(args.csv, args.store))
+    frames = np.concatenate([f.reshape(-1, num_pixels) for f, _ in batches])
+    labels = np.concatenate([l for _, l in batches])
+    print(f"{len(frames)} frames, {len(args.arch)} architectures x {args.folds} folds")
+    
+    options = {'backend': args.backend, 'epochs': args.epochs, 'learning_rate': args.learning_rate,
+               'l1': args.l1, 'seed': args.seed}
+    start = time.perf_counter()
+    results = run_sweep(frames, labels, args.arch, args.folds, options, args.workers, args.cache or None)
+    print(f"Sweep finished in {time.perf_counter() - start:.1f} s")
+    
+    rows = summarize(results)
+    print_table(rows)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'device': NANO33, 'options': options, 'rows': rows}, f, indent=2)
+        print(f"Results saved to {args.output}")
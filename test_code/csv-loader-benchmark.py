@@ -0,0 +1,109 @@
+import os
+import sys
+import csv
+import time
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_process"))
+from csv_frames import load_csv_frames, iter_csv_frames
+
+frame_width, frame_height = 32, 24
+
+def legacy_read_csv_data(file, max_rows=None):
+    """
+    The original image.py:read_csv_data, kept here as the baseline
+
+    Args:
+        file: CSV file to read
+        max_rows: Stop after this many rows (the legacy loader is slow)
+    """
+    frames = []
+    with open(file, "r") as f:
+        reader = csv.reader(f)
+        for i, row in enumerate(reader):
+            if max_rows is not None and i >= max_rows:
+                break
+            # Skip rows containing non-numeric data
+            if any(not item.replace('.', '', 1).isdigit() for item in row):
+                continue
+            if len(row) == frame_width * frame_height:
+                frame = np.array(row, dtype=float).reshape((frame_height, frame_width))
+                frames.append(frame)
+    return frames
+
+def write_synthetic_log(path, num_frames, seed=0, block=10000):
+    """
+    Write a synthetic thermal log around the statistics of the real dataset
+
+    Every 1000th row is a marker line, as left behind by older collectors.
+
+    Args:
+        path: Output CSV file
+        num_frames: Number of frames to write
+        seed: Random seed
+        block: Frames generated per write
+    """
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(22, 30, frame_width * frame_height)
+    with open(path, "w") as f:
+        for start in range(0, num_frames, block):
+            n = min(block, num_frames - start)
+            frames = base + rng.normal(0, 1.5, (n, base.size))
+            lines = [",".join(row) for row in np.char.mod("%.2f", frames)]
+            for i in range(start, start + n, 1000):
+                lines[i - start] = "START_FRAME"
+            f.write("\n".join(lines) + "\n")
+
+def benchmark_loaders(path, legacy_rows, batch_size):
+    """
+    Time the chunked loader against the legacy per-cell loader
+
+    Args:
+        path: Synthetic CSV log
+        legacy_rows: Rows timed with the legacy loader, extrapolated to the file
+        batch_size: Batch size for the generator mode
+    """
+    size_mb = os.path.getsize(path) / 1e6
+
+    start = time.perf_counter()
+    frames, rejected = load_csv_frames(path)
+    load_time = time.perf_counter() - start
+    total = len(frames) + len(rejected)
+
+    start = time.perf_counter()
+    streamed = sum(len(batch) for batch, _ in iter_csv_frames(path, batch_size))
+    stream_time = time.perf_counter() - start
+    assert streamed == len(frames)
+
+    start = time.perf_counter()
+    legacy = legacy_read_csv_data(path, legacy_rows)
+    legacy_time = (time.perf_counter() - start) * total / min(legacy_rows, total)
+
+    print(f"CSV loader benchmark: {total} rows, {size_mb:.0f} MB")
+    print("=" * 60)
+    print(f"{'Loader':^24}|{'Time (s)':^12}|{'Frames/s':^12}|{'MB/s':^10}")
+    print("-" * 60)
+    for name, t in (("legacy (extrapolated)", legacy_time), ("load_csv_frames", load_time),
+                    (f"iter_csv_frames({batch_size})", stream_time)):
+        print(f"{name:^24}|{t:^12.2f}|{total / t:^12.0f}|{size_mb / t:^10.1f}")
+    print(f"\nRejected rows: {len(rejected)}, legacy kept {len(legacy)} of {min(legacy_rows, total)} rows")
+    print(f"Speed-up over legacy: {legacy_time / load_time:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the chunked CSV frame loader")
+    parser.add_argument("--frames", type=int, default=1000000, help="Frames in the synthetic log (~4.6 KB each)")
+    parser.add_argument("--legacy-rows", type=int, default=20000, help="Rows timed with the legacy loader")
+    parser.add_argument("--batch-size", type=int, default=65536, help="Batch size for the generator mode")
+    parser.add_argument("--file", help="Existing log to benchmark instead of a synthetic one")
+
+    args = parser.parse_args()
+    if args.file:
+        benchmark_loaders(args.file, args.legacy_rows, args.batch_size)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "synthetic.csv")
+            print(f"Writing {args.frames} synthetic frames...")
+            write_synthetic_log(path, args.frames)
+            benchmark_loaders(path, args.legacy_rows, args.batch_size)
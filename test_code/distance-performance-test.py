@@ -2,84 +2,256 @@ import serial
 import time
 import argparse
 import json
+import os
+import queue
+import re
+import threading
+from collections import namedtuple
 import numpy as np
+from ndjson_log import NdjsonWriter, iter_records
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FormatStrFormatter
 
-def test_distance_performance(port, baudrate, distances, tests_per_distance=20):
+Detection = namedtuple('Detection', 'board host_time result confidence')
+
+def parse_board(text):
+    """Parse "name=port" or a plain port, which is then also the board name"""
+    name, _, port = text.rpartition('=')
+    return (name or port), port
+
+def wilson_interval(successes, n, z=1.96):
+    """Wilson score interval (low, high) of a detection rate, (0, 1) without samples"""
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, center - half), min(1.0, center + half)
+
+class DetectionReader(threading.Thread):
     """
-    Test detection performance at different distances
+    Background reader for one board: reads the port continuously and puts a
+    Detection with the host arrival time on the queue for every DETECTION line
     
     Args:
-        port: Serial port connected to Arduino
-        baudrate: Baud rate for serial communication
-        distances: List of distances to test (in meters)
-        tests_per_distance: Number of tests to run at each distance
+        board: Board name
+        ser: Open serial.Serial (or any object with read() and in_waiting)
+        detections: queue.Queue shared by all boards
     """
-    print("Testing detection performance at different distances...")
+    def __init__(self, board, ser, detections):
+        super().__init__(daemon=True)
+        self.board = board
+        self.ser = ser
+        self.detections = detections
+        self.running = True
+        self.malformed = 0
+        self.error = None
     
-    ser = serial.Serial(port, baudrate, timeout=1)
-    time.sleep(2)  # Wait for connection to stabilize
+    def run(self):
+        buffer = b''
+        try:
+            while self.running:
+                data = self.ser.read(self.ser.in_waiting or 1)
+                if not data:
+                    continue
+                now = time.monotonic()
+                *lines, buffer = (buffer + data).split(b'\n')
+                for line in lines:
+                    line = line.decode('utf-8', errors='replace').strip()
+                    if not line.startswith("DETECTION:"):
+                        continue
+                    # Format: DETECTION:result,confidence
+                    try:
+                        result, confidence = line.split(':', 1)[1].split(',')
+                        self.detections.put(Detection(self.board, now, result, float(confidence)))
+                    except ValueError:
+                        self.malformed += 1
+        except Exception as e:  # reported by the runner
+            self.error = e
     
-    # Clear buffer
-    ser.reset_input_buffer()
+    def stop(self):
+        self.running = False
+        self.join(timeout=2)
+
+def completed_steps(results_file):
+    """(distance, board) pairs with a summary in an existing NDJSON log"""
+    if not os.path.exists(results_file):
+        return set()
+    return {(float(r['distance']), r.get('board')) for r in iter_records(results_file)
+            if r.get('type') == 'summary'}
+
+class DistanceRunner:
+    """
+    Distance sweep over one or more boards read in the background
     
-    results = {}
+    Every detection is attributed by its arrival time to the active step:
+    lines that arrive while the subject is being positioned, or during the
+    settle time after a step starts, are discarded instead of being counted
+    at the next distance. A board's step ends at target_samples detections,
+    or earlier once the Wilson interval of its detection rate is narrower
+    than max_ci_width; the step ends when every board is done or after
+    max_seconds.
     
-    for distance in distances:
-        print(f"\nTesting at {distance} meters...")
-        print(f"Position the subject {distance} meters from the sensor and press Enter")
-        input()
-        
-        # Send command to start distance test mode
-        ser.write(b'DISTANCE_TEST\n')
-        
-        detections = 0
-        confidence_scores = []
-        
-        for i in range(tests_per_distance):
-            # Allow time for sensor reading and processing
-            time.sleep(1)
-            
-            line = ser.readline().decode('utf-8').strip()
-            if line.startswith("DETECTION:"):
-                # Format: DETECTION:result,confidence
-                data = line.split(':')[1].split(',')
-                result = data[0]
-                confidence = float(data[1])
-                
-                if result == "PERSON":
-                    detections += 1
-                confidence_scores.append(confidence)
-                
-                print(f"Test {i+1}/{tests_per_distance}: {result} (confidence: {confidence:.2f})")
-        
-        # Calculate metrics
-        detection_rate = (detections / tests_per_distance) * 100
-        avg_confidence = np.mean(confidence_scores) if confidence_scores else 0
+    Args:
+        boards: Dict of board name to open serial port
+        log: NdjsonWriter for detection and summary records
+        target_samples: Detections per board and distance
+        max_ci_width: Stop early when the 95% interval is this narrow (e.g. 0.2), None to disable
+        min_samples: Detections required before stopping on the interval width
+        max_seconds: Longest step, in seconds after settling
+        step_settle: Seconds after the start of a step before detections count
+    """
+    def __init__(self, boards, log, target_samples=20, max_ci_width=None, min_samples=10, max_seconds=120,
+                 step_settle=0.0):
+        self.boards = boards
+        self.log = log
+        self.target_samples = target_samples
+        self.max_ci_width = max_ci_width
+        self.min_samples = min_samples
+        self.max_seconds = max_seconds
+        self.step_settle = step_settle
+        self.queue = queue.Queue()
+        self.wall_offset = time.time() - time.monotonic()
+        self.readers = {board: DetectionReader(board, ser, self.queue) for board, ser in boards.items()}
+        self.discarded = 0
+        for reader in self.readers.values():
+            reader.start()
+    
+    def stop(self):
+        for reader in self.readers.values():
+            reader.stop()
+    
+    def _done(self, detections, samples):
+        if samples >= self.target_samples:
+            return 'samples'
+        if self.max_ci_width is not None and samples >= self.min_samples:
+            low, high = wilson_interval(detections, samples)
+            if high - low <= self.max_ci_width:
+                return 'interval'
+        return None
+    
+    def run_step(self, distance, boards=None):
+        """
+        Measure one distance on the given boards (all by default)
         
-        results[distance] = {
-            'detection_rate': detection_rate,
-            'avg_confidence': avg_confidence
-        }
+        Returns {board: summary}; the summaries are also logged, so an
+        interrupted sweep can resume after the last completed step.
+        """
+        boards = list(self.boards if boards is None else boards)
+        for board in boards:
+            self.boards[board].write(b'DISTANCE_TEST\n')
+        start = time.monotonic() + self.step_settle
+        counts = {board: [0, 0, 0.0] for board in boards}  # detections, samples, confidence sum
+        stopped = {}
+        while len(stopped) < len(boards):
+            for board, reader in self.readers.items():
+                if board in counts and not reader.is_alive():
+                    raise RuntimeError(f"Reader for {board} stopped: {reader.error!r}")
+            try:
+                d = self.queue.get(timeout=0.05)
+            except queue.Empty:
+                d = None
+            if d is not None:
+                if d.host_time < start or d.board not in counts or d.board in stopped:
+                    self.discarded += 1
+                else:
+                    c = counts[d.board]
+                    c[0] += d.result == "PERSON"
+                    c[1] += 1
+                    c[2] += d.confidence
+                    self.log.write({'type': 'detection', 'distance': distance, 'board': d.board, 'result': d.result,
+                                    'confidence': d.confidence, 'host_time': self.wall_offset + d.host_time})
+                    reason = self._done(c[0], c[1])
+                    if reason:
+                        stopped[d.board] = (reason, d.host_time)
+            if time.monotonic() - start > self.max_seconds:
+                for board in boards:
+                    stopped.setdefault(board, ('timeout', time.monotonic()))
         
-        print(f"Results at {distance}m: Detection rate: {detection_rate:.1f}%, Average confidence: {avg_confidence:.2f}")
+        summaries = {}
+        for board in boards:
+            detections, samples, confidence = counts[board]
+            low, high = wilson_interval(detections, samples)
+            reason, end = stopped[board]
+            summaries[board] = {
+                'detection_rate': detections / samples * 100 if samples else 0.0,
+                'avg_confidence': confidence / samples if samples else 0.0,
+                'samples': samples,
+                'ci_low': low * 100,
+                'ci_high': high * 100,
+                'seconds': max(0.0, end - start),
+                'stopped_on': reason,
+            }
+            self.log.write({'type': 'summary', 'distance': distance, 'board': board, **summaries[board]})
+        return summaries
+
+def test_distance_performance(ports, baudrate, distances, tests_per_distance=20, output_file="distance_results.ndjson",
+                              max_ci_width=None, min_samples=10, max_seconds=120, step_settle=0.0, resume=True,
+                              wait=input, settle=2):
+    """
+    Test detection performance at different distances, on one or more boards at once
     
-    ser.close()
+    Args:
+        ports: Serial port, or list of ports or name=port specs, one per board
+        baudrate: Baud rate for serial communication
+        distances: List of distances to test (in meters)
+        tests_per_distance: Detections to collect per board at each distance
+        output_file: NDJSON file detections and per-distance summaries are appended to
+        max_ci_width: End a step early once the 95% interval of the detection rate is this narrow
+        min_samples: Detections required before ending a step on the interval width
+        max_seconds: Longest time spent at one distance
+        step_settle: Seconds to ignore after starting a step, while the subject settles
+        resume: Skip distances and boards already summarized in output_file
+        wait: Called with the prompt before each distance, e.g. input
+        settle: Seconds to wait after opening the ports
+    """
+    print("Testing detection performance at different distances...")
+    
+    specs = [parse_board(p) for p in ([ports] if isinstance(ports, str) else ports)]
+    done = completed_steps(output_file) if resume else set()
     
-    # Save results to file
-    with open("distance_results.json", 'w') as f:
-        json.dump(results, f, indent=2)
+    boards = {}
+    for name, port in specs:
+        boards[name] = serial.Serial(port, baudrate, timeout=0.1)
+    time.sleep(settle)  # Wait for connection to stabilize
     
-    # Plot results
-    plot_distance_results(results)
+    # Clear buffer
+    for ser in boards.values():
+        ser.reset_input_buffer()
+    
+    results = {name: {} for name in boards}
+    log = NdjsonWriter(output_file)
+    runner = DistanceRunner(boards, log, tests_per_distance, max_ci_width, min_samples, max_seconds, step_settle)
+    try:
+        for distance in distances:
+            todo = [name for name in boards if (float(distance), name) not in done]
+            if not todo:
+                print(f"\n{distance} meters already measured, skipping")
+                continue
+            print(f"\nTesting at {distance} meters ({', '.join(todo)})...")
+            wait(f"Position the subject {distance} meters from the sensor and press Enter")
+            
+            for name, summary in runner.run_step(distance, todo).items():
+                results[name][str(float(distance))] = summary
+                print(f"Results at {distance}m on {name}: Detection rate: {summary['detection_rate']:.1f}% "
+                      f"[{summary['ci_low']:.0f}-{summary['ci_high']:.0f}%] over {summary['samples']} detections, "
+                      f"Average confidence: {summary['avg_confidence']:.2f} "
+                      f"({summary['seconds']:.1f} s, stopped on {summary['stopped_on']})")
+    finally:
+        runner.stop()
+        for ser in boards.values():
+            ser.close()
+        log.close()
+    print(f"Results saved to {output_file} ({runner.discarded} detections outside a step discarded)")
+    return results
 
-def plot_distance_results(results):
+def plot_distance_results(results, board=None):
     """
     Plot distance performance results
     
     Args:
         results: Dictionary with distance test results
+        board: Board name for the title and file name, if several were tested
     """
     distances = sorted([float(d) for d in results.keys()])
     detection_rates = [results[str(d)]['detection_rate'] for d in distances]
@@ -90,7 +262,13 @@ def plot_distance_results(results):
     color = 'tab:blue'
     ax1.set_xlabel('Distance (m)')
     ax1.set_ylabel('Detection Rate (%)', color=color)
-    ax1.plot(distances, detection_rates, 'o-', color=color, linewidth=2)
+    if all('ci_low' in results[str(d)] for d in distances):
+        # 95% interval of the detection rate
+        errors = [[r - results[str(d)]['ci_low'] for d, r in zip(distances, detection_rates)],
+                  [results[str(d)]['ci_high'] - r for d, r in zip(distances, detection_rates)]]
+        ax1.errorbar(distances, detection_rates, yerr=errors, fmt='o-', color=color, linewidth=2, capsize=4)
+    else:
+        ax1.plot(distances, detection_rates, 'o-', color=color, linewidth=2)
     ax1.tick_params(axis='y', labelcolor=color)
     ax1.grid(True, linestyle='--', alpha=0.7)
     ax1.set_ylim(0, 105)
@@ -103,31 +281,79 @@ def plot_distance_results(results):
     ax2.yaxis.set_major_formatter(FormatStrFormatter('%.2f'))
     ax2.set_ylim(0, 1.05)
     
-    plt.title('Detection Performance vs Distance', fontsize=14)
+    plt.title('Detection Performance vs Distance' + (f' ({board})' if board else ''), fontsize=14)
     fig.tight_layout()
-    plt.savefig('distance_performance.png', dpi=300)
+    suffix = '_' + re.sub(r'[^\w.-]+', '_', board).strip('_') if board else ''
+    plt.savefig(f'distance_performance{suffix}.png', dpi=300)
     plt.show()
 
-def load_and_plot_results(results_file):
+def load_board_results(results_file):
     """
-    Load and plot existing distance test results
+    Load distance test results keyed by board, then by distance; the latest
+    summary of a step wins, e.g. after re-measuring it
     
     Args:
-        results_file: JSON file with distance test results
+        results_file: NDJSON log written by test_distance_performance, or a
+            JSON file in the older {distance: summary} format (board None)
     """
     with open(results_file, 'r') as f:
-        results = json.load(f)
-    plot_distance_results(results)
+        try:
+            first = json.loads(f.readline())
+        except json.JSONDecodeError:
+            first = {}  # an indented legacy JSON file
+        if 'type' not in first:
+            f.seek(0)
+            return {None: json.load(f)}
+    results = {}
+    for record in iter_records(results_file):
+        if record.get('type') == 'summary':
+            summary = {k: v for k, v in record.items() if k not in ('type', 'distance', 'board', 'host_time')}
+            results.setdefault(record.get('board'), {})[str(float(record['distance']))] = summary
+    return results
+
+def load_distance_results(results_file, board=None):
+    """
+    Load distance test results of one board keyed by distance
+
+    Args:
+        results_file: NDJSON log written by test_distance_performance, or a
+            JSON file in the older {distance: summary} format
+        board: Board name, the first board in the file by default
+    """
+    results = load_board_results(results_file)
+    if board is None:
+        return next(iter(results.values()), {})
+    return results.get(board, {})
+
+def load_and_plot_results(results_file):
+    """
+    Load and plot existing distance test results, one plot per board
+    
+    Args:
+        results_file: NDJSON or JSON file with distance test results
+    """
+    results = load_board_results(results_file)
+    for board, board_results in results.items():
+        plot_distance_results(board_results, board if len(results) > 1 else None)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Test detection performance at different distances")
-    parser.add_argument("--port", help="Serial port connected to Arduino")
+    parser.add_argument("--port", nargs="+", help="Serial port connected to Arduino; several ports (or name=port) "
+                                                  "test several boards at once")
     parser.add_argument("--baudrate", type=int, default=115200, help="Baud rate")
     parser.add_argument("--distances", type=str, default="1,2,3,4,5,6", 
                         help="Comma-separated list of distances to test (in meters)")
-    parser.add_argument("--tests", type=int, default=20, help="Number of tests per distance")
+    parser.add_argument("--tests", type=int, default=20, help="Number of detections per distance and board")
+    parser.add_argument("--max-ci-width", type=float,
+                        help="End a distance early once the 95%% interval of the detection rate is this narrow, e.g. 0.2")
+    parser.add_argument("--min-samples", type=int, default=10, help="Detections before --max-ci-width can end a distance")
+    parser.add_argument("--max-seconds", type=float, default=120, help="Longest time spent at one distance")
+    parser.add_argument("--step-settle", type=float, default=0.0,
+                        help="Seconds ignored after Enter while the subject settles")
+    parser.add_argument("--no-resume", action="store_true", help="Measure every distance again, even if --output has it")
     parser.add_argument("--plot-only", action="store_true", help="Only plot existing results")
-    parser.add_argument("--results-file", help="JSON file with existing results for plotting")
+    parser.add_argument("--results-file", help="NDJSON or JSON file with existing results for plotting")
+    parser.add_argument("--output", default="distance_results.ndjson", help="NDJSON output file for results")
     
     args = parser.parse_args()
     
@@ -135,6 +361,8 @@ if __name__ == "__main__":
         load_and_plot_results(args.results_file)
     elif args.port:
         distances = [float(d) for d in args.distances.split(',')]
-        test_distance_performance(args.port, args.baudrate, distances, args.tests)
+        test_distance_performance(args.port, args.baudrate, distances, args.tests, args.output, args.max_ci_width,
+                                  args.min_samples, args.max_seconds, args.step_settle, not args.no_resume)
+        load_and_plot_results(args.output)
     else:
         parser.print_help()
@@ -0,0 +1,217 @@
+"""Firmware simulator on a pseudo-terminal, for running the tools without a board.
+
+The simulator opens a pty and speaks the same serial protocol as the
+firmware: by default it streams frames from the dataset CSVs (binary packets
+as colloect.ino sends them, one packet per chess subpage as with
+SUBPAGE_FRAMES, or the ASCII START_FRAME/END_FRAME text), and the
+TEST_MODE, LATENCY_TEST, RAW_RESULTS and DISTANCE_TEST commands switch it to
+FRAME_TIME, LATENCY, RESULT and DETECTION lines. Frame rate, timing jitter,
+dropped lines and corrupted bytes are configurable. With time_scale > 1
+frames are sent that many times faster than on the board, while the
+timings in the reported lines stay in device milliseconds. In IDLE mode
+nothing is sent until a command arrives, like the test firmware.
+
+Usage:
+    python test_code/firmware_sim.py --mode IDLE --rate 4 --time-scale 60
+    # Simulated board on /dev/pts/5
+    python test_code/sampling-frequency-test.py --port /dev/pts/5 --duration 1 --test-type freq --time-scale 60
+"""
+import argparse
+import itertools
+import os
+import select
+import sys
+import threading
+import time
+import tty
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_process"))
+
+from csv_frames import iter_csv_frames
+from frame_protocol import encode_ascii_frame, encode_frame, encode_subpage
+
+COMMANDS = ("TEST_MODE", "LATENCY_TEST", "RAW_RESULTS", "DISTANCE_TEST")
+DEFAULT_SOURCES = ("dataset/person/data_person.csv:person", "dataset/empty/data_empty.csv:empty")
+
+
+def load_sources(specs):
+    """Frames and labels from dataset CSV files given as path:label"""
+    frames, labels = [], []
+    for spec in specs:
+        path, label = spec.rsplit(":", 1)
+        for batch, _ in iter_csv_frames(path):
+            frames.append(batch)
+            labels += [label] * len(batch)
+    return np.concatenate(frames), np.array(labels)
+
+
+class FirmwareSimulator(threading.Thread):
+    """
+    Simulated board behind a pseudo-terminal, open `port` with pyserial
+
+    Args:
+        frames: Frames to replay in a loop, shape (N, 24, 32)
+        labels: Ground-truth label of each frame, "person" or "empty"
+        rate: Frame rate on the simulated device in Hz; in subpage format
+            subpages (and every reported line) come at twice this rate
+        jitter: Relative standard deviation of the frame period
+        drop: Probability of dropping a whole line or packet
+        corrupt: Probability of flipping one byte in a line or packet
+        time_scale: Wall-clock speed-up over the device
+        frame_format: "binary", "subpage" or "ascii" frame stream
+        predictions: Optional (labels, confidences) per frame for RESULT and
+            DETECTION lines, e.g. from inference.DenseClassifier; otherwise the
+            ground truth is reported with the given accuracy
+        accuracy: Probability of a correct prediction without predictions
+        process_ms: Mean inference time reported in FRAME_TIME and LATENCY
+        seed: Random seed
+    """
+
+    def __init__(self, frames, labels=None, rate=4.0, jitter=0.0, drop=0.0, corrupt=0.0, time_scale=1.0,
+                 frame_format="binary", predictions=None, accuracy=0.95, process_ms=9.0, seed=None):
+        super().__init__(daemon=True)
+        self.frames = np.asarray(frames, dtype=np.float32)
+        self.labels = np.array(["person"] * len(self.frames) if labels is None else labels)
+        self.rate = rate
+        self.jitter = jitter
+        self.drop = drop
+        self.corrupt = corrupt
+        self.time_scale = time_scale
+        self.frame_format = frame_format
+        self.process_ms = process_ms
+        self.rng = np.random.default_rng(seed)
+        if predictions is None:
+            correct = self.rng.random(len(self.frames)) < accuracy
+            other = np.where(self.labels == "person", "empty", "person")
+            predictions = np.where(correct, self.labels, other), self.rng.uniform(0.5, 1.0, len(self.frames))
+        self.predicted, self.confidence = predictions
+        self.mode = "FRAMES"
+        self.sent = {"frames": 0, "bytes": 0, "dropped": 0, "corrupted": 0}
+        self.stopped = threading.Event()
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+        self.commands = b""
+
+    def stop(self):
+        self.stopped.set()
+        self.join(timeout=2)
+        os.close(self.master)
+        os.close(self.slave)
+
+    def run(self):
+        next_time = time.perf_counter()
+        device_ms = 0.0
+        steps = 2 if self.frame_format == "subpage" else 1  # subpages per frame
+        for seq in itertools.count():
+            period_ms = 1000 / self.rate / steps * max(0.0, 1 + self.jitter * self.rng.standard_normal())
+            device_ms += period_ms
+            next_time += period_ms / 1000 / self.time_scale
+            if self.stopped.wait(max(0.0, next_time - time.perf_counter())):
+                return
+            self._read_commands()
+            index = seq // steps % len(self.frames)
+            for data in self._output(index, seq, device_ms, period_ms):
+                if self.rng.random() < self.drop:
+                    self.sent["dropped"] += 1
+                    continue
+                if self.rng.random() < self.corrupt:
+                    data = bytearray(data)
+                    data[self.rng.integers(len(data))] ^= int(self.rng.integers(1, 256))
+                    self.sent["corrupted"] += 1
+                self._write(bytes(data))
+            self.sent["frames"] += 1
+
+    def _output(self, index, seq, device_ms, period_ms):
+        """Lines or packets the firmware prints for one frame in the current mode"""
+        process = max(0.5, self.process_ms * (1 + 0.1 * self.rng.standard_normal()))
+        if self.mode == "IDLE":
+            return []
+        if self.mode == "FRAMES":
+            if self.frame_format == "binary":
+                return [encode_frame(self.frames[index], seq, device_ms)]
+            if self.frame_format == "subpage":
+                return [encode_subpage(self.frames[index], seq % 2, seq, device_ms)]
+            return [encode_ascii_frame(self.frames[index])]
+        if self.mode == "TEST_MODE":
+            capture = max(0.0, period_ms - process)
+            lines = [f"FRAME_TIME:{capture:.2f},{process:.2f},{capture + process:.2f}"]
+            if seq % max(1, round(self.rate)) == 0:
+                lines.append(f"CURRENT:{30 + 0.5 * self.rng.standard_normal():.2f}")
+        elif self.mode == "LATENCY_TEST":
+            lines = [f"LATENCY:{process + 1.5:.2f}"]  # inference plus LED update
+        elif self.mode == "RAW_RESULTS":
+            lines = [f"RESULT:{self.predicted[index]},{self.confidence[index]:.4f},{self.labels[index]}"]
+        else:
+            lines = [f"DETECTION:{self.predicted[index].upper()},{self.confidence[index]:.2f}"]
+        return [(line + "\r\n").encode() for line in lines]
+
+    def _read_commands(self):
+        while select.select([self.master], [], [], 0)[0]:
+            try:
+                data = os.read(self.master, 1024)
+            except OSError:
+                return
+            if not data:
+                return
+            self.commands += data
+        *lines, self.commands = self.commands.split(b"\n")
+        for line in lines:
+            command = line.strip().decode(errors="replace")
+            if command in COMMANDS:
+                self.mode = command
+
+    def _write(self, data):
+        """Write everything, waiting while the host is not reading like USB flow control"""
+        while data and not self.stopped.is_set():
+            if not select.select([], [self.master], [], 0.1)[1]:
+                continue
+            try:
+                n = os.write(self.master, data)
+            except BlockingIOError:
+                continue
+            self.sent["bytes"] += n
+            data = data[n:]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate the sensor board on a pseudo-terminal")
+    parser.add_argument("--csv", nargs="*", default=list(DEFAULT_SOURCES), help="Dataset CSV files as path:label")
+    parser.add_argument("--format", choices=["binary", "subpage", "ascii"], default="binary",
+                        help="Frame stream format")
+    parser.add_argument("--rate", type=float, default=4, help="Device frame rate in Hz")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Relative jitter of the frame period")
+    parser.add_argument("--drop", type=float, default=0.0, help="Probability of dropping a line or packet")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="Probability of corrupting a line or packet")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Run this many times faster than real time")
+    parser.add_argument("--accuracy", type=float, default=0.95, help="Accuracy of simulated predictions")
+    parser.add_argument("--model", help=".npz model used for RESULT and DETECTION predictions instead")
+    parser.add_argument("--mode", choices=["FRAMES", "IDLE"] + list(COMMANDS), default="FRAMES",
+                        help="Initial mode, IDLE for the test scripts")
+    parser.add_argument("--seed", type=int, help="Random seed")
+
+    args = parser.parse_args()
+    frames, labels = load_sources(args.csv)
+    predictions = None
+    if args.model:
+        from inference import DenseClassifier
+        model = DenseClassifier.load(args.model)
+        index, confidence = model.predict(frames)
+        predictions = np.array(model.labels)[index], confidence
+    sim = FirmwareSimulator(frames, labels, args.rate, args.jitter, args.drop, args.corrupt, args.time_scale,
+                            args.format, predictions, args.accuracy, seed=args.seed)
+    sim.mode = args.mode
+    sim.start()
+    print(f"Simulated board on {sim.port} ({len(frames)} frames, {args.rate * args.time_scale:g} frames/s), "
+          f"Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    sim.stop()
+    print(f"Sent {sim.sent['frames']} frames, {sim.sent['bytes']} bytes, "
+          f"{sim.sent['dropped']} dropped, {sim.sent['corrupted']} corrupted")
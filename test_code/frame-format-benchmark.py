@@ -0,0 +1,71 @@
+import os
+import sys
+import csv
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_process"))
+from frame_protocol import FrameDecoder, AsciiFrameDecoder, encode_frame, encode_ascii_frame, num_pixels
+
+def load_frames(csv_files):
+    """
+    Load dataset frames to use as realistic payloads
+
+    Args:
+        csv_files: List of dataset CSV files with 768 values per row
+    """
+    frames = []
+    for csv_file in csv_files:
+        with open(csv_file, 'r') as f:
+            for row in csv.reader(f):
+                if len(row) == num_pixels:
+                    frames.append(np.array(row, dtype=float))
+    return frames
+
+def benchmark_formats(frames, baudrate, repeat):
+    """
+    Compare bytes per frame, link-limited frame rate and host decode speed
+
+    Args:
+        frames: List of 768-value frames
+        baudrate: Serial baud rate (8N1, 10 bits on the wire per byte)
+        repeat: Number of times the frame list is repeated for decode timing
+    """
+    ascii_stream = b"".join(encode_ascii_frame(f) for f in frames) * repeat
+    binary_stream = b"".join(encode_frame(f, i, i * 250) for i, f in enumerate(frames * repeat))
+    total = len(frames) * repeat
+    bytes_per_second = baudrate / 10
+
+    start = time.perf_counter()
+    decoder = AsciiFrameDecoder()
+    for i in range(0, len(ascii_stream), 4096):
+        decoder.feed(ascii_stream[i:i + 4096])
+    ascii_decode = time.perf_counter() - start
+    assert decoder.frames == total and decoder.rejected == 0
+
+    start = time.perf_counter()
+    decoder = FrameDecoder()
+    for i in range(0, len(binary_stream), 4096):
+        decoder.feed(binary_stream[i:i + 4096])
+    binary_decode = time.perf_counter() - start
+    assert decoder.frames == total and decoder.corrupted == 0
+
+    print(f"Frame format comparison over {total} frames at {baudrate} baud:")
+    print("=" * 76)
+    print(f"{'Format':^10}|{'Bytes/frame':^14}|{'Send time (ms)':^16}|{'Max rate (Hz)':^15}|{'Decode (frames/s)':^18}")
+    print("-" * 76)
+    for name, stream, decode_time in (("ascii", ascii_stream, ascii_decode), ("binary", binary_stream, binary_decode)):
+        frame_bytes = len(stream) / total
+        send_ms = frame_bytes / bytes_per_second * 1000
+        print(f"{name:^10}|{frame_bytes:^14.1f}|{send_ms:^16.1f}|{1000 / send_ms:^15.2f}|{total / decode_time:^18.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ASCII vs binary frame streaming")
+    parser.add_argument("--baudrate", type=int, default=115200, help="Baud rate")
+    parser.add_argument("--repeat", type=int, default=5, help="Times to repeat the dataset for decode timing")
+    parser.add_argument("--csv", nargs="+", default=["dataset/person/data_person.csv", "dataset/empty/data_empty.csv"],
+                        help="Dataset CSV files used as frame payloads")
+
+    args = parser.parse_args()
+    benchmark_formats(load_frames(args.csv), args.baudrate, args.repeat)
@@ -0,0 +1,90 @@
+"""Line-delimited JSON (NDJSON) logs for the test scripts.
+
+Each record is written as one JSON object per line and flushed straight
+away, so a crash loses at most the line being written and another process
+can analyse the file while it is still growing. Readers stream records one
+at a time and also accept the older single JSON array files.
+"""
+import json
+import time
+
+
+class NdjsonWriter:
+    """
+    Append records to an NDJSON file, one flushed line per record
+
+    Args:
+        path: Output file
+        mode: "a" to append to an existing log, "w" to start a new one
+    """
+
+    def __init__(self, path, mode="a"):
+        self.path = path
+        self.file = open(path, mode)
+        self.count = 0
+
+    def write(self, record):
+        """Write one record, adding the host receive time as host_time"""
+        record.setdefault('host_time', time.time())
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_records(path, follow=False, idle_timeout=None, poll_interval=0.2):
+    """
+    Yield records from an NDJSON file, or from a legacy JSON array file
+
+    Args:
+        path: Input file
+        follow: Keep waiting for new lines at the end of the file, like tail -f
+        idle_timeout: With follow, stop after this many seconds without new data
+        poll_interval: Seconds between checks for new data when following
+    """
+    with open(path, 'r') as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        if first == '[':
+            f.seek(0)
+            yield from json.load(f)
+            return
+        f.seek(0)
+        partial, last_data = "", time.monotonic()
+        while True:
+            line = f.readline()
+            if line.endswith("\n"):
+                line, partial = partial + line, ""
+                last_data = time.monotonic()
+                if line.strip():
+                    yield json.loads(line)
+                continue
+            partial += line  # a line still being written
+            if not follow or (idle_timeout is not None and time.monotonic() - last_data > idle_timeout):
+                if partial.strip() and not follow:
+                    yield json.loads(partial)
+                return
+            if line:
+                last_data = time.monotonic()
+            time.sleep(poll_interval)
+
+
+def iter_chunks(records, size):
+    """Group an iterator of records into lists of up to size records"""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,605 @@
+import argparse
+import contextlib
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import select
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+import numpy as np
+
+test_code = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, test_code)
+sys.path.insert(0, os.path.join(test_code, "..", "data_process"))
+from csv_frames import load_csv_frames, num_pixels
+from frame_protocol import AsciiFrameDecoder, FrameDecoder, encode_ascii_frame, encode_frame
+from ingest import FrameRing, SerialReader
+import image
+
+def _load(name, filename):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(test_code, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+voting_window_analysis = _load("voting_window_analysis", "voting-window-analysis.py")
+window_evaluation = _load("window_evaluation", "window-evaluation.py")
+sampling_frequency_test = _load("sampling_frequency_test", "sampling-frequency-test.py")
+
+DEFAULT_SOURCES = ("dataset/person/data_person.csv:person", "dataset/empty/data_empty.csv:empty")
+VOTING_CONFIGS = [{'window_size': w, 'threshold_percent': t} for w, t in ((2, 50), (4, 50), (4, 75), (6, 50), (8, 50))]
+RESULT_VERSION = 1
+
+# Per-class mean and standard deviation of every pixel (row 0 empty, row 1
+# person) and the lag-1 autocorrelation of consecutive frames
+DatasetModel = namedtuple('DatasetModel', 'mean std phi')
+
+def fit_dataset_model(csv_specs):
+    """
+    Pixel statistics of the dataset CSVs, given as path:label with person
+    and empty labels, for synthesize()
+    """
+    frames = {'empty': [], 'person': []}
+    for spec in csv_specs:
+        path, label = spec.rsplit(':', 1)
+        frames[label].append(load_csv_frames(path)[0].reshape(-1, num_pixels))
+    mean, std, lagged, energy = [], [], 0.0, 0.0
+    for label in ('empty', 'person'):
+        if not frames[label]:
+            raise ValueError(f"no {label} frames in {list(csv_specs)}")
+        data = np.concatenate(frames[label]).astype(np.float64)
+        residual = data - data.mean(axis=0)
+        mean.append(data.mean(axis=0))
+        std.append(residual.std(axis=0))
+        lagged += np.sum(residual[1:] * residual[:-1])
+        energy += np.sum(residual ** 2)
+    phi = float(np.clip(lagged / energy if energy else 0.0, 0.0, 0.99))
+    return DatasetModel(np.array(mean, np.float32), np.array(std, np.float32), phi)
+
+def model_digest(model):
+    digest = hashlib.sha1(np.float64(model.phi).tobytes())
+    digest.update(model.mean.tobytes() + model.std.tobytes())
+    return digest.hexdigest()[:8]
+
+def synthetic_labels(num_frames, rng, segment_frames=40):
+    """
+    1 (person) or 0 (empty) per frame, in segments of geometrically
+    distributed length, like people walking in and out
+    """
+    lengths = rng.geometric(1 / segment_frames, num_frames // segment_frames + 16)
+    while lengths.sum() < num_frames:
+        lengths = np.concatenate([lengths, rng.geometric(1 / segment_frames, len(lengths))])
+    values = (np.arange(len(lengths)) + rng.integers(2)) % 2
+    return np.repeat(values, lengths)[:num_frames].astype(np.int8)
+
+def synthesize(model, num_frames, seed=0, block=65536, segment_frames=40):
+    """
+    Yield (frames, labels) blocks of a synthetic capture
+
+    Every pixel follows its class mean and standard deviation from the
+    dataset, with AR(1) noise carrying the frame-to-frame correlation
+    across blocks, so the output does not depend on the block size.
+
+    Args:
+        model: DatasetModel from fit_dataset_model()
+        num_frames: Total number of frames
+        seed: Random seed
+        block: Frames per yielded block
+        segment_frames: Mean length of a person or empty segment
+    """
+    rng = np.random.default_rng(seed)
+    labels = synthetic_labels(num_frames, rng, segment_frames)
+    phi, gain = model.phi, np.sqrt(1 - model.phi ** 2)
+    state = rng.standard_normal(num_pixels)
+    noise_rng = np.random.default_rng([seed, 1])
+    for start in range(0, num_frames, block):
+        truth = labels[start:start + block]
+        noise = noise_rng.standard_normal((len(truth), num_pixels)) * gain
+        noise[0] += phi * state
+        for t in range(1, len(noise)):
+            noise[t] += phi * noise[t - 1]
+        state = noise[-1]
+        yield (model.mean[truth] + model.std[truth] * noise).astype(np.float32), truth
+
+def synthetic_results(labels, rng, accuracy=0.95):
+    """Predicted labels (1 = person) and confidences for a labelled capture"""
+    correct = rng.random(len(labels)) < accuracy
+    return np.where(correct, labels, 1 - labels), rng.uniform(0.5, 1.0, len(labels))
+
+class ByteStream:
+    """
+    In-memory serial port: a block of bytes repeated, then a tail, served in
+    reads of at most chunk bytes like a USB CDC port
+
+    Args:
+        block: Bytes repeated `repeats` times
+        repeats: Number of copies of block
+        tail: Bytes after the last copy
+        chunk: Largest read
+    """
+    def __init__(self, block, repeats, tail=b'', chunk=4096):
+        self.block = memoryview(block)
+        self.repeats = repeats
+        self.tail = memoryview(tail)
+        self.chunk = chunk
+        self.size = len(block) * repeats + len(tail)
+        self.pos = 0
+
+    @property
+    def in_waiting(self):
+        return min(self.chunk, self.size - self.pos)
+
+    def read(self, n=1):
+        n = min(n, self.chunk, self.size - self.pos)
+        if n <= 0:
+            time.sleep(0.001)  # like a port with nothing to read
+            return b''
+        body = len(self.block) * self.repeats
+        if self.pos < body:
+            offset = self.pos % len(self.block)
+            n = min(n, len(self.block) - offset)
+            out = self.block[offset:offset + n]
+        else:
+            out = self.tail[self.pos - body:self.pos - body + n]
+        self.pos += n
+        return bytes(out)
+
+class PtyPump(threading.Thread):
+    """
+    Writes a ByteStream into a pseudo-terminal as fast as the reader takes
+    it; open `port` with pyserial
+
+    Args:
+        source: ByteStream to send
+        wait_for: Optional command (e.g. b'LATENCY_TEST') to wait for
+            before sending, like the test firmware
+    """
+    def __init__(self, source, wait_for=None):
+        super().__init__(daemon=True)
+        import tty
+        self.source = source
+        self.wait_for = wait_for
+        self.stopped = threading.Event()
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+
+    def run(self):
+        received = b''
+        while self.wait_for and self.wait_for not in received and not self.stopped.is_set():
+            if select.select([self.master], [], [], 0.1)[0]:
+                received += os.read(self.master, 1024)
+        while self.source.pos < self.source.size and not self.stopped.is_set():
+            data = self.source.read(self.source.chunk)
+            while data and not self.stopped.is_set():
+                if not select.select([], [self.master], [], 0.1)[1]:
+                    continue
+                try:
+                    data = data[os.write(self.master, data):]
+                except BlockingIOError:
+                    continue
+
+    def stop(self):
+        self.stopped.set()
+        self.join(timeout=2)
+        os.close(self.master)
+        os.close(self.slave)
+
+@contextlib.contextmanager
+def open_stream(inputs, stream='memory'):
+    """Serial-like object serving the prepared bytes from memory or through a pty"""
+    source = ByteStream(inputs['block'], inputs['repeats'], inputs['tail'])
+    if stream == 'memory':
+        yield source
+        return
+    import serial
+    pump = PtyPump(source)
+    # Opening the port flushes its input, so only start sending afterwards
+    ser = serial.Serial(pump.port, 115200, timeout=0.05)
+    pump.start()
+    try:
+        yield ser
+    finally:
+        ser.close()
+        pump.stop()
+
+def _cached(workdir, name, write):
+    """Input file in workdir, written once by write(file) and reused by later runs"""
+    path = os.path.join(workdir, name)
+    if not os.path.exists(path):
+        with open(path + '.tmp', 'w' if name.endswith(('.csv', '.ndjson', '.json')) else 'wb') as f:
+            write(f)
+        os.replace(path + '.tmp', path)
+    return path
+
+def _labels_and_results(size, options):
+    rng = np.random.default_rng([options['seed'], 2])
+    labels = synthetic_labels(size, rng)
+    predicted, confidence = synthetic_results(labels, rng)
+    return labels, predicted, confidence
+
+def _stream_inputs(frames, encode, size, block_frames=1024):
+    packets = [encode(frame, i) for i, frame in enumerate(frames[:block_frames])]
+    repeats, rest = divmod(size, len(packets))
+    block, tail = b''.join(packets), b''.join(packets[:rest])
+    return {'block': block, 'repeats': repeats, 'tail': tail, 'frames': size,
+            'bytes': len(block) * repeats + len(tail)}
+
+def prepare_csv(size, workdir, options):
+    def write(f):
+        for frames, _ in synthesize(options['model'], size, options['seed']):
+            np.savetxt(f, frames, fmt="%.2f", delimiter=",")
+    path = _cached(workdir, f"frames-{size}-{options['tag']}.csv", write)
+    return {'path': path, 'frames': size, 'bytes': os.path.getsize(path)}
+
+def prepare_frames(size, workdir, options):
+    def write(f):
+        frames = [frames for frames, _ in synthesize(options['model'], size, options['seed'])]
+        np.save(f, np.concatenate(frames).reshape(-1, image.frame_height, image.frame_width))
+    path = _cached(workdir, f"frames-{size}-{options['tag']}.npy", write)
+    return {'path': path, 'frames': size, 'bytes': os.path.getsize(path), 'workdir': workdir}
+
+def prepare_binary_stream(size, workdir, options):
+    frames, _ = next(synthesize(options['model'], min(size, 1024), options['seed']))
+    return {**_stream_inputs(frames, lambda f, i: encode_frame(f, i, i * 250), size), 'decoder': FrameDecoder}
+
+def prepare_ascii_stream(size, workdir, options):
+    frames, _ = next(synthesize(options['model'], min(size, 1024), options['seed']))
+    return {**_stream_inputs(frames, lambda f, i: encode_ascii_frame(f), size), 'decoder': AsciiFrameDecoder}
+
+def prepare_latency_lines(size, workdir, options):
+    latency = np.random.default_rng([options['seed'], 3]).normal(10.5, 0.8, min(size, 1024))
+    return _stream_inputs(latency, lambda ms, i: f"LATENCY:{ms:.2f}\r\n".encode(), size)
+
+def prepare_results_log(size, workdir, options):
+    def write(f):
+        labels, predicted, confidence = _labels_and_results(size, options)
+        names = np.array(['empty', 'person'])
+        for start in range(0, size, 65536):
+            rows = zip(names[predicted[start:start + 65536]], confidence[start:start + 65536],
+                       names[labels[start:start + 65536]])
+            f.write(''.join(f'{{"raw_prediction": "{p}", "confidence": {c:.4f}, "ground_truth": "{t}", '
+                            f'"host_time": {(start + i) * 0.25:.2f}}}\n' for i, (p, c, t) in enumerate(rows)))
+    path = _cached(workdir, f"results-{size}-s{options['seed']}.ndjson", write)
+    return {'path': path, 'frames': size, 'bytes': os.path.getsize(path)}
+
+def prepare_window_results(size, workdir, options):
+    labels, predicted, _ = _labels_and_results(size, options)
+    def write_results(f):
+        json.dump([{'window_ms': w, 'stride_ms': s, 'predictions': predicted.tolist()}
+                   for w, s in window_evaluation.DEFAULT_CONFIGS], f)
+    def write_truth(f):
+        f.write('label\n')
+        np.savetxt(f, labels, fmt='%d')
+    results = _cached(workdir, f"windows-{size}-s{options['seed']}.json", write_results)
+    truth = _cached(workdir, f"truth-{size}-s{options['seed']}.csv", write_truth)
+    return {'results': results, 'truth': truth, 'frames': size,
+            'bytes': os.path.getsize(results) + os.path.getsize(truth)}
+
+def run_read_csv(inputs, options):
+    return len(image.read_csv_data(inputs['path']))
+
+def run_save_images(inputs, options):
+    frames = np.load(inputs['path'], mmap_mode='r')
+    output_dir = tempfile.mkdtemp(dir=inputs['workdir'])
+    try:
+        image.save_frames_as_images(frames, output_dir)
+    finally:
+        shutil.rmtree(output_dir)
+    return len(frames)
+
+def run_decoder(inputs, options):
+    decoder, decoded, idle = inputs['decoder'](), 0, time.monotonic()
+    with open_stream(inputs, options['stream']) as ser:
+        while decoded < inputs['frames']:
+            data = ser.read(ser.in_waiting or 1)
+            decoded += len(decoder.feed(data))
+            if data:
+                idle = time.monotonic()
+            elif time.monotonic() - idle > 5:
+                raise RuntimeError(f"stream stalled after {decoded} frames")
+    return decoded
+
+def run_serial_reader(inputs, options):
+    # collect.py's ingestion path: reader thread, ring buffer and batch drain
+    with open_stream(inputs, options['stream']) as ser:
+        ring = FrameRing(4096)
+        reader = SerialReader(ser, inputs['decoder'](), ring)
+        reader.start()
+        drained = 0
+        try:
+            while drained + ring.overruns < inputs['frames']:
+                frames, _, _ = ring.get_batch(64, timeout=5)
+                if not len(frames) and not ring.size:
+                    raise RuntimeError(f"serial reader stalled after {drained} frames: {reader.stats()}")
+                drained += len(frames)
+        finally:
+            reader.stop()
+    return drained + ring.overruns
+
+def run_latency_lines(inputs, options):
+    # sampling-frequency-test.py's readline loop, unchanged, against a pty
+    pump = PtyPump(ByteStream(inputs['block'], inputs['repeats'], inputs['tail']), wait_for=b'LATENCY_TEST')
+    pump.start()
+    try:
+        report = sampling_frequency_test.test_latency(pump.port, 115200, num_tests=inputs['frames'], settle=0)
+    finally:
+        pump.stop()
+    return report['latency']['count']
+
+def run_voting(inputs, options):
+    voting_window_analysis.analyze_voting_windows(inputs['path'], VOTING_CONFIGS)
+    return inputs['frames']
+
+def run_window_eval(inputs, options):
+    window_evaluation.evaluate_window_performance(inputs['results'], inputs['truth'])
+    return inputs['frames']
+
+# max_frames caps stages whose inputs or outputs grow too large for the
+# biggest sizes; None streams any size
+Stage = namedtuple('Stage', 'prepare run max_frames pty_only')
+STAGES = {
+    'read_csv_data': Stage(prepare_csv, run_read_csv, 1000000, False),
+    'save_frames_as_images': Stage(prepare_frames, run_save_images, 20000, False),
+    'binary_decoder': Stage(prepare_binary_stream, run_decoder, None, False),
+    'ascii_decoder': Stage(prepare_ascii_stream, run_decoder, None, False),
+    'serial_reader': Stage(prepare_binary_stream, run_serial_reader, None, False),
+    'latency_lines': Stage(prepare_latency_lines, run_latency_lines, 1000000, True),
+    'analyze_voting_windows': Stage(prepare_results_log, run_voting, None, False),
+    'evaluate_window_performance': Stage(prepare_window_results, run_window_eval, None, False),
+}
+
+def _rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1e3
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+def _reset_peak_rss():
+    """Restart the peak RSS at the current RSS (Linux), so input preparation is not counted"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def measure_stage(name, size, workdir, options):
+    """
+    Prepare the inputs of one stage (not timed) and measure it
+
+    The stage runs `repeat` times for the best and median time and the peak
+    RSS, then once more under tracemalloc for the peak of traced
+    allocations. Worker processes started by a stage are not included.
+    """
+    stage = STAGES[name]
+    row = {'stage': name, 'size': size}
+    if stage.pty_only and options['stream'] != 'pty':
+        return {**row, 'skipped': 'needs --stream pty'}
+    limit = options.get('max_frames', stage.max_frames) or None
+    frames = min(size, limit) if limit and stage.max_frames else size
+    inputs = stage.prepare(frames, workdir, options)
+    devnull = open(os.devnull, 'w')
+    rss_start = _rss_mb()
+    _reset_peak_rss()
+    times = []
+    with contextlib.redirect_stdout(devnull):
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            processed = stage.run(inputs, options)
+            times.append(time.perf_counter() - start)
+        peak_rss = _peak_rss_mb()
+        alloc_peak = None
+        if options['allocations']:
+            tracemalloc.start()
+            stage.run(inputs, options)
+            alloc_peak = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+    devnull.close()
+    if processed != frames:
+        raise RuntimeError(f"{name} processed {processed} of {frames} frames")
+    seconds = min(times)
+    return {
+        **row,
+        'frames': frames,
+        'capped': frames < size,
+        'seconds': seconds,
+        'median_seconds': float(np.median(times)),
+        'frames_per_s': frames / seconds,
+        'mb_per_s': inputs['bytes'] / 1e6 / seconds,
+        'peak_rss_mb': peak_rss,
+        'rss_growth_mb': None if peak_rss is None or rss_start is None else max(0.0, peak_rss - rss_start),
+        'alloc_peak_mb': alloc_peak,
+    }
+
+def _child(conn, name, size, workdir, options):
+    try:
+        conn.send(measure_stage(name, size, workdir, options))
+    except Exception as e:
+        conn.send({'stage': name, 'size': size, 'error': repr(e)})
+    conn.close()
+
+def run_benchmarks(stages, sizes, workdir, model, seed=0, repeat=3, stream='memory', allocations=True,
+                   max_frames=None, isolate=True):
+    """
+    Measure every stage at every size
+
+    Returns the result document: environment, options and one row per
+    stage and size with frames, best and median seconds, frames/s, MB/s of
+    input, peak RSS and its growth during the stage, and the tracemalloc
+    peak in MB.
+
+    Args:
+        stages: Names from STAGES
+        sizes: Numbers of synthetic frames
+        workdir: Directory for generated inputs, reused when they exist
+        model: DatasetModel for the synthetic frames
+        seed: Synthetic data seed
+        repeat: Timed runs per stage
+        stream: 'memory' or 'pty' source for the serial parsers
+        allocations: Also measure allocations with tracemalloc (one extra run)
+        max_frames: Override the cap of capped stages, 0 for no cap
+        isolate: Run each measurement in a fresh process, so peak RSS
+            belongs to that stage alone
+    """
+    options = {'model': model, 'seed': seed, 'tag': f"s{seed}-{model_digest(model)}", 'repeat': repeat,
+               'stream': stream, 'allocations': allocations}
+    if max_frames is not None:
+        options['max_frames'] = max_frames
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    results = []
+    for size in sizes:
+        for name in stages:
+            print(f"  {name} x {size}...", flush=True)
+            if not isolate:
+                results.append(measure_stage(name, size, workdir, options))
+                continue
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_child, args=(sender, name, size, workdir, options))
+            process.start()
+            sender.close()
+            try:
+                results.append(receiver.recv())
+            except EOFError:
+                results.append({'stage': name, 'size': size, 'error': f"worker exited with {process.exitcode}"})
+            process.join()
+    return {
+        'version': RESULT_VERSION,
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'options': {'seed': seed, 'repeat': repeat, 'stream': stream, 'model': model_digest(model)},
+        'results': results,
+    }
+
+def compare_results(baseline, current, tolerance=0.1, min_alloc_mb=1.0):
+    """
+    Compare the time per frame and the allocation peak of every stage and
+    size with a baseline document
+
+    A stage is flagged as a regression when it got more than `tolerance`
+    (0.1 = 10%) slower, or allocated more than `tolerance` more memory and
+    at least min_alloc_mb more.
+    """
+    base = {(r['stage'], r['size']): r for r in baseline['results'] if 'seconds' in r}
+    rows = []
+    for r in current['results']:
+        b = base.get((r['stage'], r['size']))
+        if 'seconds' not in r or b is None:
+            rows.append({'stage': r['stage'], 'size': r['size'], 'status': 'new' if 'seconds' in r else 'skipped',
+                         'regressions': []})
+            continue
+        time_change = (r['seconds'] / r['frames']) / (b['seconds'] / b['frames']) - 1
+        alloc_change = None
+        if r.get('alloc_peak_mb') is not None and b.get('alloc_peak_mb'):
+            alloc_change = r['alloc_peak_mb'] / b['alloc_peak_mb'] - 1
+        regressions = []
+        if time_change > tolerance:
+            regressions.append('time')
+        if alloc_change is not None and alloc_change > tolerance and \
+                r['alloc_peak_mb'] - b['alloc_peak_mb'] >= min_alloc_mb:
+            regressions.append('memory')
+        status = 'regression' if regressions else 'faster' if time_change < -tolerance else 'ok'
+        rows.append({'stage': r['stage'], 'size': r['size'], 'status': status, 'regressions': regressions,
+                     'time_change': time_change, 'alloc_change': alloc_change})
+    return rows
+
+def _mb(value):
+    return '-' if value is None else f"{value:.1f}"
+
+def print_results(document):
+    print("=" * 104)
+    print(f"{'Stage':^28}|{'Frames':^10}|{'Time (s)':^10}|{'Frames/s':^12}|{'MB/s':^8}|"
+          f"{'Peak RSS (MB)':^14}|{'RSS +(MB)':^10}|{'Alloc (MB)':^10}")
+    print("-" * 104)
+    for r in document['results']:
+        if 'seconds' not in r:
+            print(f"{r['stage']:^28}|{r['size']:^10}| {r.get('skipped') or r.get('error')}")
+            continue
+        frames = f"{r['frames']}{'*' if r['capped'] else ''}"
+        print(f"{r['stage']:^28}|{frames:^10}|{r['seconds']:^10.3f}|{r['frames_per_s']:^12.0f}|{r['mb_per_s']:^8.1f}|"
+              f"{_mb(r['peak_rss_mb']):^14}|{_mb(r['rss_growth_mb']):^10}|{_mb(r['alloc_peak_mb']):^10}")
+    if any(r.get('capped') for r in document['results']):
+        print("* capped, see --max-frames")
+
+def print_comparison(rows, tolerance):
+    print(f"\nComparison with the baseline (tolerance {tolerance * 100:.0f}%):")
+    print("=" * 72)
+    print(f"{'Stage':^28}|{'Size':^10}|{'Time/frame':^12}|{'Alloc':^10}|{'Status':^10}")
+    print("-" * 72)
+    for row in rows:
+        time_change = '-' if row.get('time_change') is None else f"{row['time_change'] * 100:+.1f}%"
+        alloc_change = '-' if row.get('alloc_change') is None else f"{row['alloc_change'] * 100:+.1f}%"
+        status = row['status'] + (f" ({', '.join(row['regressions'])})" if row['regressions'] else '')
+        print(f"{row['stage']:^28}|{row['size']:^10}|{time_change:^12}|{alloc_change:^10}| {status}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the host-side pipeline on synthetic captures")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000],
+                        help="Synthetic capture sizes in frames, e.g. 1000 100000 10000000")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES), help="Stages to run")
+    parser.add_argument("--csv", nargs="+", default=list(DEFAULT_SOURCES),
+                        help="Dataset CSV files as path:label the synthetic frames are modelled on")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic data seed")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best time is reported)")
+    parser.add_argument("--stream", choices=["memory", "pty"], default="memory",
+                        help="Byte stream the serial parsers read from")
+    parser.add_argument("--max-frames", type=int, help="Cap of the capped stages (0: no cap)")
+    parser.add_argument("--no-alloc", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--in-process", action="store_true", help="Run all stages in this process")
+    parser.add_argument("--workdir", help="Keep generated inputs here and reuse them (default: temporary)")
+    parser.add_argument("--output", help="Save the results as a JSON baseline")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown, 0.1 = 10%%")
+
+    args = parser.parse_args()
+    model = fit_dataset_model(args.csv)
+    print(f"Synthetic frames modelled on {', '.join(args.csv)} (lag-1 correlation {model.phi:.2f})")
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(workdir, exist_ok=True)
+        document = run_benchmarks(args.stages, args.sizes, workdir, model, args.seed, args.repeat, args.stream,
+                                  not args.no_alloc, args.max_frames, not args.in_process)
+    print_results(document)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"Results saved to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline['options'] != document['options']:
+            print(f"\nWarning: baseline options {baseline['options']} differ from {document['options']}")
+        rows = compare_results(baseline, document, args.tolerance)
+        print_comparison(rows, args.tolerance)
+        if any(row['regressions'] for row in rows):
+            sys.exit(1)
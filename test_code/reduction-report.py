@@ -0,0 +1,180 @@
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_process"))
+from frame_protocol import CRC, HEADER, SYNC
+from inference import iter_labelled_batches, num_pixels
+from reduce import Reducer
+from train_dense import LABELS, stratified_folds, train_dense
+
+_spec = importlib.util.spec_from_file_location(
+    "architecture_sweep", os.path.join(os.path.dirname(os.path.abspath(__file__)), "architecture-sweep.py"))
+architecture_sweep = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(architecture_sweep)
+
+DEFAULT_SPECS = ("full", "avg2", "max2", "avg4", "max4", "rows4-20", "roi0.5", "roi0.25", "proj", "avg2+proj",
+                 "max2+roi0.5")
+REDUCE_CYCLES_PER_PIXEL = 2  # one load and one add or compare per input pixel
+
+def packet_bytes(values):
+    """Binary packet size for a frame of this many values"""
+    return len(SYNC) + HEADER.size + 2 * values + CRC.size
+
+def sent_values(spec):
+    """
+    Values per frame on the serial link: the firmware only pools (POOL_SIZE),
+    so ROI and projections still receive the whole pooled grid
+    """
+    h, w = Reducer.from_spec(spec).shape
+    return h * w
+
+def load_dataset(csv_specs=(), store_path=None, by="session"):
+    """
+    Frames, labels and the group of every frame: the source file for CSVs
+    and captures, the store's session or sensor id for a frame store
+    """
+    frames, labels, groups = [], [], []
+    for spec in csv_specs:
+        for batch, truth in iter_labelled_batches([spec]):
+            frames.append(batch.reshape(-1, num_pixels))
+            labels.append(truth)
+            groups += [os.path.basename(spec.rsplit(':', 1)[0])] * len(batch)
+    if store_path:
+        from frame_store import FrameStore
+        store = FrameStore(store_path)
+        frames.append(np.asarray(store.frames).reshape(-1, num_pixels))
+        labels.append(np.array(store.labels, dtype=object)[store.index['label']])
+        groups += [f"{by} {value}" for value in store.index[by]]
+    return np.concatenate(frames), np.concatenate(labels), np.array(groups, dtype=object)
+
+def evaluate_reduction(frames, labels, groups, spec, folds=5, hidden=(20, 10), epochs=60, seed=0):
+    """
+    Cross-validated accuracy of the classifier trained on reduced inputs
+    
+    The reducer (including a learned ROI) is fitted on the training folds
+    only. Returns metrics from the out-of-fold predictions, overall and per
+    group, the classifier input size and the values the firmware sends.
+    
+    Args:
+        frames: Array of shape (N, 768)
+        labels: Class name of every frame
+        groups: Group (e.g. room or session) of every frame
+        spec: Reduction spec for reduce.Reducer.from_spec()
+        folds: Number of stratified folds
+        hidden: Hidden layer widths of the classifier
+        epochs: Training epochs per fold
+        seed: Fold split and initialization seed
+    """
+    fold_of = stratified_folds(labels, folds, seed)
+    predicted = np.empty(len(labels), dtype=object)
+    inputs = []
+    start = time.perf_counter()
+    for fold in range(folds):
+        train, test = fold_of != fold, fold_of == fold
+        model = train_dense(frames[train], labels[train], hidden, epochs, seed=seed + fold,
+                            reducer=Reducer.from_spec(spec))
+        model.quantize(frames[train])
+        index, _ = model.predict(frames[test], int8=True)
+        predicted[test] = np.array(LABELS, dtype=object)[index]
+        inputs.append(model.reducer.output_size)
+    elapsed = time.perf_counter() - start
+    
+    truth, person = labels == 'person', predicted == 'person'
+    # Host reduction throughput, repeated for at least 0.1 s
+    reducer = Reducer.from_spec(spec).fit(frames, labels)
+    repeats, host_start = 0, time.perf_counter()
+    while repeats == 0 or time.perf_counter() - host_start < 0.1:
+        reducer.transform(frames)
+        repeats += 1
+    host_fps = repeats * len(frames) / (time.perf_counter() - host_start)
+    return {
+        'spec': spec,
+        'inputs': int(round(np.mean(inputs))),
+        'sent_values': sent_values(spec),
+        'accuracy': float(np.mean(person == truth)),
+        'fpr': float(np.sum(person & ~truth) / max(np.sum(~truth), 1)),
+        'fnr': float(np.sum(~person & truth) / max(np.sum(truth), 1)),
+        'groups': {str(g): float(np.mean((person == truth)[groups == g])) for g in np.unique(groups)},
+        'host_frames_per_s': host_fps,
+        'train_s': elapsed,
+    }
+
+def frame_rates(inputs, hidden=(20, 10), baudrate=115200, sensor_hz=64, device=architecture_sweep.NANO33,
+                sent=None):
+    """
+    Bytes per frame and the frame rates the link and the board can sustain
+    with a classifier of this many inputs
+    
+    bytes_per_frame and serial_hz are for one binary packet of sent values
+    (default: inputs), which is what the firmware sends for pooling
+    (POOL_SIZE); pass sent_values(spec) for specs with an ROI or projections.
+    infer_hz is the reduction plus the int8 classifier from the
+    architecture-sweep.py cost model; the achievable rate is the lowest of
+    those and the sensor's refresh rate.
+    """
+    size = packet_bytes(inputs if sent is None else sent)
+    serial_hz = baudrate / 10 / size  # 8N1: 10 bits per byte
+    cost = architecture_sweep.model_cost(hidden, 'int8', device, inputs)
+    reduce_ms = num_pixels * REDUCE_CYCLES_PER_PIXEL / device['clock_hz'] * 1000
+    infer_hz = 1000 / (cost['time_ms'] + reduce_ms)
+    return {
+        'bytes_per_frame': size,
+        'serial_hz': serial_hz,
+        'infer_ms': cost['time_ms'] + reduce_ms,
+        'infer_hz': infer_hz,
+        'flash_bytes': cost['flash_bytes'],
+        'achievable_hz': min(serial_hz, infer_hz, sensor_hz),
+    }
+
+def print_report(rows, groups):
+    print(f"\n{'Reduction':^16}|{'Inputs':^8}|{'Sent':^8}|{'Acc (%)':^9}|{'FPR (%)':^9}|{'FNR (%)':^9}|{'Bytes':^7}|"
+          f"{'Serial (Hz)':^13}|{'Infer (ms)':^12}|{'Max (Hz)':^10}|{'Host (fps)':^12}")
+    print("-" * 120)
+    for r in rows:
+        print(f"{r['spec']:^16}|{r['inputs']:^8}|{r['sent_values']:^8}|{r['accuracy'] * 100:^9.1f}|{r['fpr'] * 100:^9.1f}|"
+              f"{r['fnr'] * 100:^9.1f}|{r['bytes_per_frame']:^7}|{r['serial_hz']:^13.1f}|{r['infer_ms']:^12.2f}|"
+              f"{r['achievable_hz']:^10.1f}|{r['host_frames_per_s']:^12.0f}")
+    if len(groups) > 1:
+        widths = [max(12, len(g) + 2) for g in groups]
+        print("\nAccuracy (%) per group:")
+        print(f"{'Reduction':^16}|" + "|".join(f"{g:^{w}}" for g, w in zip(groups, widths)))
+        for r in rows:
+            print(f"{r['spec']:^16}|" + "|".join(f"{r['groups'][g] * 100:^{w}.1f}" for g, w in zip(groups, widths)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep frame reductions: accuracy against bytes, inputs and frame rate")
+    parser.add_argument("--csv", nargs="*", default=["dataset/person/data_person.csv:person",
+                                                     "dataset/empty/data_empty.csv:empty"],
+                        help="Dataset CSV files or raw .bin captures as path:label")
+    parser.add_argument("--store", help="Frame store directory")
+    parser.add_argument("--by", choices=["session", "sensor"], default="session",
+                        help="Group store frames by session (e.g. one per room) or sensor")
+    parser.add_argument("--specs", nargs="+", default=list(DEFAULT_SPECS), help="Reductions (see reduce.py)")
+    parser.add_argument("--hidden", type=int, nargs="+", default=[20, 10], help="Classifier hidden layer widths")
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds")
+    parser.add_argument("--epochs", type=int, default=60, help="Training epochs")
+    parser.add_argument("--baudrate", type=int, default=115200, help="Serial baud rate")
+    parser.add_argument("--sensor-hz", type=float, default=64, help="Sensor refresh limit (MLX90640: up to 64 Hz)")
+    parser.add_argument("--output", help="Save the report as JSON")
+    
+    args = parser.parse_args()
+    frames, labels, groups = load_dataset(args.csv, args.store, args.by)
+    print(f"{len(frames)} frames in {len(np.unique(groups))} groups, {len(args.specs)} reductions x {args.folds} folds")
+    
+    rows = []
+    for spec in args.specs:
+        row = evaluate_reduction(frames, labels, groups, spec, args.folds, tuple(args.hidden), args.epochs)
+        row.update(frame_rates(row['inputs'], tuple(args.hidden), args.baudrate, args.sensor_hz,
+                               sent=row['sent_values']))
+        rows.append(row)
+        print(f"  {spec}: {row['accuracy'] * 100:.1f}% with {row['inputs']} inputs ({row['train_s']:.1f} s)")
+    print_report(rows, [str(g) for g in np.unique(groups)])
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=2)
+        print(f"Report saved to {args.output}")
@@ -1,9 +1,126 @@
 import serial
 import time
-import statistics
+import json
+import csv
 import argparse
+import numpy as np
 
-def test_sampling_frequency(port, baudrate, duration=60):
+PERCENTILES = (50, 90, 99, 99.9)
+
+class TimingLog:
+    """
+    Preallocated columns of float64 samples, grown by doubling when full
+    
+    Args:
+        columns: Column names
+        capacity: Initial number of rows
+    """
+    def __init__(self, columns, capacity=1024):
+        self.columns = columns
+        self.data = np.empty((max(capacity, 1), len(columns)), dtype=np.float64)
+        self.n = 0
+    
+    def append(self, *values):
+        if self.n == len(self.data):
+            self.data = np.concatenate([self.data, np.empty_like(self.data)])
+        self.data[self.n] = values
+        self.n += 1
+    
+    def __len__(self):
+        return self.n
+    
+    def __getitem__(self, column):
+        return self.data[:self.n, self.columns.index(column)]
+
+def summarize(values):
+    """Count, mean, stdev, p50/p90/p99/p99.9 and max of a sample array"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return {'count': 0}
+    summary = {'count': int(len(values)), 'mean': float(values.mean()),
+               'std': float(values.std(ddof=1)) if len(values) > 1 else 0.0}
+    for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f'p{p:g}'] = float(v)
+    summary['max'] = float(values.max())
+    return summary
+
+def log_histogram(values, sub_buckets=8, min_value=0.01):
+    """
+    HDR-style histogram: power-of-two ranges split into sub_buckets linear
+    buckets, so relative resolution is the same for 1 ms and 1 s values
+    
+    Returns a list of (low, high, count) for the non-empty buckets.
+    
+    Args:
+        values: Samples, e.g. intervals in milliseconds
+        sub_buckets: Buckets per power of two
+        min_value: Values below this are counted in the first bucket
+    """
+    values = np.maximum(np.asarray(values, dtype=np.float64), min_value)
+    if len(values) == 0:
+        return []
+    exponent = np.floor(np.log2(values))
+    sub = np.minimum(((values / 2 ** exponent - 1) * sub_buckets).astype(np.int64), sub_buckets - 1)
+    keys, counts = np.unique(exponent * sub_buckets + sub, return_counts=True)
+    buckets = []
+    for key, count in zip(keys, counts):
+        e, s = divmod(int(key), sub_buckets)
+        low = 2.0 ** e * (1 + s / sub_buckets)
+        buckets.append((low, low + 2.0 ** e / sub_buckets, int(count)))
+    return buckets
+
+def cadence_errors(intervals_ms, refresh_hz, late_tolerance=0.1):
+    """
+    Frames missed and frames late against the nominal refresh rate
+    
+    An interval of about k periods means k - 1 frames were missed; an
+    interval that rounds to one period but is more than late_tolerance
+    longer than it is late.
+    
+    Args:
+        intervals_ms: Host-side inter-frame intervals
+        refresh_hz: Nominal sensor refresh rate
+        late_tolerance: Allowed relative overshoot of the period
+    """
+    period = 1000 / refresh_hz
+    periods = np.rint(np.asarray(intervals_ms) / period)
+    missed = int(np.maximum(periods - 1, 0).sum())
+    late = int(np.sum((periods <= 1) & (np.asarray(intervals_ms) > period * (1 + late_tolerance))))
+    return {'nominal_period_ms': period, 'missed': missed, 'late': late}
+
+def print_summary(name, summary, unit="ms"):
+    if summary['count'] == 0:
+        print(f"{name}: no samples")
+        return
+    print(f"{name}: mean {summary['mean']:.2f} {unit} (±{summary['std']:.2f}), "
+          + ", ".join(f"p{p:g} {summary[f'p{p:g}']:.2f}" for p in PERCENTILES)
+          + f", max {summary['max']:.2f} {unit}")
+
+def print_histogram(buckets, width=40):
+    peak = max(count for _, _, count in buckets)
+    for low, high, count in buckets:
+        print(f"  {low:9.2f} - {high:9.2f} ms | {'#' * max(1, round(count / peak * width)):<{width}} {count}")
+
+def export_results(path, report, log):
+    """
+    Save a report as JSON (summaries, histograms and raw samples) or CSV (raw samples)
+    
+    Args:
+        path: Output file, the format follows the .json or .csv extension
+        report: Dict of summaries from the test
+        log: TimingLog with the raw samples
+    """
+    if path.endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(log.columns)
+            writer.writerows(log.data[:log.n].tolist())
+    else:
+        with open(path, 'w') as f:
+            json.dump({**report, 'samples': {c: log[c].tolist() for c in log.columns}}, f, indent=2)
+    print(f"Results saved to {path}")
+
+def test_sampling_frequency(port, baudrate, duration=60, refresh_hz=4, export=None, settle=2, time_scale=1.0):
     """
     Test the actual sampling frequency and current draw of the system.
     
@@ -11,61 +128,82 @@ def test_sampling_frequency(port, baudrate, duration=60):
         port: Serial port connected to Arduino
         baudrate: Baud rate for serial communication
         duration: Test duration in seconds
+        refresh_hz: Nominal sensor refresh rate for missed/late frame counts
+        export: Optional .json or .csv file for the results
+        settle: Seconds to wait after opening the port
+        time_scale: Speed-up of a simulated board (firmware_sim.py --time-scale); host
+            intervals are multiplied by it to compare them with refresh_hz in device time
     """
     print(f"Testing sampling frequency for {duration} seconds...")
     
     ser = serial.Serial(port, baudrate, timeout=1)
-    time.sleep(2)  # Wait for connection to stabilize
+    time.sleep(settle)  # Wait for connection to stabilize
     
     # Clear buffer
     ser.reset_input_buffer()
     
-    frame_times = []
-    start_time = time.time()
-    frames_received = 0
+    # Host receive time of every frame, and the device-reported times
+    log = TimingLog(['host_ms', 'capture', 'process', 'total'], capacity=int(duration * time_scale * refresh_hz * 2))
+    currents = []
     
     # Send command to start test mode
     ser.write(b'TEST_MODE\n')
     
-    while (time.time() - start_time) < duration:
-        line = ser.readline().decode('utf-8').strip()
+    start_ns = time.perf_counter_ns()
+    end_ns = start_ns + int(duration * 1e9)
+    while time.perf_counter_ns() < end_ns:
+        line = ser.readline()
+        received_ns = time.perf_counter_ns()
+        line = line.decode('utf-8', errors='replace').strip()
         if line.startswith("FRAME_TIME:"):
             # Format: FRAME_TIME:capture_ms,process_ms,total_ms
             times = line.split(':')[1].split(',')
-            frame_times.append({
-                'capture': float(times[0]),
-                'process': float(times[1]),
-                'total': float(times[2])
-            })
-            frames_received += 1
-            
+            log.append((received_ns - start_ns) / 1e6 * time_scale, float(times[0]), float(times[1]), float(times[2]))
+    
         if line.startswith("CURRENT:"):
             current_draw = float(line.split(':')[1])
+            currents.append(current_draw)
             print(f"Current draw: {current_draw:.2f} mA")
     
+    ser.close()
+    
     # Calculate statistics
-    actual_duration = time.time() - start_time
-    actual_rate = frames_received / actual_duration
-    
-    # Calculate averages and standard deviations
-    if frame_times:
-        avg_capture = statistics.mean([t['capture'] for t in frame_times])
-        avg_process = statistics.mean([t['process'] for t in frame_times])
-        avg_total = statistics.mean([t['total'] for t in frame_times])
-        
-        std_capture = statistics.stdev([t['capture'] for t in frame_times]) if len(frame_times) > 1 else 0
-        std_process = statistics.stdev([t['process'] for t in frame_times]) if len(frame_times) > 1 else 0
-        std_total = statistics.stdev([t['total'] for t in frame_times]) if len(frame_times) > 1 else 0
+    actual_duration = (time.perf_counter_ns() - start_ns) / 1e9
+    frames_received = len(log)
+    intervals = np.diff(log['host_ms'])
+    report = {
+        'frames': frames_received,
+        'duration_s': actual_duration,
+        'time_scale': time_scale,
+        'rate_hz': frames_received / (actual_duration * time_scale),
+        'interval': summarize(intervals),
+        'capture': summarize(log['capture']),
+        'process': summarize(log['process']),
+        'total': summarize(log['total']),
+        'cadence': cadence_errors(intervals, refresh_hz),
+        'interval_histogram': log_histogram(intervals),
+        'current_ma': summarize(currents),
+    }
     
+    if frames_received:
         print(f"\nResults for {frames_received} frames over {actual_duration:.2f} seconds:")
-        print(f"Actual sampling rate: {actual_rate:.2f} Hz")
-        print(f"Frame capture time: {avg_capture:.2f} ms (±{std_capture:.2f} ms)")
-        print(f"Frame processing time: {avg_process:.2f} ms (±{std_process:.2f} ms)")
-        print(f"Total frame time: {avg_total:.2f} ms (±{std_total:.2f} ms)")
+        print(f"Actual sampling rate: {report['rate_hz']:.2f} Hz")
+        print_summary("Frame capture time", report['capture'])
+        print_summary("Frame processing time", report['process'])
+        print_summary("Total frame time", report['total'])
+        print_summary("Host inter-frame interval", report['interval'])
+        cadence = report['cadence']
+        print(f"Against {refresh_hz} Hz ({cadence['nominal_period_ms']:.1f} ms): "
+              f"{cadence['missed']} frames missed, {cadence['late']} frames late")
+        if len(intervals):
+            print("Inter-frame interval histogram:")
+            print_histogram(report['interval_histogram'])
     
-    ser.close()
+    if export:
+        export_results(export, report, log)
+    return report
 
-def test_latency(port, baudrate, num_tests=20):
+def test_latency(port, baudrate, num_tests=20, export=None, settle=2):
     """
     Test end-to-end latency from frame read to LED update
     
@@ -73,11 +211,13 @@ def test_latency(port, baudrate, num_tests=20):
         port: Serial port connected to Arduino
         baudrate: Baud rate for serial communication
         num_tests: Number of latency tests to run
+        export: Optional .json or .csv file for the results
+        settle: Seconds to wait after opening the port
     """
     print(f"Testing end-to-end latency with {num_tests} tests...")
     
     ser = serial.Serial(port, baudrate, timeout=1)
-    time.sleep(2)  # Wait for connection to stabilize
+    time.sleep(settle)  # Wait for connection to stabilize
     
     # Clear buffer
     ser.reset_input_buffer()
@@ -85,35 +225,52 @@ def test_latency(port, baudrate, num_tests=20):
     # Send command to start latency test mode
     ser.write(b'LATENCY_TEST\n')
     
-    latencies = []
+    log = TimingLog(['host_ms', 'latency'], capacity=num_tests)
+    start_ns = time.perf_counter_ns()
     
     for i in range(num_tests):
-        line = ser.readline().decode('utf-8').strip()
+        line = ser.readline()
+        received_ns = time.perf_counter_ns()
+        line = line.decode('utf-8', errors='replace').strip()
         if line.startswith("LATENCY:"):
             latency = float(line.split(':')[1])
-            latencies.append(latency)
+            log.append((received_ns - start_ns) / 1e6, latency)
             print(f"Test {i+1}/{num_tests}: {latency:.2f} ms")
     
-    if latencies:
-        avg_latency = statistics.mean(latencies)
-        std_latency = statistics.stdev(latencies) if len(latencies) > 1 else 0
-        print(f"\nAverage end-to-end latency: {avg_latency:.2f} ms (±{std_latency:.2f} ms)")
-    
     ser.close()
+    
+    report = {
+        'latency': summarize(log['latency']),
+        'latency_histogram': log_histogram(log['latency']),
+    }
+    if len(log):
+        print()
+        print_summary("End-to-end latency", report['latency'])
+        print_histogram(report['latency_histogram'])
+    
+    if export:
+        export_results(export, report, log)
+    return report
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Test sampling frequency and latency")
     parser.add_argument("--port", required=True, help="Serial port (e.g., COM6 or /dev/ttyACM0)")
     parser.add_argument("--baudrate", type=int, default=115200, help="Baud rate")
-    parser.add_argument("--duration", type=int, default=60, help="Test duration in seconds")
+    parser.add_argument("--duration", type=float, default=60, help="Test duration in seconds")
     parser.add_argument("--latency-tests", type=int, default=20, help="Number of latency tests")
-    parser.add_argument("--test-type", choices=["freq", "latency", "both"], default="both", 
+    parser.add_argument("--test-type", choices=["freq", "latency", "both"], default="both",
                         help="Test type: freq (frequency), latency, or both")
+    parser.add_argument("--refresh-hz", type=float, default=4, help="Nominal refresh rate for missed/late frames")
+    parser.add_argument("--export", help="Save the frequency results to this .json or .csv file")
+    parser.add_argument("--latency-export", help="Save the latency results to this .json or .csv file")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="Speed-up of a simulated board (firmware_sim.py --time-scale), 1 for real hardware")
     
     args = parser.parse_args()
     
     if args.test_type in ["freq", "both"]:
-        test_sampling_frequency(args.port, args.baudrate, args.duration)
+        test_sampling_frequency(args.port, args.baudrate, args.duration, args.refresh_hz, args.export,
+                                time_scale=args.time_scale)
     
     if args.test_type in ["latency", "both"]:
-        test_latency(args.port, args.baudrate, args.latency_tests)
+        test_latency(args.port, args.baudrate, args.latency_tests, args.latency_export)
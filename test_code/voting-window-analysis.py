@@ -1,20 +1,186 @@
 import serial
 import argparse
-import json
+import csv
 import time
-from collections import deque
+import os
+import sys
+import numpy as np
+from ndjson_log import NdjsonWriter, iter_records, iter_chunks
 
-def analyze_voting_windows(log_file, configurations):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_process"))
+import tracing
+
+def iter_raw_results(log_file, chunk_size=65536, follow=False, idle_timeout=None):
+    """
+    Stream raw classification results as arrays, one chunk at a time
+
+    Yields (votes, person_prob, truth): 1 where the raw prediction is
+    person, the person probability derived from the confidence field, and
+    1 where the ground truth is person.
+
+    Args:
+        log_file: NDJSON (or legacy JSON array) file with raw results
+        chunk_size: Records per chunk
+        follow: Keep reading while the capture is still appending to the file
+        idle_timeout: With follow, stop after this many seconds without new records
+    """
+    records = iter_records(log_file, follow=follow, idle_timeout=idle_timeout)
+    for chunk in iter_chunks(records, chunk_size):
+        votes = np.array([r['raw_prediction'] == 'person' for r in chunk], dtype=np.int8)
+        confidence = np.array([r.get('confidence', 1.0) for r in chunk], dtype=np.float64)
+        truth = np.array([r['ground_truth'] == 'person' for r in chunk], dtype=np.int8)
+        yield votes, np.where(votes == 1, confidence, 1 - confidence), truth
+
+def iter_scored_results(model_file, frame_sources, int8=False, store=None, chunk_size=65536):
+    """
+    Score recorded frames with the host copy of the classifier instead of
+    reading results logged by the board, yielding the same arrays as
+    iter_raw_results
+
+    Args:
+        model_file: .npz model for inference.DenseClassifier
+        frame_sources: Dataset CSV files as path:label, replayed in order
+        int8: Use the simulated int8 model
+        store: Optional frame store directory replayed after the CSV files
+        chunk_size: Frames scored per batch
+    """
+    from inference import DenseClassifier, iter_labelled_batches
+
+    model = DenseClassifier.load(model_file)
+    person = model.person_index
+    for frames, labels in iter_labelled_batches(frame_sources, store, chunk_size):
+        proba = model.predict_proba(frames, int8)
+        votes = (proba.argmax(axis=1) == person).astype(np.int8)
+        yield votes, proba[:, person], (labels == 'person').astype(np.int8)
+
+class VotingSweep:
+    """
+    Confusion counts for every voting configuration in one pass over the log
+
+    Rolling vote sums for all window sizes come from one cumulative sum of the
+    per-frame votes. For each window, all k-of-n thresholds are counted at
+    once by sorting the sums, and k-of-n hysteresis configurations (switch on
+    at >= on votes, off at <= off votes) are evaluated with a forward fill of
+    the last on/off event. Results can be fed in chunks; counts accumulate and
+    only the last max(window_sizes) - 1 votes are kept between chunks.
+
+    Args:
+        window_sizes: Window lengths in frames
+        hysteresis: Evaluate all (on, off) pairs with off < on as well
+    """
+
+    def __init__(self, window_sizes, hysteresis=False):
+        self.windows = sorted(set(window_sizes))
+        self.thresholds = {w: np.arange(0, w + 1) for w in self.windows}
+        # Rows of [tp, fp, tn, fn] per threshold
+        self.counts = {w: np.zeros((w + 1, 4), dtype=np.int64) for w in self.windows}
+        self.pairs = {}
+        self.pair_counts = {}
+        self.pair_state = {}
+        if hysteresis:
+            for w in self.windows:
+                self.pairs[w] = [(on, off) for on in range(1, w + 1) for off in range(on)]
+                self.pair_counts[w] = np.zeros((len(self.pairs[w]), 4), dtype=np.int64)
+                self.pair_state[w] = np.zeros(len(self.pairs[w]), dtype=bool)
+        self.tail = np.empty(0)
+        self.seen = 0
+
+    def update(self, votes, truth):
+        """
+        Add a chunk of per-frame votes (0/1, or person probabilities for
+        confidence-weighted voting) and ground truth (0/1)
+        """
+        with tracing.span("vote", frames=len(votes)):
+            self._update(np.asarray(votes, dtype=np.float64), np.asarray(truth, dtype=bool))
+
+    def _update(self, votes, truth):
+        v = np.concatenate((self.tail, votes))
+        offset = len(self.tail)
+        cs = np.concatenate(([0.0], np.cumsum(v)))
+        for w in self.windows:
+            first = max(w - 1, offset)  # first position with a full window
+            if first >= len(v):
+                continue
+            sums = cs[first + 1:] - cs[first + 1 - w:len(v) + 1 - w]
+            sums = np.round(sums, 9)  # cumulative-sum rounding on fractional votes
+            g = truth[first - offset:]
+            self.counts[w] += self._threshold_counts(sums, g, self.thresholds[w])
+            if w in self.pairs:
+                self._update_pairs(w, sums, g)
+        keep = max(self.windows) - 1
+        self.tail = v[len(v) - keep:] if keep else np.empty(0)
+        self.seen += len(votes)
+
+    @staticmethod
+    def _threshold_counts(sums, g, thresholds):
+        pos, neg = np.sort(sums[g]), np.sort(sums[~g])
+        tp = len(pos) - np.searchsorted(pos, thresholds, side='left')
+        fp = len(neg) - np.searchsorted(neg, thresholds, side='left')
+        return np.stack([tp, fp, len(neg) - fp, len(pos) - tp], axis=1)
+
+    def _update_pairs(self, w, sums, g):
+        index = np.arange(len(sums))
+        for k, (on, off) in enumerate(self.pairs[w]):
+            event = np.where(sums >= on, 1, np.where(sums <= off, -1, 0))
+            last = np.maximum.accumulate(np.where(event != 0, index, -1))
+            state = np.where(last >= 0, event[np.maximum(last, 0)] == 1, self.pair_state[w][k])
+            self.pair_counts[w][k] += [np.sum(state & g), np.sum(state & ~g),
+                                       np.sum(~state & ~g), np.sum(~state & g)]
+            self.pair_state[w][k] = state[-1]
+
+    def table(self, frame_ms=250):
+        """
+        One row per configuration with accuracy, FPR, FNR and latency
+
+        Latency is approximately half the window, as in the original analysis.
+        """
+        rows = []
+        for w in self.windows:
+            latency = (w - 1) * frame_ms / 2
+            for t, c in zip(self.thresholds[w], self.counts[w]):
+                rows.append(_metrics(c, window=w, on=int(t), off=None, latency_ms=latency))
+            for (on, off), c in zip(self.pairs.get(w, []), self.pair_counts.get(w, [])):
+                rows.append(_metrics(c, window=w, on=on, off=off, latency_ms=latency))
+        return rows
+
+def _metrics(counts, **config):
+    tp, fp, tn, fn = (int(x) for x in counts)
+    total = tp + fp + tn + fn
+    config.update({
+        'frames': total,
+        'accuracy': (tp + tn) / total * 100 if total else 0,
+        'fpr': fp / (fp + tn) * 100 if (fp + tn) > 0 else 0,
+        'fnr': fn / (fn + tp) * 100 if (fn + tp) > 0 else 0,
+    })
+    return config
+
+def pareto_front(rows):
+    """Configurations not beaten on both accuracy and latency by another one"""
+    front, best = [], -1.0
+    for row in sorted(rows, key=lambda r: (r['latency_ms'], -r['accuracy'])):
+        if row['accuracy'] > best:
+            front.append(row)
+            best = row['accuracy']
+    return front
+
+def analyze_voting_windows(log_file, configurations, follow=False, idle_timeout=10, results=None):
     """
     Analyze system-level performance with different voting window configurations
     
     Args:
         log_file: File with raw frame-by-frame classification results
         configurations: List of voting window configurations to test
+        follow: Analyze a capture that is still being written
+        idle_timeout: With follow, stop after this many seconds without new results
+        results: Optional (votes, person_prob, truth) iterator used instead of log_file,
+            e.g. from iter_scored_results
     """
-    # Load raw classification results
-    with open(log_file, 'r') as f:
-        raw_results = json.load(f)
+    sweep = VotingSweep([config['window_size'] for config in configurations])
+    if results is None:
+        results = iter_raw_results(log_file, follow=follow, idle_timeout=idle_timeout)
+    for votes, _, truth in results:
+        sweep.update(votes, truth)
+    rows = {(r['window'], r['on']): r for r in sweep.table() if r['off'] is None}
     
     print("Voting Window Analysis:")
     print("=" * 70)
@@ -26,44 +192,53 @@ def analyze_voting_windows(log_file, configurations):
         window_size = config['window_size']
         threshold_percent = config['threshold_percent']
         threshold = int(window_size * threshold_percent / 100)
+        row = rows[(window_size, threshold)]
         
-        predictions = []
-        ground_truth = []
-        
-        # Sliding window over results
-        detection_window = deque(maxlen=window_size)
-        
-        for i, frame in enumerate(raw_results):
-            # Add current frame result to window
-            detection_window.append(1 if frame['raw_prediction'] == 'person' else 0)
-            
-            # Only make decision when window is full
-            if i >= window_size - 1:
-                # Apply majority voting
-                vote_sum = sum(detection_window)
-                final_prediction = 1 if vote_sum >= threshold else 0
-                predictions.append(final_prediction)
-                ground_truth.append(1 if frame['ground_truth'] == 'person' else 0)
-        
-        # Calculate metrics
-        correct = sum(p == g for p, g in zip(predictions, ground_truth))
-        accuracy = (correct / len(predictions)) * 100 if predictions else 0
-        
-        # Calculate FPR and FNR
-        false_positives = sum(p == 1 and g == 0 for p, g in zip(predictions, ground_truth))
-        false_negatives = sum(p == 0 and g == 1 for p, g in zip(predictions, ground_truth))
-        true_negatives = sum(p == 0 and g == 0 for p, g in zip(predictions, ground_truth))
-        true_positives = sum(p == 1 and g == 1 for p, g in zip(predictions, ground_truth))
-        
-        fpr = (false_positives / (false_positives + true_negatives)) * 100 if (false_positives + true_negatives) > 0 else 0
-        fnr = (false_negatives / (false_negatives + true_positives)) * 100 if (false_negatives + true_positives) > 0 else 0
-        
-        # Latency is approximately half the window size in ms (assuming 4Hz = 250ms per frame)
-        latency_ms = (window_size - 1) * 250 / 2
-        
-        print(f"{window_size:^10}|{threshold_percent:^12}|{accuracy:^16.1f}|{fpr:^10.1f}|{fnr:^10.1f}|{latency_ms:^12.1f}")
+        print(f"{window_size:^10}|{threshold_percent:^12}|{row['accuracy']:^16.1f}|{row['fpr']:^10.1f}|{row['fnr']:^10.1f}|{row['latency_ms']:^12.1f}")
 
-def capture_raw_results(port, baudrate, duration, output_file):
+def sweep_voting_windows(log_file, max_window, weighted=False, hysteresis=False, frame_ms=250, output=None,
+                         follow=False, idle_timeout=10, results=None):
+    """
+    Evaluate every window size and threshold up to max_window and print the
+    accuracy/latency Pareto front
+    
+    Args:
+        log_file: File with raw frame-by-frame classification results
+        max_window: Largest window size in frames
+        weighted: Sum person probabilities from the confidence field instead of 0/1 votes
+        hysteresis: Also evaluate separate on/off thresholds
+        frame_ms: Frame period in milliseconds
+        output: Optional CSV file for the full table
+        follow: Analyze a capture that is still being written
+        idle_timeout: With follow, stop after this many seconds without new results
+        results: Optional (votes, person_prob, truth) iterator used instead of log_file
+    """
+    start = time.perf_counter()
+    sweep = VotingSweep(range(1, max_window + 1), hysteresis)
+    if results is None:
+        results = iter_raw_results(log_file, follow=follow, idle_timeout=idle_timeout)
+    for votes, person_prob, truth in results:
+        sweep.update(person_prob if weighted else votes, truth)
+    rows = sweep.table(frame_ms)
+    elapsed = time.perf_counter() - start
+    
+    print(f"Evaluated {len(rows)} configurations over {sweep.seen} frames in {elapsed:.2f} s")
+    print("Pareto front (accuracy vs latency):")
+    print("=" * 78)
+    print(f"{'Frames':^8}|{'On':^6}|{'Off':^6}|{'Overall Acc (%)':^16}|{'FPR (%)':^10}|{'FNR (%)':^10}|{'Latency (ms)':^14}")
+    print("-" * 78)
+    for row in pareto_front(rows):
+        off = '-' if row['off'] is None else row['off']
+        print(f"{row['window']:^8}|{row['on']:^6}|{off:^6}|{row['accuracy']:^16.1f}|{row['fpr']:^10.1f}|{row['fnr']:^10.1f}|{row['latency_ms']:^14.1f}")
+    
+    if output:
+        with open(output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Full table saved to {output}")
+
+def capture_raw_results(port, baudrate, duration, output_file, append=False, settle=2):
     """
     Capture raw frame-by-frame classification results from device
     
@@ -71,12 +246,14 @@ def capture_raw_results(port, baudrate, duration, output_file):
         port: Serial port connected to Arduino
         baudrate: Baud rate for serial communication
         duration: Test duration in seconds
-        output_file: JSON file to save raw results
+        output_file: NDJSON file the results are written to as they arrive
+        append: Add to an existing output_file instead of starting a new one
+        settle: Seconds to wait after opening the port
     """
     print(f"Capturing raw classification results for {duration} seconds...")
     
     ser = serial.Serial(port, baudrate, timeout=1)
-    time.sleep(2)  # Wait for connection to stabilize
+    time.sleep(settle)  # Wait for connection to stabilize
     
     # Clear buffer
     ser.reset_input_buffer()
@@ -84,44 +261,66 @@ def capture_raw_results(port, baudrate, duration, output_file):
     # Send command to start raw results mode
     ser.write(b'RAW_RESULTS\n')
     
-    results = []
     start_time = time.time()
     
-    while (time.time() - start_time) < duration:
-        line = ser.readline().decode('utf-8').strip()
-        if line.startswith("RESULT:"):
-            # Format: RESULT:raw_prediction,confidence,ground_truth
-            data = line.split(':')[1].split(',')
-            results.append({
-                'raw_prediction': data[0],
-                'confidence': float(data[1]),
-                'ground_truth': data[2]
-            })
+    # One flushed line per result, so a crash keeps everything received so far
+    with NdjsonWriter(output_file, 'a' if append else 'w') as log:
+        while (time.time() - start_time) < duration:
+            line = ser.readline().decode('utf-8').strip()
+            if line.startswith("RESULT:"):
+                # Format: RESULT:raw_prediction,confidence,ground_truth
+                data = line.split(':')[1].split(',')
+                log.write({
+                    'raw_prediction': data[0],
+                    'confidence': float(data[1]),
+                    'ground_truth': data[2]
+                })
     
     ser.close()
     
-    # Save results to file
-    with open(output_file, 'w') as f:
-        json.dump(results, f, indent=2)
-    
-    print(f"Captured {len(results)} raw results and saved to {output_file}")
+    print(f"Captured {log.count} raw results and saved to {output_file}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Analyze majority voting windows")
     parser.add_argument("--port", help="Serial port for capturing raw results")
     parser.add_argument("--baudrate", type=int, default=115200, help="Baud rate")
     parser.add_argument("--duration", type=int, default=300, help="Capture duration in seconds")
-    parser.add_argument("--output", default="raw_results.json", help="Output file for raw results")
+    parser.add_argument("--output", default="raw_results.ndjson", help="NDJSON output file for raw results")
+    parser.add_argument("--append", action="store_true",
+                        help="Add the capture to an existing --output file instead of overwriting it")
     parser.add_argument("--analyze", action="store_true", help="Analyze existing raw results")
     parser.add_argument("--input", help="Input file with raw results for analysis")
+    parser.add_argument("--sweep", action="store_true", help="Sweep all window sizes and thresholds")
+    parser.add_argument("--max-window", type=int, default=16, help="Largest window size for --sweep")
+    parser.add_argument("--weighted", action="store_true", help="Weight votes by classifier confidence")
+    parser.add_argument("--hysteresis", action="store_true", help="Also sweep separate on/off thresholds")
+    parser.add_argument("--frame-ms", type=float, default=250, help="Frame period in milliseconds")
+    parser.add_argument("--sweep-output", help="CSV file for the full sweep table")
+    parser.add_argument("--follow", action="store_true", help="Analyze the input while it is still being captured")
+    parser.add_argument("--idle-timeout", type=float, default=10, help="With --follow, stop after this many idle seconds")
+    parser.add_argument("--model", help="Score recorded frames with this .npz model instead of reading --input")
+    parser.add_argument("--frames", nargs="*", default=[],
+                        help="With --model, dataset CSV files or raw .bin captures as path:label")
+    parser.add_argument("--store", help="With --model, frame store directory to score")
+    parser.add_argument("--int8", action="store_true", help="With --model, use the simulated int8 model")
+    parser.add_argument("--trace", help="Write a Chrome trace of the parse, infer and vote stages to this file")
     
     args = parser.parse_args()
+    if args.trace:
+        tracing.enable(args.trace)
     
     if not args.analyze and args.port:
         # Capture mode
-        capture_raw_results(args.port, args.baudrate, args.duration, args.output)
+        capture_raw_results(args.port, args.baudrate, args.duration, args.output, args.append)
     
-    if args.analyze and args.input:
+    results = None
+    if args.analyze and args.model:
+        results = iter_scored_results(args.model, args.frames, args.int8, args.store)
+    
+    if args.analyze and (args.input or results) and args.sweep:
+        sweep_voting_windows(args.input, args.max_window, args.weighted, args.hysteresis,
+                             args.frame_ms, args.sweep_output, args.follow, args.idle_timeout, results)
+    elif args.analyze and (args.input or results):
         # Analysis mode
         configurations = [
             {'window_size': 2, 'threshold_percent': 50},  # >50% of 2 frames
@@ -130,4 +329,7 @@ if __name__ == "__main__":
             {'window_size': 6, 'threshold_percent': 50},  # >50% of 6 frames
             {'window_size': 8, 'threshold_percent': 50},  # >50% of 8 frames
         ]
-        analyze_voting_windows(args.input, configurations)
+        analyze_voting_windows(args.input, configurations, args.follow, args.idle_timeout, results)
+    
+    if args.trace:
+        print(f"Trace saved to {tracing.save()}")
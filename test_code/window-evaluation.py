@@ -2,8 +2,14 @@ import pandas as pd
 import numpy as np
 import json
 import argparse
+import os
+import sys
 from sklearn.metrics import accuracy_score, confusion_matrix
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_process"))
+
+DEFAULT_CONFIGS = ((250, 250), (500, 500), (250, 125))
+
 def evaluate_window_performance(results_file, ground_truth_file):
     """
     Evaluate model performance with different window sizes and strides
@@ -43,10 +49,177 @@ def evaluate_window_performance(results_file, ground_truth_file):
         
         print(f"{window_ms:^10}|{stride_ms:^10}|{accuracy:^10.1f}|{fpr:^10.1f}|{fnr:^10.1f}|{throughput:^12.1f} Hz")
 
+def capture_ground_truth(ground_truth_file, capture):
+    """
+    Ground truth (1 = person) for every frame of a capture
+    
+    The CSV either has a label column with one row per received packet, in
+    order, or timestamp_ms and label columns listing the label from each
+    device time on, e.g. when a person walked in and out.
+    
+    Args:
+        ground_truth_file: CSV file with ground truth labels
+        capture: frame_protocol.Capture
+    """
+    ground_truth = pd.read_csv(ground_truth_file)
+    labels = ground_truth['label'].to_numpy()
+    if not np.issubdtype(labels.dtype, np.number):
+        labels = labels == 'person'
+    labels = np.asarray(labels, dtype=np.int8)
+    if 'timestamp_ms' in ground_truth:
+        index = np.searchsorted(ground_truth['timestamp_ms'].values, capture.timestamp_ms, side='right') - 1
+        return np.where(index >= 0, labels[np.maximum(index, 0)], 0)
+    return labels[capture.packet]
+
+def window_decisions(person_prob, kinds, window_ms, stride_ms, subpage_ms):
+    """
+    Indices and person decisions of one window/stride configuration
+    
+    Frames are the rolling frames after each subpage. A stride of one
+    subpage classifies all of them; longer strides only use frames completed
+    by subpage 1, like getFrame(), then every (stride / frame period)-th one.
+    The window averages the person probability of the last window / frame
+    period non-overlapping frames.
+    
+    Args:
+        person_prob: Person probability of every frame
+        kinds: Packet kind that completed each frame
+        window_ms: Window length in milliseconds
+        stride_ms: Time between decisions in milliseconds
+        subpage_ms: Subpage period, half the sensor frame period
+    """
+    from frame_protocol import KIND_SUBPAGE0
+    
+    step = max(1, int(round(stride_ms / subpage_ms)))
+    span = max(1, int(round(window_ms / (2 * subpage_ms))))
+    if step == 1:
+        index = np.arange(len(person_prob))
+    else:
+        index = np.flatnonzero(kinds != KIND_SUBPAGE0)[::step // 2]
+    index = index[index >= 2 * (span - 1)]
+    score = np.mean([person_prob[index - 2 * k] for k in range(span)], axis=0)
+    return index, (score > 0.5).astype(np.int8)
+
+def detection_latencies(times, truth, index, decisions):
+    """
+    Time from every empty -> person transition to the first person decision
+    
+    Returns (latencies_ms, missed): transitions with no person decision
+    before the person left count as missed.
+    """
+    onsets = np.flatnonzero(np.diff(truth) == 1) + 1
+    offsets = np.flatnonzero(np.diff(truth) == -1) + 1
+    positive = index[decisions == 1]
+    latencies, missed = [], 0
+    for onset in onsets:
+        end = offsets[offsets > onset][0] if np.any(offsets > onset) else len(truth)
+        hits = positive[(positive >= onset) & (positive < end)]
+        if len(hits):
+            latencies.append(times[hits[0]] - times[onset])
+        else:
+            missed += 1
+    return np.array(latencies), missed
+
+def evaluate_capture(capture_file, ground_truth_file, model_file, int8=False, configs=DEFAULT_CONFIGS,
+                     subpage_ms=None):
+    """
+    Evaluate window sizes and strides on a raw capture from subpage firmware
+    (SUBPAGE_FRAMES 1), classifying the rolling frame with the host model
+    
+    The 250/250 row is what the full-frame firmware does; 250/125 classifies
+    after every subpage. Besides accuracy, FPR and FNR it reports the
+    detection latency after a person appears, and for the subpage stride the
+    accuracy of frames whose halves come from one sensor frame against
+    those mixing two.
+    
+    Args:
+        capture_file: Raw binary serial capture
+        ground_truth_file: CSV file with ground truth labels
+        model_file: .npz model for inference.DenseClassifier
+        int8: Use the simulated int8 model
+        configs: (window_ms, stride_ms) pairs
+        subpage_ms: Subpage period, from the device timestamps by default
+    """
+    from frame_protocol import KIND_SUBPAGE0, read_capture
+    from inference import DenseClassifier
+    
+    capture = read_capture(capture_file)
+    if not len(capture.kind) or np.all(capture.kind == 0):
+        raise ValueError(f"{capture_file} has no subpage packets, record it with SUBPAGE_FRAMES 1")
+    truth = capture_ground_truth(ground_truth_file, capture)
+    model = DenseClassifier.load(model_file)
+    person_prob = model.predict_proba(capture.pixels, int8)[:, model.person_index]
+    if subpage_ms is None:
+        subpage_ms = float(np.median(np.diff(capture.timestamp_ms)))
+    
+    print(f"{len(capture.kind)} frames from subpages, {subpage_ms:.1f} ms per subpage, "
+          f"{int(np.sum(np.diff(truth) == 1))} person arrivals")
+    print(f"{'Window':^10}|{'Stride':^10}|{'Acc (%)':^10}|{'FPR (%)':^10}|{'FNR (%)':^10}|{'Throughput':^12}|"
+          f"{'Latency (ms)':^14}|{'Missed':^8}")
+    print("-" * 90)
+    rows = []
+    for window_ms, stride_ms in configs:
+        index, decisions = window_decisions(person_prob, capture.kind, window_ms, stride_ms, subpage_ms)
+        expected = truth[index]
+        tn, fp, fn, tp = confusion_matrix(expected, decisions, labels=[0, 1]).ravel()
+        latencies, missed = detection_latencies(capture.timestamp_ms, truth, index, decisions)
+        row = {
+            'window_ms': window_ms,
+            'stride_ms': stride_ms,
+            'accuracy': accuracy_score(expected, decisions) * 100,
+            'fpr': fp / (fp + tn) * 100 if (fp + tn) > 0 else 0,
+            'fnr': fn / (fn + tp) * 100 if (fn + tp) > 0 else 0,
+            'latency_ms': float(latencies.mean()) if len(latencies) else float('nan'),
+            'missed': missed,
+        }
+        if stride_ms < 2 * subpage_ms:
+            same = capture.kind[index] != KIND_SUBPAGE0
+            row['accuracy_same_frame'] = float(np.mean(decisions[same] == expected[same]) * 100)
+            row['accuracy_mixed_frames'] = float(np.mean(decisions[~same] == expected[~same]) * 100)
+        rows.append(row)
+        print(f"{window_ms:^10}|{stride_ms:^10}|{row['accuracy']:^10.1f}|{row['fpr']:^10.1f}|{row['fnr']:^10.1f}|"
+              f"{1000 / stride_ms:^9.1f} Hz |{row['latency_ms']:^14.0f}|{missed:^8}")
+    
+    # Full-frame reference: the shortest non-overlapping window of whole frames
+    full = [r for r in rows if r['window_ms'] == r['stride_ms'] and 'accuracy_mixed_frames' not in r]
+    full = min(full, key=lambda r: r['stride_ms']) if full else None
+    for row in rows:
+        if full is None or 'accuracy_mixed_frames' not in row:
+            continue
+        print(f"\nSubpage stride {row['window_ms']:g}/{row['stride_ms']:g} ms vs full frames "
+              f"{full['window_ms']:g}/{full['stride_ms']:g} ms: "
+              f"detection latency {full['latency_ms']:.0f} -> {row['latency_ms']:.0f} ms "
+              f"({full['latency_ms'] - row['latency_ms']:.0f} ms sooner), "
+              f"accuracy {row['accuracy'] - full['accuracy']:+.1f} points")
+        print(f"  Accuracy on frames from one sensor frame {row['accuracy_same_frame']:.1f}%, "
+              f"mixing two frames {row['accuracy_mixed_frames']:.1f}%")
+    return rows
+
+def parse_config(text):
+    window_ms, stride_ms = text.split(':')
+    return float(window_ms), float(stride_ms)
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Evaluate window size and stride performance")
-    parser.add_argument("--results", required=True, help="JSON file with model results")
+    parser.add_argument("--results", help="JSON file with model results")
     parser.add_argument("--ground-truth", required=True, help="CSV file with ground truth labels")
+    parser.add_argument("--capture", help="Raw capture from subpage firmware, scored with --model instead of --results")
+    parser.add_argument("--model", help="With --capture, .npz model file")
+    parser.add_argument("--int8", action="store_true", help="With --capture, use the simulated int8 model")
+    parser.add_argument("--configs", nargs="+", type=parse_config, default=list(DEFAULT_CONFIGS),
+                        help="With --capture, window:stride pairs in milliseconds")
+    parser.add_argument("--subpage-ms", type=float, help="Subpage period (default: from device timestamps)")
+    parser.add_argument("--output", help="With --capture, save the rows as JSON")
     
     args = parser.parse_args()
-    evaluate_window_performance(args.results, args.ground_truth)
+    if args.capture:
+        if not args.model:
+            parser.error("--capture needs --model")
+        rows = evaluate_capture(args.capture, args.ground_truth, args.model, args.int8, args.configs, args.subpage_ms)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(rows, f, indent=2)
+    elif args.results:
+        evaluate_window_performance(args.results, args.ground_truth)
+    else:
+        parser.error("one of --results or --capture is required")
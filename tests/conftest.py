@@ -0,0 +1,19 @@
+import importlib.util
+import os
+import sys
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+test_code = os.path.join(root, "test_code")
+sys.path.insert(0, test_code)
+sys.path.insert(0, os.path.join(root, "data_process"))
+
+
+def load_script(name):
+    """Import a hyphenated test_code script, e.g. "sampling-frequency-test", as a module"""
+    module_name = name.replace("-", "_")
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(test_code, name + ".py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[module_name]
@@ -0,0 +1,44 @@
+import numpy as np
+
+from conftest import load_script
+
+sweep = load_script("architecture-sweep")
+
+rng = np.random.default_rng(18)
+
+
+def test_cost_model_matches_the_deployed_model():
+    cost = sweep.model_cost((20, 10), "int8")
+    assert cost["macs"] == 768 * 20 + 20 * 10 + 10 * 2
+    assert 14 * 1024 < cost["flash_bytes"] < 17 * 1024  # README: 15.4 KB
+    assert 0.8 < cost["time_ms"] < 1.2  # README: 1 ms
+    float_cost = sweep.model_cost((20, 10), "float32")
+    assert float_cost["flash_bytes"] > 3.5 * cost["flash_bytes"] and float_cost["time_ms"] > cost["time_ms"]
+    assert not sweep.model_cost((4096, 4096), "float32")["fits"]
+
+
+def test_pareto_front():
+    rows = [{"accuracy": a, "time_ms": t, "flash_bytes": f, "ram_bytes": 1, "fits": True}
+            for a, t, f in [(0.90, 1, 10), (0.95, 3, 50), (0.94, 6, 100), (0.95, 3, 60), (0.99, 1, 10)]]
+    rows[4]["fits"] = False
+    assert [r["pareto"] for r in sweep.mark_pareto(rows)] == [True, True, False, False, False]
+
+
+def test_sweep_runs_folds_and_reuses_the_cache(tmp_path, capsys):
+    labels = np.where(np.arange(120) % 2 == 0, "person", "empty").astype(object)
+    frames = (22 + rng.normal(0, 0.5, (120, 768))).astype(np.float32)
+    frames[labels == "person", 300:340] += 8
+    options = {"epochs": 10}
+    results = sweep.run_sweep(frames, labels, [(8,), (4, 4)], folds=3, options=options, workers=0,
+                              cache_dir=tmp_path)
+    assert len(results) == 6 and len(list(tmp_path.glob("*.json"))) == 6
+    for result in results:
+        assert sum(result["int8"].values()) == 40
+    rows = sweep.summarize(results)
+    assert {(r["architecture"], r["precision"]) for r in rows} == {
+        ("8", "float32"), ("8", "int8"), ("4->4", "float32"), ("4->4", "int8")}
+    assert all(r["folds"] == 3 and r["accuracy"] > 0.9 for r in rows)
+    again = sweep.run_sweep(frames, labels, [(8,), (4, 4)], folds=3, options=options, workers=0,
+                            cache_dir=tmp_path)
+    assert "6 fold results cached, 0 to run" in capsys.readouterr().out
+    assert sorted(map(str, again)) == sorted(map(str, results))
@@ -0,0 +1,34 @@
+import numpy as np
+
+from csv_frames import count_rows, iter_csv_frames, load_csv_frames
+
+
+def write_log(path):
+    rng = np.random.default_rng(1)
+    frames = np.round(rng.uniform(-5, 35, (6, 768)), 2)
+    rows = [",".join(f"{v:.2f}" for v in f) for f in frames]
+    rows.insert(2, "START_FRAME")                    # row 2: marker
+    rows.insert(4, ",".join(["1.0"] * 767))          # row 4: short row
+    rows.insert(6, ",".join(["nan"] + ["1.0"] * 767))  # row 6: NaN
+    rows.insert(8, ",".join(["abc"] + ["1.0"] * 767))  # row 8: non-numeric
+    path.write_text("\n".join(rows))                  # no trailing newline
+    return frames
+
+
+def test_load_keeps_negative_and_reports_rejected(tmp_path):
+    path = tmp_path / "log.csv"
+    frames = write_log(path)
+    assert count_rows(str(path)) == 10
+    loaded, rejected = load_csv_frames(str(path), chunk_rows=3)
+    assert loaded.shape == (6, 24, 32)
+    assert loaded.min() < 0
+    assert np.allclose(loaded.reshape(6, 768), frames, atol=1e-5)
+    assert list(rejected) == [2, 4, 6, 8]
+
+
+def test_batches_cover_file(tmp_path):
+    path = tmp_path / "log.csv"
+    write_log(path)
+    batches = list(iter_csv_frames(str(path), batch_size=4))
+    assert [len(b) for b, _ in batches] == [3, 2, 1]
+    assert [list(r) for _, r in batches] == [[2], [4, 6], [8]]
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+from delta_codec import DeltaReader, DeltaWriter, benchmark
+
+rng = np.random.default_rng(21)
+
+
+def frames(n):
+    drift = np.cumsum(rng.normal(0, 0.05, (n, 1, 1)), axis=0)
+    return np.round(22 + drift + rng.normal(0, 0.2, (n, 24, 32)), 2).astype(np.float32)
+
+
+@pytest.mark.parametrize("compressor,reference", [("zlib", "previous"), ("lzma", "keyframe"), ("bz2", "previous")])
+def test_roundtrip_is_exact_for_centi_degrees(tmp_path, compressor, reference):
+    data = frames(300)
+    data[7, 3, 4] = np.nan
+    data[8] = -40.0  # large jumps wrap around in int16 deltas
+    data[9] = 300.0
+    path = tmp_path / "a.tdc"
+    with DeltaWriter(path, chunk_frames=64, compressor=compressor, reference=reference) as writer:
+        writer.write(data[:10])
+        writer.write(data[10:250])
+        writer.write(data[250:])
+    with DeltaReader(path) as reader:
+        decoded = reader.read()
+        assert len(reader) == 300 and len(reader.index) == 5
+    assert np.isnan(decoded[7, 3, 4])
+    mask = ~np.isnan(data)
+    assert np.abs(decoded[mask] - data[mask]).max() < 1e-4
+
+
+def test_range_reads_only_decode_overlapping_chunks(tmp_path):
+    data = frames(1000)
+    path = tmp_path / "a.tdc"
+    with DeltaWriter(path, chunk_frames=100) as writer:
+        writer.write(data)
+    with DeltaReader(path) as reader:
+        assert np.allclose(reader.read(450, 460), data[450:460], atol=1e-4)
+        assert reader.chunks_decoded == 1
+        assert np.allclose(reader.read(195, 305), data[195:305], atol=1e-4)
+        assert reader.chunks_decoded == 4
+        assert len(reader.read(990, 5000)) == 10 and len(reader.read(20, 20)) == 0
+    assert os.path.getsize(path) < data.nbytes / 2
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "bad.tdc"
+    path.write_bytes(b"not an archive" * 10)
+    with pytest.raises(ValueError):
+        DeltaReader(path)
+
+
+def test_benchmark_reports_lossless_ratio(tmp_path):
+    path = tmp_path / "data.csv"
+    np.savetxt(path, frames(50).reshape(50, -1), fmt="%.2f", delimiter=",")
+    rows = benchmark([str(path)], chunk_frames=16, settings=[("zlib", 6, "previous")])
+    assert rows[0]["frames"] == 50 and rows[0]["max_error"] < 1e-4 and rows[0]["ratio_csv"] > 2
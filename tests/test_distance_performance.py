@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+
+from conftest import load_script
+from firmware_sim import FirmwareSimulator
+
+dpt = load_script("distance-performance-test")
+
+
+def boards(count, accuracy=0.8, mode="IDLE"):
+    sims = []
+    for seed in range(count):
+        sim = FirmwareSimulator(np.zeros((50, 24, 32)), rate=4, time_scale=100, accuracy=accuracy, seed=seed)
+        sim.mode = mode
+        sim.start()
+        sims.append(sim)
+    return sims
+
+
+def test_wilson_interval():
+    assert dpt.wilson_interval(0, 0) == (0.0, 1.0)
+    low, high = dpt.wilson_interval(16, 20)
+    assert 0.55 < low < 0.6 and 0.91 < high < 0.93
+    low, high = dpt.wilson_interval(20, 20)
+    assert high == 1.0 and low > 0.8
+    assert dpt.parse_board("left=/dev/ttyACM0") == ("left", "/dev/ttyACM0")
+    assert dpt.parse_board("COM6") == ("COM6", "COM6")
+
+
+def test_parallel_boards_checkpoint_and_resume(tmp_path):
+    output = str(tmp_path / "distance.ndjson")
+    sims = boards(2)
+    ports = [f"b{i}={sim.port}" for i, sim in enumerate(sims)]
+    prompts = []
+    try:
+        results = dpt.test_distance_performance(ports, 115200, [1, 2], 30, output, settle=0, wait=prompts.append)
+        resumed = dpt.test_distance_performance(ports, 115200, [1, 2, 3], 30, output, settle=0, wait=prompts.append)
+    finally:
+        for sim in sims:
+            sim.stop()
+    assert len(prompts) == 3  # distances 1 and 2 were not asked again
+    assert set(results) == {"b0", "b1"} and set(resumed["b0"]) == {"3.0"}
+    for board in ("b0", "b1"):
+        for summary in results[board].values():
+            assert summary["samples"] == 30 and summary["stopped_on"] == "samples"
+            assert summary["ci_low"] <= summary["detection_rate"] <= summary["ci_high"]
+    saved = dpt.load_board_results(output)
+    assert set(saved) == {"b0", "b1"} and set(saved["b1"]) == {"1.0", "2.0", "3.0"}
+    assert dpt.load_distance_results(output, "b1")["2.0"] == results["b1"]["2.0"]
+
+
+def test_early_stop_and_attribution(tmp_path):
+    output = str(tmp_path / "distance.ndjson")
+    # Already streaming while the subject is positioned
+    sims = boards(1, accuracy=1.0, mode="DISTANCE_TEST")
+    try:
+        results = dpt.test_distance_performance([sims[0].port], 115200, [1.5], 200, output, max_ci_width=0.3,
+                                                min_samples=10, settle=0, wait=lambda prompt: time.sleep(0.3))
+    finally:
+        sims[0].stop()
+    summary = results[sims[0].port]["1.5"]
+    assert summary["stopped_on"] == "interval" and 10 <= summary["samples"] < 20
+    assert summary["detection_rate"] == 100.0
+    detections = [r for r in dpt.iter_records(output) if r["type"] == "detection"]
+    assert len(detections) == summary["samples"]
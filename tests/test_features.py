@@ -0,0 +1,87 @@
+import numpy as np
+
+from features import FEATURE_NAMES, FeatureParams, blob_stats, cached_features, extract_features, label_components
+
+rng = np.random.default_rng(16)
+
+
+def flood_fill_count(mask):
+    """Reference 4-connected component count of one frame"""
+    seen = np.zeros_like(mask)
+    count = 0
+    for start in zip(*np.nonzero(mask)):
+        if seen[start]:
+            continue
+        count += 1
+        stack = [start]
+        seen[start] = True
+        while stack:
+            r, c = stack.pop()
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if 0 <= nr < 24 and 0 <= nc < 32 and mask[nr, nc] and not seen[nr, nc]:
+                    seen[nr, nc] = True
+                    stack.append((nr, nc))
+    return count
+
+
+def frames(n):
+    data = (22 + rng.normal(0, 0.2, (n, 24, 32))).astype(np.float32)
+    data[:, 8:16, 10:14] += 6  # 32 pixel person
+    data[::2, 2:4, 25:28] += 5  # 6 pixel second blob on even frames
+    return data
+
+
+def test_components_match_flood_fill():
+    masks = rng.random((200, 24, 32)) < 0.45
+    masks[0] = False
+    masks[1, :, 5] = True
+    masks[2] = np.ones((24, 32), bool)
+    labels = label_components(masks)
+    assert np.array_equal(labels > 0, masks)
+    counts = blob_stats(labels)[:, 0]
+    assert counts.tolist() == [flood_fill_count(m) for m in masks]
+
+
+def test_nested_rings_converge():
+    mask = np.zeros((1, 24, 32), bool)
+    top, bottom, left, right = 0, 23, 0, 31
+    while top <= bottom and left <= right:
+        mask[0, top, left:right + 1] = True
+        mask[0, top:bottom + 1, right] = True
+        mask[0, bottom, left:right + 1] = True
+        mask[0, top + 2:bottom + 1, left] = True
+        top, bottom, left, right = top + 4, bottom - 4, left + 4, right - 4
+    assert blob_stats(label_components(mask))[0, 0] == flood_fill_count(mask[0])
+
+
+def test_blob_stats_of_two_blobs():
+    mask = np.zeros((2, 24, 32), bool)
+    mask[0, 8:16, 10:14] = True
+    mask[0, 2:4, 25:28] = True
+    count, area, row, col = blob_stats(label_components(mask))[0]
+    assert (count, area, row, col) == (2, 32, 11.5, 11.5)
+    assert blob_stats(label_components(mask))[1].tolist() == [0, 0, -1, -1]
+
+
+def test_features_and_motion_across_batches():
+    data = frames(20)
+    whole = extract_features(data)
+    assert whole.shape == (20, len(FEATURE_NAMES))
+    assert whole[:, FEATURE_NAMES.index("blobs")].tolist() == [2, 1] * 10
+    assert np.all(whole[:, FEATURE_NAMES.index("blob_area")] == 32)
+    assert whole[0, -1] == 0
+    split = np.concatenate([extract_features(data[:7]), extract_features(data[7:], previous=data[6])])
+    assert np.allclose(split, whole)
+
+
+def test_cache_hits_and_keys(tmp_path):
+    data = frames(10)
+    first, hit = cached_features(data, tmp_path)
+    assert not hit
+    again, hit = cached_features(data, tmp_path)
+    assert hit and np.array_equal(first, again)
+    _, hit = cached_features(data, tmp_path, FeatureParams(hot_sigma=3.0))
+    assert not hit
+    _, hit = cached_features(data, tmp_path, previous=data[0])
+    assert not hit
+    assert len(list(tmp_path.glob("*.npy"))) == 3
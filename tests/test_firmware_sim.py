@@ -0,0 +1,102 @@
+import time
+
+import numpy as np
+import serial
+
+from firmware_sim import FirmwareSimulator
+from frame_protocol import (KIND_SUBPAGE0, AsciiFrameDecoder, FrameDecoder, SubpageMerger, encode_ascii_frame,
+                            packet_size)
+
+rng = np.random.default_rng(11)
+frames = np.round(rng.normal(25, 2, (10, 24, 32)), 2).astype(np.float32)
+labels = np.array(["person"] * 5 + ["empty"] * 5)
+
+
+def read_until(ser, done, timeout=5):
+    # Stop on content rather than elapsed time so a loaded machine only makes the test slower
+    data, end = b"", time.monotonic() + timeout
+    while not done(data) and time.monotonic() < end:
+        data += ser.read(ser.in_waiting or 1)
+    return data
+
+
+def read_bytes(ser, size):
+    return read_until(ser, lambda data: len(data) >= size)
+
+
+def read_lines(ser, prefix, count):
+    return read_until(ser, lambda data: data.count(b"\n" + prefix) > count).decode(errors="replace").split("\r\n")
+
+
+def test_binary_stream_decodes_to_source_frames():
+    sim = FirmwareSimulator(frames, labels, rate=200, seed=1)
+    sim.start()
+    try:
+        with serial.Serial(sim.port, 115200, timeout=0.05) as ser:
+            decoded = list(FrameDecoder().feed(read_bytes(ser, 11 * packet_size())))
+    finally:
+        sim.stop()
+    assert len(decoded) >= 10
+    for frame in decoded:
+        assert np.allclose(frame.pixels.reshape(24, 32), frames[frame.seq % 10], atol=0.006)
+    assert np.all(np.diff([f.timestamp_ms for f in decoded]) == 5)
+
+
+def test_subpage_stream_merges_twice_per_frame():
+    sim = FirmwareSimulator(frames, labels, rate=100, frame_format="subpage", seed=1)
+    sim.start()
+    try:
+        with serial.Serial(sim.port, 115200, timeout=0.05) as ser:
+            merged = SubpageMerger().merge(FrameDecoder().feed(read_bytes(ser, 21 * packet_size(KIND_SUBPAGE0))))
+    finally:
+        sim.stop()
+    assert len(merged) >= 20
+    assert np.all(np.diff([f.timestamp_ms for f in merged]) == 5)
+    for frame in merged:
+        if frame.seq % 2:  # both halves from the same frame
+            assert np.allclose(frame.pixels.reshape(24, 32), frames[frame.seq // 2 % 10], atol=0.006)
+
+
+def test_dropped_and_corrupted_packets_are_detected():
+    sim = FirmwareSimulator(frames, labels, rate=300, drop=0.2, corrupt=0.2, seed=2)
+    sim.start()
+    try:
+        with serial.Serial(sim.port, 115200, timeout=0.05) as ser:
+            decoder = FrameDecoder()
+            decoded = list(decoder.feed(read_bytes(ser, 60 * packet_size())))
+    finally:
+        sim.stop()
+    assert sim.sent["dropped"] > 0 and sim.sent["corrupted"] > 0
+    assert decoder.dropped > 0 and decoder.corrupted > 0
+    for frame in decoded:
+        assert np.allclose(frame.pixels.reshape(24, 32), frames[frame.seq % 10], atol=0.006)
+
+
+def test_ascii_stream_decodes():
+    sim = FirmwareSimulator(frames, labels, rate=200, frame_format="ascii", seed=4)
+    sim.start()
+    try:
+        with serial.Serial(sim.port, 115200, timeout=0.05) as ser:
+            decoded = list(AsciiFrameDecoder().feed(read_bytes(ser, 11 * len(encode_ascii_frame(frames[0])))))
+    finally:
+        sim.stop()
+    assert len(decoded) >= 10
+    assert all(any(np.allclose(f.pixels.reshape(24, 32), src, atol=0.006) for src in frames) for f in decoded)
+
+
+def test_commands_switch_to_text_lines():
+    sim = FirmwareSimulator(frames, labels, rate=400, time_scale=1, seed=3)
+    sim.start()
+    try:
+        with serial.Serial(sim.port, 115200, timeout=0.05) as ser:
+            ser.write(b"RAW_RESULTS\n")
+            lines = read_lines(ser, b"RESULT:", 5)[:-1]
+            ser.write(b"TEST_MODE\n")
+            timing = read_lines(ser, b"FRAME_TIME:", 2)[:-1]
+    finally:
+        sim.stop()
+    results = [line.split(":")[1].split(",") for line in lines if line.startswith("RESULT:")]
+    assert results and all(r[0] in ("person", "empty") and r[2] in ("person", "empty") for r in results)
+    frame_times = [line for line in timing if line.startswith("FRAME_TIME:")]
+    capture, process, total = map(float, frame_times[0].split(":")[1].split(","))
+    assert abs(capture + process - total) < 0.02
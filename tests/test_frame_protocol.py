@@ -0,0 +1,124 @@
+import numpy as np
+
+from frame_protocol import (KIND_FRAME, KIND_SUBPAGE0, KIND_SUBPAGE1, AsciiFrameDecoder, FrameDecoder, SubpageMerger,
+                            encode_ascii_frame, encode_frame, encode_subpage, num_pixels, packet_size, read_capture)
+
+rng = np.random.default_rng(0)
+
+
+def make_frames(n):
+    return [np.round(rng.uniform(-10, 40, num_pixels), 2) for _ in range(n)]
+
+
+def decode(stream, chunk):
+    decoder = FrameDecoder()
+    frames = []
+    for i in range(0, len(stream), chunk):
+        frames += decoder.feed(stream[i:i + chunk])
+    return decoder, frames
+
+
+def test_round_trip_any_chunk_size():
+    frames = make_frames(5)
+    stream = b"".join(encode_frame(f, i, 250 * i) for i, f in enumerate(frames))
+    assert len(stream) == 5 * packet_size()
+    for chunk in (1, 7, 1000, len(stream)):
+        decoder, out = decode(stream, chunk)
+        assert [f.seq for f in out] == list(range(5))
+        assert out[2].timestamp_ms == 500
+        assert np.allclose(out[3].pixels, frames[3], atol=0.006)
+        assert decoder.stats() == {"frames": 5, "dropped": 0, "corrupted": 0, "skipped_bytes": 0}
+        assert len(decoder.buffer) == 0
+
+
+def test_crc_rejects_corruption_and_resyncs():
+    packets = [encode_frame(f, i, i) for i, f in enumerate(make_frames(4))]
+    bad = bytearray(packets[1])
+    bad[100] ^= 0xFF
+    stream = b"boot text\r\n" + packets[0] + bytes(bad) + packets[2] + packets[3]
+    decoder, out = decode(stream, 64)
+    assert [f.seq for f in out] == [0, 2, 3]
+    assert decoder.corrupted == 1
+    assert decoder.dropped == 1
+
+
+def test_trailing_sync_byte_at_packet_end():
+    # A packet whose CRC high byte equals the first sync byte must not leave
+    # that byte behind or make skipped_bytes negative
+    for timestamp in range(5000):
+        packet = encode_frame(np.zeros(num_pixels), 3, timestamp)
+        if packet[-1:] == b"\xA5":
+            break
+    assert packet[-1:] == b"\xA5"
+    decoder = FrameDecoder()
+    assert len(decoder.feed(packet)) == 1
+    assert decoder.skipped_bytes == 0
+    assert len(decoder.buffer) == 0
+
+
+def test_sequence_wraparound():
+    stream = b"".join(encode_frame(np.zeros(num_pixels), seq, 0) for seq in (65534, 65535, 0, 2))
+    decoder, out = decode(stream, 500)
+    assert [f.seq for f in out] == [65534, 65535, 0, 2]
+    assert decoder.dropped == 1
+
+
+def test_ascii_markers_realign_after_garbled_line():
+    frames = make_frames(4)
+    lines = b"".join(encode_ascii_frame(f) for f in frames).split(b"\n")
+    del lines[26 + 5]  # drop one data line of the second frame
+    stream = b"Initializing...\r\n" + b"\n".join(lines)
+    decoder = AsciiFrameDecoder()
+    out = []
+    for i in range(0, len(stream), 333):
+        out += decoder.feed(stream[i:i + 333])
+    assert len(out) == 3
+    assert np.allclose(out[1].pixels, frames[2], atol=0.006)
+    assert decoder.stats() == {"frames": 3, "rejected": 1, "skipped_lines": 1}
+
+
+def test_ascii_rejects_non_numeric_and_missing_end_marker():
+    good, bad = make_frames(2)
+    garbled = encode_ascii_frame(bad).replace(b"START_FRAME\r\n", b"START_FRAME\r\nx,", 1)
+    truncated = encode_ascii_frame(bad).split(b"END_FRAME")[0]
+    decoder = AsciiFrameDecoder()
+    out = decoder.feed(garbled + truncated + encode_ascii_frame(good))
+    assert len(out) == 1
+    assert np.allclose(out[0].pixels, good, atol=0.006)
+    assert decoder.rejected == 2
+
+
+def test_subpages_are_the_chess_pattern():
+    frame = np.arange(num_pixels) / 100
+    _, (even, odd) = decode(encode_subpage(frame, 0, 0, 0) + encode_subpage(frame, 1, 1, 125), 64)
+    assert (even.kind, odd.kind) == (KIND_SUBPAGE0, KIND_SUBPAGE1)
+    assert len(even.pixels) == len(odd.pixels) == 384 and packet_size(KIND_SUBPAGE0) == 779
+    rows, cols = np.divmod(np.round(even.pixels * 100).astype(int), 32)
+    assert np.all((rows + cols) % 2 == 0) and np.all(np.diff(even.pixels) > 0)
+
+
+def test_merger_rolls_halves_and_passes_full_frames():
+    a, b = make_frames(2)
+    merger = SubpageMerger()
+    _, packets = decode(encode_subpage(a, 1, 0, 0) + encode_subpage(b, 0, 1, 125) + encode_subpage(b, 1, 2, 250)
+                        + encode_frame(a, 3, 375) + encode_subpage(b, 0, 4, 500), 100)
+    merged = merger.merge(packets)
+    assert [f.seq for f in merged] == [1, 2, 3, 4]
+    mixed = np.where((np.arange(num_pixels) // 32 + np.arange(num_pixels) % 32) % 2, a, b)
+    assert np.allclose(merged[0].pixels, mixed, atol=0.006)  # halves of two frames
+    assert np.allclose(merged[1].pixels, b, atol=0.006) and merged[1].timestamp_ms == 250
+    assert merged[2].kind == KIND_FRAME and np.allclose(merged[2].pixels, a, atol=0.006)
+    assert np.allclose(merged[3].pixels, np.where(mixed == a, a, b), atol=0.006)
+    assert (merger.subpages, merger.merged) == (4, 3)
+
+
+def test_read_capture_lines_up_packets(tmp_path):
+    frames = make_frames(3)
+    stream = b"boot\r\n" + b"".join(encode_subpage(frames[i // 2], i % 2, i, 125 * i) for i in range(6))
+    path = tmp_path / "capture.bin"
+    path.write_bytes(stream)
+    capture = read_capture(path, chunk_size=500)
+    assert capture.packet.tolist() == [1, 2, 3, 4, 5]
+    assert capture.seq.tolist() == [1, 2, 3, 4, 5] and capture.timestamp_ms[-1] == 625
+    assert capture.pixels.shape == (5, num_pixels)
+    assert np.allclose(capture.pixels[-1], frames[2], atol=0.006)
@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+
+from frame_store import FrameStore, convert_csv
+
+
+def test_append_while_reader_is_open(tmp_path):
+    writer = FrameStore(str(tmp_path), mode="a")
+    reader = FrameStore(str(tmp_path))
+    assert len(reader) == 0
+
+    first = np.arange(2 * 768, dtype=np.float32).reshape(2, 768)
+    writer.append(first, "person", session=7, timestamps=[1.0, 2.0], sensor=3)
+    writer.append(np.zeros((3, 24, 32)), "empty", session=8)
+    assert len(reader) == 0
+    reader.refresh()
+    assert len(reader) == 5
+    assert reader.frames.shape == (5, 24, 32)
+    assert np.array_equal(reader[1].ravel(), first[1])
+    assert list(reader.select(label="person")) == [0, 1]
+    assert list(reader.select(session=8)) == [2, 3, 4]
+    assert reader.index["sensor"][0] == 3
+    assert reader.index["timestamp"][1] == 2.0
+    assert np.isnan(reader.index["timestamp"][4])
+
+
+def test_append_after_an_interrupted_append(tmp_path):
+    store = FrameStore(str(tmp_path), mode="a")
+    first = np.full((2, 768), 21.0)
+    store.append(first, "person", session=1)
+    # An append killed after part of its frames (and index record) was written
+    with open(tmp_path / "frames.bin", "ab") as f:
+        f.write(b"\x00" * 1000)
+    with open(tmp_path / "index.bin", "ab") as f:
+        f.write(b"\x01" * 5)
+    store = FrameStore(str(tmp_path), mode="a")
+    assert len(store) == 2
+    store.append(np.full((3, 24, 32), 30.0), "empty", session=2)
+    reader = FrameStore(str(tmp_path))
+    assert len(reader) == 5 and os.path.getsize(tmp_path / "frames.bin") == 5 * 768 * 4
+    assert np.all(reader.frames[:2] == 21.0) and np.all(reader.frames[2:] == 30.0)
+    assert list(reader.select(label="empty", session=2)) == [2, 3, 4]
+
+
+def test_convert_csv_skips_bad_rows(tmp_path):
+    csv_file = tmp_path / "data.csv"
+    good = ",".join(["-1.50"] * 768)
+    csv_file.write_text("\n".join([good, "START_FRAME", ",".join(["x"] * 768), good]) + "\n")
+    store = FrameStore(str(tmp_path / "store"), mode="a")
+    assert convert_csv(str(csv_file), store, "empty") == 2
+    assert np.all(store.frames == -1.5)
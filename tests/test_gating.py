@@ -0,0 +1,49 @@
+import numpy as np
+
+from gating import ChangeGate, evaluate_gating
+from inference import DenseClassifier
+
+rng = np.random.default_rng(4)
+
+
+def test_scores_match_sequential_ema_across_blocks_and_calls():
+    frames = rng.normal(25, 1, (150, 24, 32)).astype(np.float32)
+    gate = ChangeGate(alpha=0.2, block=16)
+    scores = np.concatenate([gate.scores(frames[:70]), gate.scores(frames[70:])])
+
+    background = frames[0].reshape(-1).astype(np.float64)
+    expected = []
+    for frame in frames.reshape(len(frames), -1):
+        expected.append(np.abs(frame - background).mean())
+        background += 0.2 * (frame - background)
+    assert np.isinf(scores[0])
+    assert np.allclose(scores[1:], expected[1:], atol=1e-4)
+    assert np.allclose(gate.background, background, atol=1e-4)
+    assert abs(gate.ambient() - background.mean()) < 1e-4
+
+
+def test_static_scene_is_skipped_up_to_max_skip():
+    frames = np.full((20, 24, 32), 22.0, dtype=np.float32)
+    frames[12:] += 3  # someone walks in
+    calls = []
+
+    def classify(batch):
+        calls.append(len(batch))
+        return (batch.mean(axis=(1, 2)) > 23).astype(np.int64)
+
+    gate = ChangeGate(alpha=0.1, threshold=0.5, max_skip=4)
+    decisions, run = gate.apply(frames, classify)
+    assert np.flatnonzero(run).tolist() == [0, 5, 10] + list(range(12, 20))
+    assert decisions[:12].tolist() == [0] * 12 and decisions[12:].all()
+    assert sum(calls) == run.sum()
+
+
+def test_zero_threshold_does_not_change_accuracy():
+    sizes = [768, 20, 10, 2]
+    model = DenseClassifier([(rng.normal(0, 0.05, (a, b)), np.zeros(b)) for a, b in zip(sizes, sizes[1:])])
+    frames = rng.normal(25, 2, (300, 24, 32)).astype(np.float32)
+    truth = np.where(np.arange(300) < 150, "person", "empty").astype(object)
+    rows, base = evaluate_gating(model, [(frames[:100], truth[:100]), (frames[100:], truth[100:])], [0.0, 1e9],
+                                 max_skip=9)
+    assert rows[0]["skipped"] == 0 and rows[0]["delta"] == 0
+    assert abs(rows[1]["skipped"] - 90) < 1e-9
@@ -0,0 +1,69 @@
+import numpy as np
+
+from inference import (DenseClassifier, agreement, iter_labelled_batches, multiply_by_quantized_multiplier,
+                       quantize_multiplier)
+
+rng = np.random.default_rng(9)
+
+
+def make_model():
+    sizes = [768, 20, 10, 2]
+    weights = [(rng.normal(0, 1 / np.sqrt(a), (a, b)), rng.normal(0, 0.1, b)) for a, b in zip(sizes, sizes[1:])]
+    return DenseClassifier(weights, mean=25.0, std=3.0)
+
+
+def frames(n):
+    return rng.normal(25, 3, (n, 24, 32)).astype(np.float32)
+
+
+def test_float_matches_reference_forward_pass():
+    model = make_model()
+    x = frames(5)
+    h = (x.reshape(5, -1) - 25.0) / 3.0
+    for i, (w, b) in enumerate(model.weights):
+        h = h @ w + b
+        h = np.maximum(h, 0) if i < 2 else h
+    expected = np.exp(h) / np.exp(h).sum(axis=1, keepdims=True)
+    assert np.allclose(model.predict_proba(x), expected, atol=1e-5)
+    index, confidence = model.predict(x)
+    assert np.array_equal(index, expected.argmax(axis=1))
+    assert np.allclose(confidence, expected.max(axis=1), atol=1e-5)
+
+
+def test_fixed_point_requantization_rounds_like_float():
+    acc = rng.integers(-2 ** 20, 2 ** 20, 1000)
+    for multiplier in (0.0003, 0.0127, 0.5, 0.93):
+        q_fixed, shift = quantize_multiplier(multiplier)
+        out = multiply_by_quantized_multiplier(acc, q_fixed, shift)
+        assert np.abs(out - np.round(acc * multiplier)).max() <= 1
+
+
+def test_int8_agrees_with_float():
+    model = make_model()
+    model.quantize(frames(500))
+    x = frames(2000)
+    float_logits, int8_logits = model.logits(x), model.int8_logits(x)
+    # Unbiased quantization noise, a few output steps on average
+    assert np.abs(int8_logits - float_logits).mean() < 3 * model.quant["out2_scale"]
+    assert abs((int8_logits - float_logits).mean()) < model.quant["out2_scale"]
+    assert np.mean(model.predict(x)[0] == model.predict(x, int8=True)[0]) > 0.95
+
+
+def test_save_load_roundtrip(tmp_path):
+    model = make_model()
+    model.quantize(frames(100))
+    model.save(tmp_path / "model.npz")
+    loaded = DenseClassifier.load(tmp_path / "model.npz")
+    x = frames(50)
+    assert loaded.labels == ("person", "empty") and loaded.person_index == 0
+    assert np.array_equal(loaded.predict_proba(x), model.predict_proba(x))
+    assert np.array_equal(loaded.int8_logits(x), model.int8_logits(x))
+
+
+def test_labelled_batches_from_csv(tmp_path):
+    path = tmp_path / "data_person.csv"
+    np.savetxt(path, frames(7).reshape(7, -1), delimiter=",", fmt="%.2f")
+    batches = list(iter_labelled_batches([f"{path}:person"], batch_size=3))
+    assert [len(f) for f, _ in batches] == [3, 3, 1]
+    assert all((labels == "person").all() for _, labels in batches)
+    assert agreement(np.array(["person", "empty"]), ["person", "person", "empty"]) == 0.5
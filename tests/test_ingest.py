@@ -0,0 +1,75 @@
+import io
+import time
+
+import numpy as np
+
+from frame_protocol import FrameDecoder, encode_frame, encode_subpage, num_pixels
+from ingest import FrameRing, SerialReader, csv_sink, write_batches
+
+
+class FakeSerial:
+    def __init__(self, data, chunk=100):
+        self.data = data
+        self.pos = 0
+        self.chunk = chunk
+
+    @property
+    def in_waiting(self):
+        return min(self.chunk, len(self.data) - self.pos)
+
+    def read(self, n):
+        if self.pos >= len(self.data):
+            time.sleep(0.01)
+            return b""
+        out = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return out
+
+
+def test_ring_wraps_and_counts_overruns():
+    ring = FrameRing(4)
+    for i in range(6):
+        ring.put(np.full(num_pixels, i), i, 0.0)
+    assert ring.stats() == {"queued": 4, "high_water": 4, "overruns": 2}
+    frames, seqs, _ = ring.get_batch(3)
+    assert list(seqs) == [2, 3, 4]
+    assert frames[0, 0] == 2
+    ring.clear()
+    assert ring.stats() == {"queued": 0, "high_water": 0, "overruns": 0}
+
+
+def test_reader_and_writer_per_run_counts():
+    frames = [np.round(np.random.default_rng(i).uniform(15, 35, num_pixels), 2) for i in range(30)]
+    stream = b"".join(encode_frame(f, i, 0) for i, f in enumerate(frames))
+    reader = SerialReader(FakeSerial(stream), FrameDecoder(), FrameRing(64))
+    reader.start()
+    out = io.StringIO()
+    counts = list(write_batches(reader, csv_sink(out), 10, batch_size=4))
+    assert counts[-1] == 10
+    assert all(0 < b - a <= 4 for a, b in zip([0] + counts, counts))
+    rows = np.loadtxt(io.StringIO(out.getvalue()), delimiter=",")
+    assert np.allclose(rows[0], frames[0], atol=0.006)
+
+    while reader.stats()["received"] < 30:
+        time.sleep(0.01)
+    reader.reset()
+    stats = reader.stats()
+    reader.stop()
+    assert stats["received"] == 0
+    assert stats["high_water"] == 0
+
+
+def test_reader_merges_subpages_and_captures_raw_bytes():
+    frames = [np.round(np.random.default_rng(i).uniform(15, 35, num_pixels), 2) for i in range(4)]
+    stream = b"".join(encode_subpage(frames[i // 2], i % 2, i, 125 * i) for i in range(8))
+    capture = io.BytesIO()
+    reader = SerialReader(FakeSerial(stream), FrameDecoder(), FrameRing(64), capture)
+    reader.start()
+    batches = []
+    for _ in write_batches(reader, lambda frames, host_times: batches.append(frames), 7):
+        pass
+    reader.stop()
+    rows = np.concatenate(batches)
+    assert len(rows) == 7 and reader.stats()["received"] == 8
+    assert np.allclose(rows[0], frames[0], atol=0.006) and np.allclose(rows[-1], frames[3], atol=0.006)
+    assert capture.getvalue() == stream
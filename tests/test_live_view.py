@@ -0,0 +1,28 @@
+import time
+
+import numpy as np
+
+from live_view import LatestFrame, replay_source
+
+
+def test_latest_frame_keeps_only_newest():
+    latest = LatestFrame()
+    out = np.empty((24, 32), dtype=np.float32)
+    assert latest.read_into(out) is None
+    for value in range(3):
+        latest.publish(np.full(768, value))
+    assert latest.read_into(out) is not None
+    assert np.all(out == 2)
+    assert latest.stale == 2
+    assert latest.read_into(out) is None
+    latest.publish(np.full(768, 5))
+    assert latest.read_into(out) is not None and np.all(out == 5)
+    assert latest.stale == 2
+
+
+def test_replay_source_batches_and_rate():
+    batches = lambda: iter([np.zeros((2, 24, 32)), np.ones((1, 24, 32))])
+    assert [f.mean() for f in replay_source(batches)] == [0, 0, 1]
+    start = time.perf_counter()
+    assert len(list(replay_source(np.zeros((5, 24, 32)), rate=100))) == 5
+    assert time.perf_counter() - start >= 0.04
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import threading
+import time
+import tty
+
+import numpy as np
+
+from frame_protocol import encode_frame
+from frame_store import FrameStore
+from multi_collect import MultiCollector, SensorSpec, parse_sensor
+
+
+async def start_sensor(value, rate, close_after=None):
+    """TCP stand-in streaming frames filled with value; drops the connection after close_after frames"""
+    async def handle(reader, writer):
+        seq = 0
+        try:
+            while close_after is None or seq < close_after:
+                writer.write(encode_frame(np.full(768, value + seq % 2), seq, 1000 * seq / rate))
+                await writer.drain()
+                seq += 1
+                await asyncio.sleep(1 / rate)
+        except ConnectionError:
+            pass
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"tcp://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+def test_parse_sensor():
+    assert parse_sensor("3=tcp://host:9000") == SensorSpec(3, "tcp://host:9000")
+    assert parse_sensor("12=/dev/ttyACM0@230400") == SensorSpec(12, "/dev/ttyACM0@230400")
+
+
+def test_many_sensors_share_one_batched_writer(tmp_path):
+    async def main():
+        servers = [await start_sensor(20 + i, rate=50) for i in range(12)]
+        store = FrameStore(str(tmp_path / "store"), mode="a")
+        collector = MultiCollector([SensorSpec(i, address) for i, (_, address) in enumerate(servers)],
+                                   store, "person", session=7, flush_interval=0.2)
+        stats = await collector.run(duration=1.5, report_interval=0.5)
+        for server, _ in servers:
+            server.close()
+        return store, stats
+
+    store, stats = asyncio.run(main())
+    assert stats["written"] == len(store) > 12 * 30
+    assert stats["flushes"] < stats["written"] / 12  # frames from all sensors share each flush
+    for sensor_id, metrics in stats["sensors"].items():
+        rows = store.select(sensor=sensor_id)
+        assert len(rows) == metrics["frames"] > 50
+        values = store.frames[rows].mean(axis=(1, 2))
+        assert set(np.unique(values)) <= {20 + sensor_id, 21 + sensor_id}
+        assert metrics["dropped"] == 0 and 30 < metrics["rate"] < 80
+    assert (store.index["session"] == 7).all()
+
+
+def test_sensor_reconnects_after_disconnect(tmp_path):
+    async def main():
+        server, address = await start_sensor(25, rate=100, close_after=10)
+        store = FrameStore(str(tmp_path / "store"), mode="a")
+        collector = MultiCollector([SensorSpec(5, address), SensorSpec(6, "tcp://127.0.0.1:1")], store, "empty",
+                                   flush_interval=0.1, backoff=(0.05, 0.2))
+        stats = await collector.run(duration=1.0)
+        server.close()
+        return stats
+
+    stats = asyncio.run(main())
+    assert stats["sensors"][5]["reconnects"] >= 2 and stats["sensors"][5]["frames"] >= 30
+    assert stats["sensors"][6]["frames"] == 0 and stats["sensors"][6]["error"]
+
+
+def test_full_queue_blocks_the_sensor_not_memory(tmp_path):
+    async def main():
+        server, address = await start_sensor(22, rate=400)
+        store = FrameStore(str(tmp_path / "store"), mode="a")
+        collector = MultiCollector([SensorSpec(1, address)], store, "person", queue_size=4,
+                                   batch_frames=10 ** 6, flush_interval=0.3)
+        stats = await collector.run(duration=0.8)
+        server.close()
+        return stats
+
+    stats = asyncio.run(main())
+    assert stats["sensors"][1]["blocked_s"] > 0.1
+    assert stats["written"] == stats["sensors"][1]["frames"]
+
+
+def test_full_queue_on_a_serial_port_goes_idle(tmp_path):
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    os.set_blocking(master, False)
+    stop = threading.Event()
+
+    def feed():
+        # Keep the port readable: the collector opens (and flushes) it first
+        seq = 0
+        while not stop.wait(0.01):
+            try:
+                while True:
+                    os.write(master, encode_frame(np.full(768, 22.0), seq % 65536, seq))
+                    seq += 1
+            except BlockingIOError:
+                pass
+
+    async def main():
+        store = FrameStore(str(tmp_path / "store"), mode="a")
+        collector = MultiCollector([SensorSpec(1, os.ttyname(slave))], store, "person", queue_size=4,
+                                   batch_frames=10 ** 6, flush_interval=0.4)
+        cpu = time.process_time()
+        stats = await collector.run(duration=1.0)
+        return stats, time.process_time() - cpu
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    try:
+        stats, cpu = asyncio.run(main())
+    finally:
+        stop.set()
+        feeder.join()
+        os.close(master)
+        os.close(slave)
+    assert stats["sensors"][1]["frames"] >= 4 and stats["sensors"][1]["blocked_s"] > 0.3
+    assert cpu < 0.5  # blocked on the queue, not spinning on the readable port
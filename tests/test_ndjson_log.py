@@ -0,0 +1,52 @@
+import json
+import threading
+import time
+
+from conftest import load_script
+from ndjson_log import NdjsonWriter, iter_chunks, iter_records
+
+dpt = load_script("distance-performance-test")
+
+
+def test_writer_flushes_and_reader_streams(tmp_path):
+    path = str(tmp_path / "log.ndjson")
+    with NdjsonWriter(path) as log:
+        log.write({"a": 1})
+        # Visible to a reader before the writer closes
+        assert [r["a"] for r in iter_records(path)] == [1]
+        log.write({"a": 2})
+    records = list(iter_records(path))
+    assert [r["a"] for r in records] == [1, 2]
+    assert all("host_time" in r for r in records)
+    assert [len(c) for c in iter_chunks(iter(range(5)), 2)] == [2, 2, 1]
+
+
+def test_legacy_json_array(tmp_path):
+    path = tmp_path / "raw.json"
+    path.write_text(json.dumps([{"a": 1}, {"a": 2}], indent=2))
+    assert [r["a"] for r in iter_records(str(path))] == [1, 2]
+
+
+def test_follow_reads_growing_file(tmp_path):
+    path = str(tmp_path / "live.ndjson")
+    log = NdjsonWriter(path)
+
+    def produce():
+        for i in range(5):
+            log.write({"i": i})
+            time.sleep(0.02)
+        log.close()
+
+    threading.Thread(target=produce).start()
+    records = list(iter_records(path, follow=True, idle_timeout=0.5, poll_interval=0.01))
+    assert [r["i"] for r in records] == list(range(5))
+
+
+def test_distance_results_both_formats(tmp_path):
+    ndjson = str(tmp_path / "d.ndjson")
+    with NdjsonWriter(ndjson) as log:
+        log.write({"type": "detection", "distance": 1.0, "result": "PERSON", "confidence": 0.9})
+        log.write({"type": "summary", "distance": 1.0, "detection_rate": 100.0, "avg_confidence": 0.9})
+    legacy = tmp_path / "d.json"
+    legacy.write_text(json.dumps({"1.0": {"detection_rate": 100.0, "avg_confidence": 0.9}}, indent=2))
+    assert dpt.load_distance_results(ndjson) == dpt.load_distance_results(str(legacy))
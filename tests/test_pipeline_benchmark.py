@@ -0,0 +1,72 @@
+import numpy as np
+
+from conftest import load_script
+
+bench = load_script("pipeline-benchmark")
+
+rng = np.random.default_rng(20)
+
+
+def fitted_model(tmp_path):
+    empty = 22 + rng.normal(0, 0.5, (60, 768))
+    person = 22 + rng.normal(0, 0.5, (60, 768))
+    person[:, 300:340] += 8
+    np.savetxt(tmp_path / "empty.csv", empty, fmt="%.2f", delimiter=",")
+    np.savetxt(tmp_path / "person.csv", person, fmt="%.2f", delimiter=",")
+    return bench.fit_dataset_model([f"{tmp_path / 'empty.csv'}:empty", f"{tmp_path / 'person.csv'}:person"])
+
+
+def test_synthetic_frames_follow_the_dataset(tmp_path):
+    model = fitted_model(tmp_path)
+    assert model.mean.shape == (2, 768) and 0 <= model.phi < 0.3
+    blocks = list(bench.synthesize(model, 5000, seed=3, block=700))
+    frames = np.concatenate([f for f, _ in blocks])
+    labels = np.concatenate([l for _, l in blocks])
+    assert frames.shape == (5000, 768) and 0.3 < labels.mean() < 0.7
+    hot = frames[:, 300:340].mean(axis=1)
+    assert np.all(hot[labels == 1] > 28) and np.all(hot[labels == 0] < 24)
+    assert abs(frames[labels == 0].std(axis=0).mean() - model.std[0].mean()) < 0.05
+    again = np.concatenate([f for f, _ in bench.synthesize(model, 5000, seed=3, block=4096)])
+    assert np.array_equal(frames, again)
+
+
+def test_byte_stream_serves_repeated_block():
+    stream = bench.ByteStream(b"abcdefg", 3, b"xy", chunk=4)
+    data = b""
+    while stream.in_waiting:
+        data += stream.read(stream.in_waiting)
+    assert data == b"abcdefg" * 3 + b"xy" and stream.read(1) == b""
+
+
+def test_stages_run_in_process(tmp_path):
+    document = bench.run_benchmarks(list(bench.STAGES), [300], str(tmp_path), fitted_model(tmp_path), repeat=1,
+                                    max_frames=100, isolate=False)
+    rows = {r["stage"]: r for r in document["results"]}
+    assert rows["latency_lines"]["skipped"]
+    for name in ("read_csv_data", "save_frames_as_images"):
+        assert rows[name]["frames"] == 100 and rows[name]["capped"]
+    for name in ("binary_decoder", "ascii_decoder", "serial_reader", "analyze_voting_windows",
+                 "evaluate_window_performance"):
+        assert rows[name]["frames"] == 300 and rows[name]["frames_per_s"] > 0
+        assert rows[name]["alloc_peak_mb"] is not None
+    assert (tmp_path / "results-300-s0.ndjson").exists()  # inputs are kept for the next run
+
+
+def test_serial_parsers_over_a_pty_in_a_worker(tmp_path):
+    document = bench.run_benchmarks(["serial_reader", "latency_lines"], [500], str(tmp_path), fitted_model(tmp_path),
+                                    repeat=1, stream="pty", allocations=False)
+    for row in document["results"]:
+        assert row["frames"] == 500 and row["peak_rss_mb"] > 0 and row["alloc_peak_mb"] is None
+
+
+def test_comparison_flags_slowdowns():
+    def document(seconds, alloc):
+        return {"results": [{"stage": "binary_decoder", "size": 1000, "frames": 1000, "seconds": seconds,
+                             "alloc_peak_mb": alloc},
+                            {"stage": "latency_lines", "size": 1000, "skipped": "needs --stream pty"}]}
+    baseline = document(1.0, 10.0)
+    assert bench.compare_results(baseline, document(1.05, 10.5))[0]["status"] == "ok"
+    assert bench.compare_results(baseline, document(1.2, 10.0))[0]["regressions"] == ["time"]
+    assert bench.compare_results(baseline, document(0.5, 20.0))[0]["regressions"] == ["memory"]
+    assert bench.compare_results(baseline, document(0.5, 10.0))[0]["status"] == "faster"
+    assert bench.compare_results(baseline, document(1.0, 10.0))[1]["status"] == "skipped"
@@ -0,0 +1,35 @@
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+from png_export import export_frames, frame_hash
+
+rng = np.random.default_rng(2)
+
+
+def test_matches_plt_imsave(tmp_path):
+    frames = rng.uniform(18, 34, (3, 24, 32)).astype(np.float32)
+    export_frames(frames, str(tmp_path), workers=1)
+    for i, frame in enumerate(frames):
+        reference = tmp_path / f"ref_{i}.png"
+        plt.imsave(str(reference), frame, cmap="inferno")
+        ours = plt.imread(str(tmp_path / f"frame_{i + 1}.png"))
+        assert ours.shape == (24, 32, 3)
+        assert np.abs(ours - plt.imread(str(reference))[:, :, :3]).max() < 1e-6
+
+
+def test_rerun_is_incremental_and_scales(tmp_path):
+    frames = rng.uniform(18, 34, (4, 24, 32)).astype(np.float32)
+    first = export_frames(frames, str(tmp_path), scale=2, workers=1)
+    assert first["exported"] == 4
+    frames[1] += 1
+    second = export_frames(frames, str(tmp_path), scale=2, workers=1)
+    assert (second["exported"], second["skipped"]) == (1, 3)
+    assert plt.imread(str(tmp_path / "frame_2.png")).shape == (48, 64, 3)
+
+
+def test_hash_covers_large_scales():
+    frame = rng.uniform(18, 34, (24, 32))
+    hashes = {frame_hash(frame, scale) for scale in (1, 44, 256, 300)}
+    assert len(hashes) == 4
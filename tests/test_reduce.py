@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from frame_protocol import KIND_POOL2, FrameDecoder, SubpageMerger, encode_frame, expand_pooled
+from inference import DenseClassifier
+from reduce import Reducer
+from train_dense import train_dense
+
+rng = np.random.default_rng(19)
+
+
+def frames(n):
+    return rng.normal(22, 2, (n, 24, 32)).astype(np.float32)
+
+
+@pytest.mark.parametrize("mode,reference", [("mean", np.mean), ("max", np.max)])
+@pytest.mark.parametrize("size", [2, 4])
+def test_pooling_matches_block_reduction(size, mode, reference):
+    data = frames(5)
+    expected = reference(data.reshape(5, 24 // size, size, 32 // size, size), axis=(2, 4))
+    pooled = Reducer(size, mode).pool_frames(data)
+    assert np.allclose(pooled, expected, atol=1e-5)
+    # Frames expanded by the host from pooled firmware packets pool to the same values
+    expanded = np.array([expand_pooled(p, size) for p in pooled])
+    assert np.allclose(Reducer(size, mode).pool_frames(expanded), pooled, atol=1e-5)
+
+
+@pytest.mark.parametrize("spec,size", [("full", 768), ("avg2", 192), ("max4", 48), ("rows4-20", 512),
+                                       ("rows4-20+cols8-24", 256), ("avg2+rows4-20", 128), ("proj", 56),
+                                       ("rows4-20+proj", 48), ("avg4+proj", 14)])
+def test_spec_output_sizes(spec, size):
+    reducer = Reducer.from_spec(spec)
+    assert reducer.output_size == size
+    assert reducer.transform(frames(3)).shape == (3, size)
+
+
+def test_projection_of_a_band_is_masked_mean():
+    data = frames(2)
+    out = Reducer.from_spec("rows4-20+proj").transform(data)
+    assert np.allclose(out[:, :16], data[:, 4:20].mean(axis=2), atol=1e-5)
+    assert np.allclose(out[:, 16:], data[:, 4:20].mean(axis=1), atol=1e-5)
+
+
+def test_learned_roi_keeps_the_discriminative_pixels():
+    data = frames(200)
+    labels = np.where(np.arange(200) % 2 == 0, "person", "empty")
+    data[labels == "person", 8:12, 10:14] += 5
+    reducer = Reducer.from_spec("roi16")
+    with pytest.raises(ValueError):
+        reducer.transform(data)
+    reducer = Reducer(roi=16 / 768).fit(data, labels)
+    assert reducer.output_size == 16
+    assert np.array_equal(np.argwhere(reducer.mask), np.argwhere(np.pad(np.ones((4, 4)), ((8, 12), (10, 18)))))
+
+
+def test_reduced_model_round_trips(tmp_path):
+    data = frames(120)
+    labels = np.where(np.arange(120) % 3 == 0, "person", "empty").astype(object)
+    data[labels == "person", 8:16, 10:14] += 8
+    model = train_dense(data, labels, hidden=(4,), epochs=5, reducer=Reducer.from_spec("max2+roi0.25"))
+    assert model.weights[0][0].shape == (48, 4)
+    model.save(tmp_path / "model.npz")
+    loaded = DenseClassifier.load(tmp_path / "model.npz")
+    assert loaded.reducer.spec == "max2+roi0.25" and np.array_equal(loaded.reducer.mask, model.reducer.mask)
+    assert np.allclose(loaded.predict_proba(data), model.predict_proba(data))
+
+
+def test_pooled_packets_expand_to_full_frames():
+    pooled = np.round(rng.normal(22, 2, 192), 2)
+    merged = SubpageMerger().merge(FrameDecoder().feed(encode_frame(pooled, 0, 0, KIND_POOL2)))
+    assert len(merged) == 1 and merged[0].pixels.shape == (768,)
+    assert np.allclose(Reducer(2).transform(merged[0].pixels[None]), pooled, atol=0.006)
@@ -0,0 +1,30 @@
+import numpy as np
+
+from conftest import load_script
+
+report = load_script("reduction-report")
+
+rng = np.random.default_rng(20)
+
+
+def test_frame_rates_follow_the_packet_size():
+    full, pooled = report.frame_rates(768), report.frame_rates(48)
+    assert full["bytes_per_frame"] == 1547 and pooled["bytes_per_frame"] == 107
+    assert abs(full["serial_hz"] - 11520 / 1547) < 1e-9
+    assert full["achievable_hz"] == full["serial_hz"] < pooled["achievable_hz"]
+    assert pooled["infer_ms"] < full["infer_ms"]
+    assert report.frame_rates(48, sensor_hz=4)["achievable_hz"] == 4
+    # The firmware only pools, so an ROI on the pooled grid still sends all of it
+    assert report.sent_values("max4") == 48 and report.sent_values("avg2+roi0.5") == 192
+    assert report.sent_values("rows4-20+proj") == 768
+    assert report.frame_rates(48, sent=768)["bytes_per_frame"] == 1547
+
+
+def test_reductions_are_scored_per_group():
+    labels = np.where(np.arange(90) % 2 == 0, "person", "empty").astype(object)
+    frames = (22 + rng.normal(0, 0.5, (90, 768))).astype(np.float32)
+    frames[labels == "person", 300:340] += 8
+    groups = np.array(["office", "lab", "home"] * 30, dtype=object)
+    row = report.evaluate_reduction(frames, labels, groups, "avg2+roi0.5", folds=3, hidden=(8,), epochs=30)
+    assert row["inputs"] == 96 and row["sent_values"] == 192
+    assert row["accuracy"] > 0.9 and set(row["groups"]) == {"office", "lab", "home"}
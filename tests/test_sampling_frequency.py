@@ -0,0 +1,54 @@
+import csv
+import json
+
+import numpy as np
+
+from conftest import load_script
+from firmware_sim import FirmwareSimulator
+
+sft = load_script("sampling-frequency-test")
+
+
+def test_timing_log_grows_past_its_capacity():
+    log = sft.TimingLog(["a", "b"], capacity=2)
+    for i in range(5):
+        log.append(i, 2 * i)
+    assert len(log) == 5 and log["b"].tolist() == [0, 2, 4, 6, 8]
+
+
+def test_summary_and_log_histogram():
+    values = np.arange(1, 1001, dtype=float)
+    summary = sft.summarize(values)
+    assert summary["count"] == 1000 and summary["max"] == 1000
+    assert summary["p50"] == np.percentile(values, 50) and summary["p99.9"] == np.percentile(values, 99.9)
+    buckets = sft.log_histogram([250, 251, 260, 500, 3.3], sub_buckets=8)
+    assert sum(c for _, _, c in buckets) == 5
+    for low, high, count in buckets:
+        assert high > low and (high - low) / low <= 1 / 8 + 1e-12
+    assert (240.0, 256.0, 2) in buckets and (256.0, 288.0, 1) in buckets
+
+
+def test_cadence_errors():
+    cadence = sft.cadence_errors([250, 251, 290, 500, 760, 240], refresh_hz=4)
+    assert cadence == {"nominal_period_ms": 250.0, "missed": 3, "late": 1}
+
+
+def test_frequency_test_against_simulator(tmp_path):
+    sim = FirmwareSimulator(np.zeros((4, 24, 32)), rate=4, time_scale=50, jitter=0.05, seed=5)
+    sim.mode = "IDLE"
+    sim.start()
+    try:
+        report = sft.test_sampling_frequency(sim.port, 115200, duration=0.6, refresh_hz=4,
+                                             export=str(tmp_path / "freq.json"), settle=0, time_scale=50)
+        sft.test_sampling_frequency(sim.port, 115200, duration=0.2, refresh_hz=4,
+                                    export=str(tmp_path / "freq.csv"), settle=0, time_scale=50)
+    finally:
+        sim.stop()
+    # Host intervals are compared in device time; a busy machine can only make frames late
+    assert report["frames"] > 5 and report["rate_hz"] < 6
+    assert report["cadence"]["missed"] + report["cadence"]["late"] < report["frames"] / 2
+    assert abs(report["capture"]["mean"] + report["process"]["mean"] - 250) < 25
+    saved = json.load(open(tmp_path / "freq.json"))
+    assert len(saved["samples"]["host_ms"]) == report["frames"]
+    rows = list(csv.reader(open(tmp_path / "freq.csv")))
+    assert rows[0] == ["host_ms", "capture", "process", "total"] and len(rows) > 1
@@ -0,0 +1,69 @@
+import json
+import time
+
+import numpy as np
+
+import tracing
+from frame_protocol import FrameDecoder, encode_frame
+from ingest import FrameRing, SerialReader, write_batches
+
+
+class FakeSerial:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    @property
+    def in_waiting(self):
+        return len(self.chunks[0]) if self.chunks else 0
+
+    def read(self, n):
+        if not self.chunks:
+            time.sleep(0.01)
+            return b""
+        return self.chunks.pop(0)
+
+
+def test_disabled_spans_record_nothing_and_are_cheap():
+    tracing.disable()
+    start = time.perf_counter()
+    for i in range(100000):
+        with tracing.span("decode", seq=i):
+            pass
+    assert time.perf_counter() - start < 1.0
+    assert tracing.span("decode") is tracing._NULL_SPAN
+
+
+def test_spans_and_device_frames_saved_as_chrome_trace(tmp_path):
+    tracing.enable(str(tmp_path / "trace.json"))
+    try:
+        with tracing.span("infer", seq=(0, 9)) as span:
+            span.set(frames=10)
+        received = time.perf_counter_ns()
+        tracing.device_frame(0, 1000, received)
+        tracing.device_frame(1, 1250, received + 300_000_000)  # 50 ms slower transfer
+        path = tracing.save()
+    finally:
+        tracing.disable()
+    trace = json.load(open(path))
+    spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    infer = [e for e in spans if e["name"] == "infer"][0]
+    assert infer["args"] == {"seq": [0, 9], "frames": 10} and infer["dur"] >= 0
+    transfers = sorted(e["dur"] for e in spans if e["name"] == "transfer")
+    assert transfers == [0, 50000]
+
+
+def test_ingest_pipeline_is_traced(tmp_path):
+    data = b"".join(encode_frame(np.zeros(768), seq, 250 * seq) for seq in range(6))
+    reader = SerialReader(FakeSerial([data[:2000], data[2000:]]), FrameDecoder(), FrameRing(64))
+    tracing.enable(str(tmp_path / "trace.json"))
+    try:
+        reader.start()
+        assert list(write_batches(reader, lambda frames, times: None, 6, batch_size=3))[-1] == 6
+        reader.stop()
+        events = tracing.events()
+    finally:
+        tracing.disable()
+    names = {e["name"] for e in events}
+    assert {"read", "decode", "write", "transfer", "frame read"} <= names
+    decodes = [e["args"]["seq"] for e in events if e["name"] == "decode" and "seq" in e["args"]]
+    assert decodes[0][0] == 0 and decodes[-1][1] == 5
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from train_dense import LABELS, stratified_folds, train_dense, train_sklearn
+
+rng = np.random.default_rng(17)
+
+
+def dataset(n):
+    labels = np.where(np.arange(n) % 3 == 0, "person", "empty").astype(object)
+    frames = (22 + rng.normal(0, 0.5, (n, 24, 32))).astype(np.float32)
+    frames[labels == "person", 8:16, 10:14] += 8
+    return frames, labels
+
+
+def test_folds_are_stratified():
+    labels = np.array(["person"] * 30 + ["empty"] * 70)
+    folds = stratified_folds(labels, 5, seed=1)
+    for fold in range(5):
+        assert np.sum((folds == fold) & (labels == "person")) == 6
+        assert np.sum((folds == fold) & (labels == "empty")) == 14
+
+
+@pytest.mark.parametrize("train", [train_dense, train_sklearn])
+def test_learns_a_warm_blob(train):
+    frames, labels = dataset(300)
+    model = train(frames[:200], labels[:200], hidden=(8,), epochs=20, seed=2)
+    assert model.labels == LABELS and [w.shape for w, _ in model.weights] == [(768, 8), (8, 2)]
+    index, _ = model.predict(frames[200:])
+    assert np.mean(np.array(LABELS, dtype=object)[index] == labels[200:]) > 0.95
+
+
+def test_rejects_unknown_labels():
+    frames, _ = dataset(4)
+    with pytest.raises(ValueError):
+        train_dense(frames, ["person", "dog", "empty", "empty"])
@@ -0,0 +1,91 @@
+import json
+from collections import deque
+
+import numpy as np
+
+from conftest import load_script
+
+vwa = load_script("voting-window-analysis")
+
+rng = np.random.default_rng(3)
+truth = np.repeat(rng.integers(0, 2, 40), rng.integers(1, 30, 40))
+votes = np.where(rng.random(len(truth)) < 0.8, truth, 1 - truth)
+
+
+def reference_counts(votes, truth, window, on, off=None):
+    window_votes, state, counts = deque(maxlen=window), False, np.zeros(4, dtype=int)
+    for i, (v, g) in enumerate(zip(votes, truth)):
+        window_votes.append(v)
+        if i < window - 1:
+            continue
+        s = sum(window_votes)
+        state = s >= on if off is None else (True if s >= on else False if s <= off else state)
+        counts += [state and g, state and not g, not state and not g, not state and g]
+    return counts
+
+
+def test_thresholds_match_reference_in_chunks():
+    sweep = vwa.VotingSweep([1, 3, 4, 7])
+    for chunk in np.array_split(np.arange(len(votes)), 9):
+        sweep.update(votes[chunk], truth[chunk])
+    for w in (1, 3, 4, 7):
+        for t in range(w + 1):
+            assert list(sweep.counts[w][t]) == list(reference_counts(votes, truth, w, t))
+
+
+def test_hysteresis_matches_reference():
+    sweep = vwa.VotingSweep([5], hysteresis=True)
+    half = len(votes) // 2
+    sweep.update(votes[:half], truth[:half])
+    sweep.update(votes[half:], truth[half:])
+    for (on, off), counts in zip(sweep.pairs[5], sweep.pair_counts[5]):
+        assert list(counts) == list(reference_counts(votes, truth, 5, on, off))
+
+
+def test_analysis_and_pareto(tmp_path, capsys):
+    log = tmp_path / "raw.json"
+    log.write_text(json.dumps([{"raw_prediction": "person" if v else "empty", "confidence": 0.9,
+                                "ground_truth": "person" if g else "empty"} for v, g in zip(votes, truth)]))
+    vwa.analyze_voting_windows(str(log), [{"window_size": 4, "threshold_percent": 50}])
+    tp, fp, tn, fn = reference_counts(votes, truth, 4, 2)
+    assert f"{(tp + tn) / (tp + fp + tn + fn) * 100:.1f}" in capsys.readouterr().out
+
+    sweep = vwa.VotingSweep(range(1, 9))
+    sweep.update(votes, truth)
+    front = vwa.pareto_front(sweep.table())
+    assert [r["latency_ms"] for r in front] == sorted(r["latency_ms"] for r in front)
+    assert all(a["accuracy"] < b["accuracy"] for a, b in zip(front, front[1:]))
+
+
+def test_streamed_ndjson_matches_in_memory(tmp_path):
+    log = str(tmp_path / "raw.ndjson")
+    with vwa.NdjsonWriter(log) as writer:
+        for v, g in zip(votes, truth):
+            writer.write({"raw_prediction": "person" if v else "empty", "confidence": 0.9,
+                          "ground_truth": "person" if g else "empty"})
+    streamed = vwa.VotingSweep([4, 6])
+    for v, _, g in vwa.iter_raw_results(log, chunk_size=17):
+        streamed.update(v, g)
+    whole = vwa.VotingSweep([4, 6])
+    whole.update(votes, truth)
+    assert streamed.seen == len(votes)
+    assert all((streamed.counts[w] == whole.counts[w]).all() for w in (4, 6))
+
+
+def test_capture_overwrites_unless_appending(tmp_path):
+    from firmware_sim import FirmwareSimulator
+
+    output = str(tmp_path / "raw.ndjson")
+    sim = FirmwareSimulator(np.zeros((20, 24, 32)), rate=4, time_scale=100, seed=1)
+    sim.mode = "IDLE"
+    sim.start()
+    try:
+        vwa.capture_raw_results(sim.port, 115200, 0.3, output, settle=0)
+        first = len(list(vwa.iter_records(output)))
+        vwa.capture_raw_results(sim.port, 115200, 0.3, output, settle=0)
+        second = len(list(vwa.iter_records(output)))
+        vwa.capture_raw_results(sim.port, 115200, 0.3, output, append=True, settle=0)
+        appended = len(list(vwa.iter_records(output)))
+    finally:
+        sim.stop()
+    assert first > 20 and second < 1.5 * first and appended > 1.5 * second
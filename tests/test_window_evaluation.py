@@ -0,0 +1,53 @@
+import numpy as np
+
+from conftest import load_script
+from frame_protocol import encode_subpage
+from inference import DenseClassifier
+
+we = load_script("window-evaluation")
+
+rng = np.random.default_rng(18)
+
+
+def write_capture(tmp_path, blocks=12, frames_per_block=10):
+    """Alternating empty/person blocks streamed as subpages 125 ms apart, with per-packet labels"""
+    stream, truth, seq = b"", [], 0
+    for block in range(blocks):
+        person = block % 2
+        for _ in range(frames_per_block):
+            frame = 22 + rng.normal(0, 0.3, (24, 32))
+            frame[8:16, 10:14] += 8 * person
+            for parity in (0, 1):
+                stream += encode_subpage(frame, parity, seq, 125 * seq)
+                truth.append(person)
+                seq += 1
+    (tmp_path / "capture.bin").write_bytes(stream)
+    (tmp_path / "truth.csv").write_text("label\n" + "\n".join(map(str, truth)) + "\n")
+    # Person probability follows the mean of the blob region
+    w = np.zeros((768, 2), np.float32)
+    w[np.ravel_multi_index(np.mgrid[8:16, 10:14].reshape(2, -1), (24, 32)), 0] = 1 / 32
+    DenseClassifier([(w, np.array([-26, 0], np.float32))]).save(tmp_path / "model.npz")
+
+
+def test_subpage_stride_detects_sooner(tmp_path, capsys):
+    write_capture(tmp_path)
+    rows = we.evaluate_capture(tmp_path / "capture.bin", tmp_path / "truth.csv", tmp_path / "model.npz")
+    full, double, subpage = rows
+    assert (subpage["window_ms"], subpage["stride_ms"]) == (250, 125)
+    assert full["missed"] == subpage["missed"] == 0
+    # Full frames wait for the second subpage; the rolling frame is classified on the first
+    assert full["latency_ms"] == 125
+    assert subpage["latency_ms"] < full["latency_ms"]
+    assert double["latency_ms"] >= full["latency_ms"]
+    assert full["accuracy"] == 100 and subpage["accuracy_same_frame"] == 100
+    assert subpage["accuracy_mixed_frames"] < 100  # frames straddling an arrival or departure
+    assert "ms sooner" in capsys.readouterr().out
+
+
+def test_ground_truth_by_timestamp(tmp_path):
+    write_capture(tmp_path, blocks=2)
+    (tmp_path / "times.csv").write_text("timestamp_ms,label\n0,empty\n2500,person\n")
+    from frame_protocol import read_capture
+    capture = read_capture(tmp_path / "capture.bin")
+    truth = we.capture_ground_truth(tmp_path / "times.csv", capture)
+    assert np.array_equal(truth, (capture.timestamp_ms >= 2500).astype(np.int8))